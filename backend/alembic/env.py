@@ -0,0 +1,79 @@
+"""
+Alembic environment for the Dirty Nairobi database
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+
+from app.core.config import settings
+from app.core.partitions import is_partition_table
+from app.models.photo import Base
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Arbitrary application-wide key; serializes concurrent `alembic upgrade`
+# runs (several containers or workers booting together) on PostgreSQL.
+MIGRATION_LOCK_ID = 7_262_731
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Keep monthly photo partitions out of autogenerate comparisons."""
+    if type_ == "table":
+        return not is_partition_table(name)
+    if type_ == "index" and parent_names.get("table_name"):
+        return not is_partition_table(parent_names["table_name"])
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL to stdout without a database connection."""
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database."""
+    connectable = config.attributes.get("connection")
+    if connectable is None:
+        connectable = create_engine(settings.database_url, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        is_postgresql = connection.dialect.name == "postgresql"
+        if is_postgresql:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                # One transaction per revision, so online index builds can
+                # step outside it with autocommit_block()
+                transaction_per_migration=True,
+                render_as_batch=connection.dialect.name == "sqlite",
+                include_name=include_name,
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if is_postgresql:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,47 @@
+"""create photos table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created by the old create_all() startup already have the
+    # table and its indexes; adopt them instead of failing.
+    if sa.inspect(op.get_bind()).has_table("photos"):
+        return
+
+    op.create_table(
+        "photos",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("s3_key", sa.String(255), nullable=False),
+        sa.Column("s3_url", sa.String(500), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("latitude", sa.Numeric(10, 8), nullable=False),
+        sa.Column("longitude", sa.Numeric(11, 8), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    create_index_online("ix_photos_s3_key", "photos", ["s3_key"])
+    create_index_online("idx_photos_location", "photos", ["latitude", "longitude"])
+    create_index_online("idx_photos_created_at", "photos", ["created_at"])
+    create_index_online("idx_photos_description", "photos", ["description"])
+
+
+def downgrade() -> None:
+    drop_index_online("idx_photos_description", "photos")
+    drop_index_online("idx_photos_created_at", "photos")
+    drop_index_online("idx_photos_location", "photos")
+    drop_index_online("ix_photos_s3_key", "photos")
+    op.drop_table("photos")
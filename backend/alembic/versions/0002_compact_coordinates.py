@@ -0,0 +1,96 @@
+"""store coordinates as integer microdegrees with a morton code
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:10:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.geo import morton_encode
+from app.core.migrations import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+photos = sa.table(
+    "photos",
+    sa.column("id", sa.String),
+    sa.column("latitude", sa.Numeric),
+    sa.column("longitude", sa.Numeric),
+    sa.column("lat_e6", sa.Integer),
+    sa.column("lng_e6", sa.Integer),
+    sa.column("geo_key", sa.BigInteger),
+)
+
+
+def _backfill_geo_keys(bind) -> None:
+    """Compute Morton codes in batches; the bit interleaving is done in Python."""
+    update = (
+        photos.update()
+        .where(photos.c.id == sa.bindparam("row_id"))
+        .values(geo_key=sa.bindparam("key"))
+    )
+    while True:
+        rows = bind.execute(
+            sa.select(photos.c.id, photos.c.lat_e6, photos.c.lng_e6)
+            .where(photos.c.geo_key.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {"row_id": row.id, "key": morton_encode(row.lat_e6, row.lng_e6)} for row in rows
+        ])
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("photos") as batch:
+        batch.add_column(sa.Column("lat_e6", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("lng_e6", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("geo_key", sa.BigInteger(), nullable=True))
+
+    bind = op.get_bind()
+    bind.execute(photos.update().values(
+        lat_e6=sa.cast(sa.func.round(photos.c.latitude * 1000000), sa.Integer),
+        lng_e6=sa.cast(sa.func.round(photos.c.longitude * 1000000), sa.Integer),
+    ))
+    _backfill_geo_keys(bind)
+
+    drop_index_online("idx_photos_location", "photos")
+    with op.batch_alter_table("photos") as batch:
+        batch.alter_column("lat_e6", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("lng_e6", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("geo_key", existing_type=sa.BigInteger(), nullable=False)
+        batch.drop_column("latitude")
+        batch.drop_column("longitude")
+
+    create_index_online("idx_photos_location", "photos", ["lat_e6", "lng_e6"])
+    create_index_online("idx_photos_geo_key", "photos", ["geo_key"])
+
+
+def downgrade() -> None:
+    drop_index_online("idx_photos_geo_key", "photos")
+    drop_index_online("idx_photos_location", "photos")
+    with op.batch_alter_table("photos") as batch:
+        batch.add_column(sa.Column("latitude", sa.Numeric(10, 8), nullable=True))
+        batch.add_column(sa.Column("longitude", sa.Numeric(11, 8), nullable=True))
+
+    op.get_bind().execute(photos.update().values(
+        latitude=sa.cast(photos.c.lat_e6, sa.Numeric()) / 1000000,
+        longitude=sa.cast(photos.c.lng_e6, sa.Numeric()) / 1000000,
+    ))
+
+    with op.batch_alter_table("photos") as batch:
+        batch.alter_column("latitude", existing_type=sa.Numeric(10, 8), nullable=False)
+        batch.alter_column("longitude", existing_type=sa.Numeric(11, 8), nullable=False)
+        batch.drop_column("geo_key")
+        batch.drop_column("lng_e6")
+        batch.drop_column("lat_e6")
+
+    create_index_online("idx_photos_location", "photos", ["latitude", "longitude"])
@@ -0,0 +1,81 @@
+"""partition photos by created_at month on postgresql
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:20:00.000000
+
+Rebuilds photos as a range-partitioned table with monthly partitions and a
+default partition. The copy holds an exclusive lock on photos for its
+duration, so run it in a maintenance window on large tables. PostgreSQL
+requires the partition key in the primary key, which becomes
+(id, created_at). Other databases are left unchanged.
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.partitions import DEFAULT_PARTITION, add_months, create_partition, month_start, month_starts
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Months created ahead of the current one; `python -m app.cli partitions`
+# keeps extending this window.
+MONTHS_AHEAD = 3
+
+INDEXES = [
+    ("ix_photos_s3_key", "s3_key"),
+    ("idx_photos_location", "lat_e6, lng_e6"),
+    ("idx_photos_geo_key", "geo_key"),
+    ("idx_photos_created_at", "created_at"),
+    ("idx_photos_description", "description"),
+]
+
+COLUMNS = "id, s3_key, s3_url, description, lat_e6, lng_e6, geo_key, created_at, updated_at"
+
+
+def _rebuild(partitioned: bool) -> None:
+    """Copy photos into a new table, partitioned or plain."""
+    bind = op.get_bind()
+    op.execute("ALTER TABLE photos RENAME TO photos_old")
+    op.execute("ALTER TABLE photos_old DROP CONSTRAINT photos_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    if partitioned:
+        op.execute(
+            "CREATE TABLE photos (LIKE photos_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+            "PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+        )
+        oldest = bind.execute(sa.text("SELECT min(created_at) FROM photos_old")).scalar()
+        now = datetime.now(timezone.utc)
+        for month in month_starts(oldest or now, add_months(month_start(now), MONTHS_AHEAD)):
+            create_partition(bind, month)
+        op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF photos DEFAULT")
+    else:
+        op.execute(
+            "CREATE TABLE photos (LIKE photos_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+            "PRIMARY KEY (id))"
+        )
+
+    op.execute(f"INSERT INTO photos ({COLUMNS}) SELECT {COLUMNS} FROM photos_old")
+    op.execute("DROP TABLE photos_old")
+    # Indexes on a partitioned parent cascade to every partition
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON photos ({columns})")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rebuild(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rebuild(partitioned=False)
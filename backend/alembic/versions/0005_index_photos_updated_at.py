@@ -0,0 +1,49 @@
+"""index photos by updated_at for snapshot deltas
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:40:00.000000
+
+GET /photos/changes and incremental snapshot publishing read rows by
+updated_at. On partitioned PostgreSQL tables CREATE INDEX CONCURRENTLY is
+not supported on the parent, so each partition is indexed concurrently
+and the indexes are attached to an index created ON ONLY the parent.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_online, drop_index_online
+from app.core.partitions import PARENT_TABLE, is_partitioned
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "idx_photos_updated_at"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not is_partitioned(bind):
+        create_index_online(INDEX_NAME, PARENT_TABLE, ["updated_at"])
+        return
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON ONLY {PARENT_TABLE} (updated_at)")
+    partitions = bind.execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(:table)"
+    ), {"table": PARENT_TABLE}).scalars().all()
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_updated_at_idx ON {partition} (updated_at)")
+    for partition in partitions:
+        op.execute(f"ALTER INDEX {INDEX_NAME} ATTACH PARTITION {partition}_updated_at_idx")
+
+
+def downgrade() -> None:
+    if is_partitioned(op.get_bind()):
+        # Dropping the parent index drops the attached partition indexes
+        op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        return
+    drop_index_online(INDEX_NAME, PARENT_TABLE)
@@ -0,0 +1,40 @@
+"""create hotspots table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:50:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hotspots",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("report_count", sa.Integer(), nullable=False),
+        sa.Column("active_periods", sa.Integer(), nullable=False),
+        sa.Column("lat_e6", sa.Integer(), nullable=False),
+        sa.Column("lng_e6", sa.Integer(), nullable=False),
+        sa.Column("area_m2", sa.Float(), nullable=False),
+        sa.Column("polygon", sa.JSON(), nullable=False),
+        sa.Column("first_report_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_report_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("window_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("window_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("idx_hotspots_rank", "hotspots", ["rank"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_hotspots_rank", table_name="hotspots")
+    op.drop_table("hotspots")
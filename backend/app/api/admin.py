@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.profiling import is_admin_request, profile_log, slow_query_log
+import logging
+
+logger = logging.getLogger(__name__)
+
+def require_admin(request: Request):
+    """Reject requests without the admin token; admin endpoints are off until ADMIN_TOKEN is set."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not is_admin_request(request.headers):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/slow-queries")
+async def get_slow_queries():
+    """List captured slow SQL statements, newest first."""
+    return {"slow_queries": slow_query_log.list()}
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    """Clear the slow-query log."""
+    slow_query_log.clear()
+    return {"message": "Slow-query log cleared"}
+
+@router.get("/profiles")
+async def get_profiles():
+    """List captured request profiles without their reports."""
+    return {
+        "profiles": [
+            {key: value for key, value in entry.items() if key != "report"}
+            for entry in profile_log.list()
+        ]
+    }
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int):
+    """Return the text report of a captured request profile."""
+    entry = profile_log.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return entry["report"]
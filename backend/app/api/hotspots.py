@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from app.core.database import get_read_db
+from app.schemas.hotspot import HotspotListResponse
+from app.services.hotspot_service import hotspot_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("", response_model=HotspotListResponse)
+async def get_hotspots(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of hotspots"),
+    db: Session = Depends(get_read_db)
+):
+    """Persistent dumping hotspots, highest score first."""
+    try:
+        hotspots = hotspot_service.get_hotspots(db, limit=limit)
+        # Detection runs every HOTSPOT_INTERVAL_SECONDS
+        response.headers["Cache-Control"] = "public, max-age=300"
+        latest = hotspots[0] if hotspots else None
+        return HotspotListResponse(
+            hotspots=hotspots,
+            window_start=latest.window_start if latest else None,
+            window_end=latest.window_end if latest else None,
+            computed_at=latest.computed_at if latest else None
+        )
+    except Exception as e:
+        logger.error(f"Error fetching hotspots: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.api.admin import require_admin
+from app.core.database import get_db
+from app.schemas.job import JobListResponse, JobResponse
+from app.services.job_service import job_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("", response_model=JobListResponse)
+async def get_jobs(
+    status: Optional[str] = Query(None, description="Filter by status"),
+    type: Optional[str] = Query(None, description="Filter by job type"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs"),
+    db: Session = Depends(get_db)
+):
+    """List recent background jobs and counts per type and status."""
+    try:
+        return JobListResponse(
+            jobs=job_service.get_jobs(db, status=status, job_type=type, limit=limit),
+            counts=job_service.get_counts(db)
+        )
+    except Exception as e:
+        logger.error(f"Error fetching jobs: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    """Get a background job by ID."""
+    job = job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
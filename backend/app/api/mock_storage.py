@@ -0,0 +1,72 @@
+"""
+Mock S3 endpoints for local development, registered only with the mock storage backend
+"""
+from fastapi import APIRouter, HTTPException, Request, Response
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.put("/mock-upload/{s3_key}")
+async def mock_s3_upload(s3_key: str, request: Request):
+    """Mock S3 upload endpoint for local development."""
+    try:
+        # Read the uploaded file data
+        body = await request.body()
+        
+        # Create local storage directory if it doesn't exist
+        import os
+        local_storage_path = "local_photos"
+        os.makedirs(local_storage_path, exist_ok=True)
+        
+        # Save the file locally
+        file_path = os.path.join(local_storage_path, s3_key.replace('_', '/'))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        
+        with open(file_path, 'wb') as f:
+            f.write(body)
+        
+        logger.info(f"Mock S3 upload successful: {s3_key}")
+        return {"message": "Upload successful"}
+        
+    except Exception as e:
+        logger.error(f"Mock S3 upload failed: {e}")
+        raise HTTPException(status_code=500, detail="Upload failed")
+
+@router.put("/mock-upload-part/{upload_id}/{part_number}")
+async def mock_s3_upload_part(upload_id: str, part_number: int, request: Request):
+    """Mock S3 UploadPart endpoint; returns the part's ETag header like S3."""
+    from app.services.s3_service import s3_service
+    
+    try:
+        body = await request.body()
+        etag = s3_service.upload_part(upload_id, part_number, body)
+        return Response(status_code=200, headers={"ETag": etag})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Mock S3 part upload failed: {e}")
+        raise HTTPException(status_code=500, detail="Upload failed")
+
+@router.get("/mock-photos/{s3_key}")
+async def mock_s3_download(s3_key: str):
+    """Mock S3 download endpoint for local development."""
+    try:
+        import os
+        from fastapi.responses import FileResponse
+        
+        local_storage_path = "local_photos"
+        file_path = os.path.join(local_storage_path, s3_key.replace('_', '/'))
+        
+        if os.path.exists(file_path):
+            if file_path.endswith(".gz"):
+                # Precompressed snapshots; S3 serves them with this header
+                return FileResponse(file_path, media_type="application/json", headers={"Content-Encoding": "gzip"})
+            return FileResponse(file_path)
+        else:
+            raise HTTPException(status_code=404, detail="File not found")
+            
+    except Exception as e:
+        logger.error(f"Mock S3 download failed: {e}")
+        raise HTTPException(status_code=404, detail="File not found")
\ No newline at end of file
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import List, Optional
-from app.core.database import get_db
-from app.schemas.photo import PhotoCreate, PhotoResponse, PhotoFilter
-from app.schemas.s3 import PresignedUrlRequest, PresignedUrlResponse
+from app.core.database import get_db, get_read_db, mark_primary_sticky, prefers_primary
+from app.schemas.photo import PhotoChangesResponse, PhotoCreate, PhotoResponse, PhotoFilter
+from app.core.config import settings
+from app.schemas.s3 import (
+    MultipartCompleteRequest, MultipartResumeRequest, MultipartUploadRef, MultipartUploadRequest,
+    MultipartUploadResponse, PartUploadUrl, PresignedUrlRequest, PresignedUrlResponse, UploadedPart
+)
 from app.services.photo_service import photo_service
 from app.services.s3_service import s3_service
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -39,14 +45,121 @@ async def generate_presigned_url(request: PresignedUrlRequest):
         logger.error(f"Unexpected error generating pre-signed URL: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _part_layout(file_size: int):
+    """Part size and count; parts grow beyond the default to stay within S3's 10,000 part limit."""
+    part_size = max(settings.multipart_part_size, math.ceil(file_size / 10000))
+    return part_size, math.ceil(file_size / part_size)
+
+def _part_urls(s3_key: str, upload_id: str, part_numbers) -> List[PartUploadUrl]:
+    return [
+        PartUploadUrl(
+            part_number=part_number,
+            upload_url=s3_service.generate_presigned_part_url(s3_key, upload_id, part_number, expires_in=3600)
+        )
+        for part_number in part_numbers
+    ]
+
+@router.post("/upload/multipart", response_model=MultipartUploadResponse)
+async def start_multipart_upload(request: MultipartUploadRequest):
+    """Start a multipart upload and return pre-signed URLs for every part."""
+    try:
+        s3_key = s3_service.generate_s3_key(request.filename)
+        upload_id = s3_service.create_multipart_upload(s3_key, request.content_type)
+        part_size, part_count = _part_layout(request.file_size)
+        
+        return MultipartUploadResponse(
+            upload_id=upload_id,
+            s3_key=s3_key,
+            part_size=part_size,
+            part_count=part_count,
+            parts=_part_urls(s3_key, upload_id, range(1, part_count + 1)),
+            expires_in=3600
+        )
+        
+    except ValueError as e:
+        logger.error(f"Error starting multipart upload: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error starting multipart upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/upload/multipart/resume", response_model=MultipartUploadResponse)
+async def resume_multipart_upload(request: MultipartResumeRequest):
+    """List the parts already uploaded and return fresh URLs for the missing ones."""
+    try:
+        part_size, part_count = _part_layout(request.file_size)
+        uploaded = [
+            UploadedPart(**part) for part in s3_service.list_parts(request.s3_key, request.upload_id)
+        ]
+        done = {part.part_number for part in uploaded}
+        missing = [number for number in range(1, part_count + 1) if number not in done]
+        
+        return MultipartUploadResponse(
+            upload_id=request.upload_id,
+            s3_key=request.s3_key,
+            part_size=part_size,
+            part_count=part_count,
+            parts=_part_urls(request.s3_key, request.upload_id, missing),
+            uploaded_parts=uploaded,
+            expires_in=3600
+        )
+        
+    except ValueError as e:
+        logger.error(f"Error resuming multipart upload: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error resuming multipart upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/upload/multipart/complete")
+async def complete_multipart_upload(request: MultipartCompleteRequest):
+    """Assemble the uploaded parts; the s3_key can then be saved with POST /photos."""
+    try:
+        if request.parts is not None:
+            parts = [part.dict(exclude={"size"}) for part in request.parts]
+        else:
+            parts = s3_service.list_parts(request.s3_key, request.upload_id)
+        
+        # Parts are numbered 1..N by _part_layout; a gap means a part never arrived
+        numbers = sorted(part["part_number"] for part in parts)
+        if numbers != list(range(1, len(numbers) + 1)):
+            missing = sorted(set(range(1, (numbers[-1] if numbers else 1) + 1)) - set(numbers))
+            raise ValueError(f"Missing parts: {', '.join(map(str, missing))}")
+        
+        s3_service.complete_multipart_upload(request.s3_key, request.upload_id, parts)
+        return {"s3_key": request.s3_key}
+        
+    except ValueError as e:
+        logger.error(f"Error completing multipart upload: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error completing multipart upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/upload/multipart/abort")
+async def abort_multipart_upload(request: MultipartUploadRef):
+    """Abort a multipart upload and discard the uploaded parts."""
+    try:
+        if not s3_service.abort_multipart_upload(request.s3_key, request.upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return {"message": "Upload aborted"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error aborting multipart upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.post("/photos", response_model=PhotoResponse)
 async def create_photo(
     photo_data: PhotoCreate,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Create a new photo record after successful upload."""
     try:
         photo = photo_service.create_photo(db=db, photo_data=photo_data)
+        mark_primary_sticky(response)
         return photo
         
     except ValueError as e:
@@ -58,30 +171,103 @@ async def create_photo(
 
 @router.get("/photos", response_model=List[PhotoResponse])
 async def get_photos(
+    request: Request,
     description: Optional[str] = Query(None, description="Filter by description"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
-    db: Session = Depends(get_db)
+    include_archived: bool = Query(False, description="Also search photos archived to Parquet"),
+    min_lat: Optional[float] = Query(None, description="Viewport south edge"),
+    min_lng: Optional[float] = Query(None, description="Viewport west edge"),
+    max_lat: Optional[float] = Query(None, description="Viewport north edge"),
+    max_lng: Optional[float] = Query(None, description="Viewport east edge"),
+    db: Session = Depends(get_read_db)
 ):
     """Get all photos with optional filtering."""
     try:
         filters = PhotoFilter(
             description=description,
             limit=limit,
-            offset=offset
+            offset=offset,
+            include_archived=include_archived,
+            min_lat=min_lat,
+            min_lng=min_lng,
+            max_lat=max_lat,
+            max_lng=max_lng
         )
         
-        photos = photo_service.get_photos(db=db, filters=filters)
+        photos = photo_service.get_photos(
+            db=db, filters=filters, use_read_model=not prefers_primary(request)
+        )
         return photos
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching photos: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/photos/count")
+async def get_photos_count(
+    request: Request,
+    description: Optional[str] = Query(None, description="Filter by description"),
+    include_archived: bool = Query(False, description="Also count photos archived to Parquet"),
+    min_lat: Optional[float] = Query(None, description="Viewport south edge"),
+    min_lng: Optional[float] = Query(None, description="Viewport west edge"),
+    max_lat: Optional[float] = Query(None, description="Viewport north edge"),
+    max_lng: Optional[float] = Query(None, description="Viewport east edge"),
+    db: Session = Depends(get_read_db)
+):
+    """Get total count of photos matching filters."""
+    try:
+        filters = PhotoFilter(
+            description=description,
+            limit=1,
+            offset=0,
+            include_archived=include_archived,
+            min_lat=min_lat,
+            min_lng=min_lng,
+            max_lat=max_lat,
+            max_lng=max_lng
+        )
+        count = photo_service.get_photos_count(
+            db=db, filters=filters, use_read_model=not prefers_primary(request)
+        )
+        
+        return {"count": count}
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error counting photos: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/photos/changes", response_model=PhotoChangesResponse)
+async def get_photo_changes(
+    since: datetime = Query(..., description="The snapshot manifest's changes_since, or next_since from the previous page"),
+    after_id: Optional[str] = Query(None, description="next_after_id from the previous page"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of results"),
+    db: Session = Depends(get_read_db)
+):
+    """Get photos created or updated since a published snapshot."""
+    try:
+        photos, has_more = photo_service.get_changes(db=db, since=since, after_id=after_id, limit=limit)
+        return PhotoChangesResponse(
+            photos=photos,
+            has_more=has_more,
+            next_since=photos[-1].updated_at if photos else since,
+            next_after_id=photos[-1].id if photos else after_id
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching photo changes: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/photos/{photo_id}", response_model=PhotoResponse)
 async def get_photo(
     photo_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific photo by ID."""
     try:
@@ -100,6 +286,7 @@ async def get_photo(
 @router.delete("/photos/{photo_id}")
 async def delete_photo(
     photo_id: str,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Delete a photo."""
@@ -108,6 +295,7 @@ async def delete_photo(
         if not success:
             raise HTTPException(status_code=404, detail="Photo not found")
         
+        mark_primary_sticky(response)
         return {"message": "Photo deleted successfully"}
         
     except HTTPException:
@@ -115,65 +303,3 @@ async def delete_photo(
     except Exception as e:
         logger.error(f"Error deleting photo {photo_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-
-@router.get("/photos/count")
-async def get_photos_count(
-    description: Optional[str] = Query(None, description="Filter by description"),
-    db: Session = Depends(get_db)
-):
-    """Get total count of photos matching filters."""
-    try:
-        filters = PhotoFilter(description=description, limit=1, offset=0)
-        count = photo_service.get_photos_count(db=db, filters=filters)
-        
-        return {"count": count}
-        
-    except Exception as e:
-        logger.error(f"Error counting photos: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-# Mock endpoints for local development
-@router.put("/mock-upload/{s3_key}")
-async def mock_s3_upload(s3_key: str, request: Request):
-    """Mock S3 upload endpoint for local development."""
-    try:
-        # Read the uploaded file data
-        body = await request.body()
-        
-        # Create local storage directory if it doesn't exist
-        import os
-        local_storage_path = "local_photos"
-        os.makedirs(local_storage_path, exist_ok=True)
-        
-        # Save the file locally
-        file_path = os.path.join(local_storage_path, s3_key.replace('_', '/'))
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        with open(file_path, 'wb') as f:
-            f.write(body)
-        
-        logger.info(f"Mock S3 upload successful: {s3_key}")
-        return {"message": "Upload successful"}
-        
-    except Exception as e:
-        logger.error(f"Mock S3 upload failed: {e}")
-        raise HTTPException(status_code=500, detail="Upload failed")
-
-@router.get("/mock-photos/{s3_key}")
-async def mock_s3_download(s3_key: str):
-    """Mock S3 download endpoint for local development."""
-    try:
-        import os
-        from fastapi.responses import FileResponse
-        
-        local_storage_path = "local_photos"
-        file_path = os.path.join(local_storage_path, s3_key.replace('_', '/'))
-        
-        if os.path.exists(file_path):
-            return FileResponse(file_path)
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
-            
-    except Exception as e:
-        logger.error(f"Mock S3 download failed: {e}")
-        raise HTTPException(status_code=404, detail="File not found")
\ No newline at end of file
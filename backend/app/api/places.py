@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List
+from app.schemas.place import PlaceResponse
+from app.services.gazetteer_service import gazetteer
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/search", response_model=List[PlaceResponse])
+async def search_places(
+    response: Response,
+    q: str = Query(..., max_length=100, description="Place name or the start of one; typos are tolerated"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of places")
+):
+    """Search the offline Nairobi gazetteer for the location autocomplete."""
+    try:
+        # The gazetteer only changes on deploy
+        response.headers["Cache-Control"] = "public, max-age=3600"
+        if len(q.strip()) < 2:
+            return []
+        return [place._asdict() for place in gazetteer.search(q, limit)]
+    except Exception as e:
+        logger.error(f"Error searching places: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
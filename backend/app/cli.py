@@ -0,0 +1,145 @@
+"""
+Maintenance commands.
+
+Examples:
+    python -m app.cli archive --older-than-days 365
+    python -m app.cli archive --dry-run
+    python -m app.cli partitions --months-ahead 3
+    python -m app.cli worker
+    python -m app.cli import reports.csv --dry-run
+    python -m app.cli import reports.geojson --rejects rejected.csv
+    python -m app.cli publish-snapshot --full
+    python -m app.cli detect-hotspots
+"""
+import argparse
+import json
+import logging
+import signal
+
+from app.core.database import SessionLocal, get_engine
+
+
+def archive(args) -> dict:
+    """Move old photos to Parquet files on the storage backend."""
+    from app.services.archive_service import archive_service
+
+    get_engine()
+    db = SessionLocal()
+    try:
+        return archive_service.archive_photos(
+            db,
+            older_than_days=args.older_than_days,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run
+        )
+    finally:
+        db.close()
+
+
+def partitions(args) -> dict:
+    """Create monthly partitions for the coming months (PostgreSQL only)."""
+    from app.services.partition_service import partition_service
+
+    return {"partitions": partition_service.ensure_upcoming(args.months_ahead)}
+
+
+def worker(args) -> dict:
+    """Run background jobs without the API (e.g. alongside Lambda deployments)."""
+    from app.services.hotspot_service import start_hotspot_schedule
+    from app.services.job_service import job_runner
+    from app.services.partition_service import start_partition_schedule
+
+    get_engine()
+    start_hotspot_schedule()
+    start_partition_schedule()
+    if args.until_idle:
+        job_runner.run_until_idle(timeout=args.timeout)
+        return {"worker": job_runner.worker_id, "status": "idle"}
+
+    # Block the signals before the runner threads start so they inherit the
+    # mask and only sigwait below receives them
+    stop_signals = {signal.SIGINT, signal.SIGTERM}
+    signal.pthread_sigmask(signal.SIG_BLOCK, stop_signals)
+    job_runner.start()
+    try:
+        signal.sigwait(stop_signals)
+    finally:
+        job_runner.stop()
+    return {"worker": job_runner.worker_id, "status": "stopped"}
+
+
+def import_photos(args) -> dict:
+    """Import photo reports from a CSV or GeoJSON file."""
+    from app.services.import_service import import_service
+
+    return import_service.import_file(
+        args.path,
+        fmt=args.format,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+        rejects_path=args.rejects
+    )
+
+
+def publish_snapshot(args) -> dict:
+    """Publish the static map snapshot now instead of waiting for a write."""
+    from app.services.snapshot_service import snapshot_publisher
+
+    return snapshot_publisher.publish(full=args.full)
+
+
+def detect_hotspots(args) -> dict:
+    """Detect dumping hotspots now instead of waiting for the scheduled run."""
+    from app.services.hotspot_service import hotspot_service
+
+    return hotspot_service.detect()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Dirty Nairobi maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help=archive.__doc__)
+    archive_parser.add_argument("--older-than-days", type=int, default=None,
+                                help="Defaults to ARCHIVE_AFTER_DAYS")
+    archive_parser.add_argument("--batch-size", type=int, default=None)
+    archive_parser.add_argument("--dry-run", action="store_true", help="Only count the photos to archive")
+    archive_parser.set_defaults(handler=archive)
+
+    partitions_parser = subparsers.add_parser("partitions", help=partitions.__doc__)
+    partitions_parser.add_argument("--months-ahead", type=int, default=None, help="Defaults to PARTITION_MONTHS_AHEAD")
+    partitions_parser.set_defaults(handler=partitions)
+
+    worker_parser = subparsers.add_parser("worker", help=worker.__doc__)
+    worker_parser.add_argument("--until-idle", action="store_true",
+                               help="Exit once no jobs are due instead of running until stopped")
+    worker_parser.add_argument("--timeout", type=float, default=300.0, help="Maximum seconds with --until-idle")
+    worker_parser.set_defaults(handler=worker)
+
+    import_parser = subparsers.add_parser("import", help=import_photos.__doc__)
+    import_parser.add_argument("path", help="CSV, GeoJSON or newline-delimited GeoJSON file")
+    import_parser.add_argument("--format", choices=["csv", "geojson", "geojsonseq"],
+                               help="Defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int, default=None, help="Defaults to IMPORT_CHUNK_SIZE")
+    import_parser.add_argument("--dry-run", action="store_true", help="Only validate the file")
+    import_parser.add_argument("--checkpoint", help="Defaults to <path>.import-checkpoint.json")
+    import_parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    import_parser.add_argument("--rejects", help="Write rejected records (row, error) to this CSV file")
+    import_parser.set_defaults(handler=import_photos)
+
+    snapshot_parser = subparsers.add_parser("publish-snapshot", help=publish_snapshot.__doc__)
+    snapshot_parser.add_argument("--full", action="store_true", help="Rebuild from the database instead of the last version")
+    snapshot_parser.set_defaults(handler=publish_snapshot)
+
+    hotspots_parser = subparsers.add_parser("detect-hotspots", help=detect_hotspots.__doc__)
+    hotspots_parser.set_defaults(handler=detect_hotspots)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(args.handler(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
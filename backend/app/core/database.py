@@ -1,32 +1,179 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import instrument_engine
+from .profiling import instrument_slow_queries
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=False  # Set to True for SQL query logging in development
-)
+# Header carrying the Unix time until which a client that just wrote reads
+# from the primary. The API sets it on writes and the client echoes it back:
+# the frontend calls the API cross-site, where a SameSite=Lax cookie is never
+# sent (and third-party cookies are blocked by some browsers anyway)
+PRIMARY_STICKY_HEADER = "X-Read-Primary-Until"
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+_engine = None
+_replica_engines = None
+_replica_cycle = None
+_engine_lock = threading.Lock()
+
+# Create SessionLocal class; it is bound to the engine when the engine is created
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+def _install_idle_pre_ping(engine, idle_seconds: float):
+    """Ping only connections that sat idle in the pool longer than idle_seconds."""
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            # The pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+def _create_engine(url: str, name: str):
+    """Create and instrument a SQLAlchemy engine."""
+    strategy = settings.db_pool_pre_ping
+    if strategy not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_POOL_PRE_PING must be one of: {', '.join(PRE_PING_STRATEGIES)}")
+
+    options = {
+        "pool_pre_ping": strategy == "always",
+        "pool_recycle": settings.db_pool_recycle,
+        "echo": False  # Set to True for SQL query logging in development
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+
+    engine = create_engine(url, **options)
+    if strategy == "idle":
+        _install_idle_pre_ping(engine, settings.db_pool_ping_idle_seconds)
+    instrument_engine(engine, name)
+    instrument_slow_queries(engine, name)
+    return engine
+
+def get_engine():
+    """Return the primary SQLAlchemy engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(settings.database_url, "primary")
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_replica_engines():
+    """Return the read replica engines, creating them on first use."""
+    global _replica_engines, _replica_cycle
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                urls = [url.strip() for url in settings.database_read_replica_urls.split(",") if url.strip()]
+                engines = [_create_engine(url, f"replica-{index}") for index, url in enumerate(urls)]
+                _replica_cycle = itertools.cycle(engines) if engines else None
+                _replica_engines = engines
+    return _replica_engines
+
+def get_read_engine():
+    """Pick a read replica round-robin, or the primary when none are configured."""
+    if not get_replica_engines():
+        return get_engine()
+    return next(_replica_cycle)
+
+def reset_engines_after_fork():
+    """Drop pooled connections inherited from a parent process without closing them.
+
+    Call in each forked worker; the parent keeps using its own connections.
+    """
+    for engine in [_engine, *(_replica_engines or [])]:
+        if engine is not None:
+            engine.dispose(close=False)
+
+def warm_pool(connections: int) -> int:
+    """Open up to ``connections`` connections per engine and return them to the pool."""
+    opened = 0
+    for engine in [get_engine(), *get_replica_engines()]:
+        checked_out = []
+        try:
+            for _ in range(connections):
+                checked_out.append(engine.connect())
+        finally:
+            for connection in checked_out:
+                connection.close()
+        opened += len(checked_out)
+    return opened
+
+# In lazy mode (AWS Lambda) the engine and its DB driver load on the first query
+if not settings.lazy_init:
+    get_engine()
 
 def get_db():
     """Dependency to get database session."""
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """Dependency to get a read-only session, routed to a replica when possible.
+
+    Clients that wrote recently (see mark_primary_sticky) read from the
+    primary so they see their own writes despite replication lag.
+    """
+    get_engine()
+    if prefers_primary(request):
+        db = SessionLocal()
+    else:
+        db = SessionLocal(bind=get_read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+def prefers_primary(request: Request) -> bool:
+    """Whether the client echoed a primary-sticky header that hasn't expired yet."""
+    try:
+        until = float(request.headers.get(PRIMARY_STICKY_HEADER, ""))
+    except ValueError:
+        return False
+    now = time.time()
+    # Clients can't extend the window beyond what a write would grant
+    return now < until <= now + settings.replica_sticky_seconds + 1
+
+def mark_primary_sticky(response: Response):
+    """Route this client's reads to the primary for settings.replica_sticky_seconds."""
+    if settings.database_read_replica_urls and settings.replica_sticky_seconds > 0:
+        response.headers[PRIMARY_STICKY_HEADER] = str(int(time.time()) + settings.replica_sticky_seconds)
+
 def create_tables():
     """Create all tables in the database."""
     from app.models.photo import Base, Photo  # Import all models
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 def drop_tables():
     """Drop all tables in the database."""
     from app.models.photo import Base
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=get_engine())
@@ -0,0 +1,139 @@
+"""
+Coordinate encoding helpers.
+
+Coordinates are stored as integer microdegrees (1e-6 degree, about 11 cm
+at the equator), which fit in a 4-byte integer and hydrate without going
+through Decimal. A Morton (Z-order) code interleaves the bits of both
+coordinates into one 64-bit integer, so a bounding box maps onto a few
+index range scans that are then refined with the exact coordinates.
+"""
+from typing import List, Tuple
+
+MICRODEGREES = 1_000_000
+
+# Offsets making both coordinates non-negative before interleaving;
+# 180e6 < 2**28 and 360e6 < 2**29, so 29 bits per axis are enough.
+_LAT_OFFSET = 90 * MICRODEGREES
+_LNG_OFFSET = 180 * MICRODEGREES
+_AXIS_BITS = 29
+# Index ranges a bounding box query is split into
+MAX_MORTON_RANGES = 8
+
+
+def to_microdegrees(value: float) -> int:
+    """Convert degrees to integer microdegrees."""
+    return int(round(value * MICRODEGREES))
+
+
+def from_microdegrees(value: int) -> float:
+    """Convert integer microdegrees to degrees."""
+    return value / MICRODEGREES
+
+
+def _spread_bits(value: int) -> int:
+    """Insert a zero bit between each of the low 32 bits of value."""
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _compact_bits(value: int) -> int:
+    """Inverse of _spread_bits."""
+    value &= 0x5555555555555555
+    value = (value | (value >> 1)) & 0x3333333333333333
+    value = (value | (value >> 2)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value >> 4)) & 0x00FF00FF00FF00FF
+    value = (value | (value >> 8)) & 0x0000FFFF0000FFFF
+    value = (value | (value >> 16)) & 0x00000000FFFFFFFF
+    return value
+
+
+def morton_encode(lat_e6: int, lng_e6: int) -> int:
+    """Interleave microdegree coordinates into a Morton code (fits a signed BIGINT)."""
+    return (_spread_bits(lat_e6 + _LAT_OFFSET) << 1) | _spread_bits(lng_e6 + _LNG_OFFSET)
+
+
+def morton_decode(code: int) -> Tuple[int, int]:
+    """Return the (lat_e6, lng_e6) pair encoded in a Morton code."""
+    return _compact_bits(code >> 1) - _LAT_OFFSET, _compact_bits(code) - _LNG_OFFSET
+
+
+def morton_ranges(
+    min_lat_e6: int,
+    min_lng_e6: int,
+    max_lat_e6: int,
+    max_lng_e6: int,
+    max_ranges: int = MAX_MORTON_RANGES
+) -> List[Tuple[int, int]]:
+    """Sorted, disjoint Morton code ranges covering a bounding box.
+
+    A single range between the corner codes can span most of the index
+    when the box crosses a high-order cell boundary (e.g. the equator of
+    a large quadrant). Instead the box is split into aligned quadtree
+    cells, coarsest first: cells inside the box become exact ranges,
+    cells on its edge are split again while the result stays within
+    max_ranges, and the edge cells left over are covered by the codes of
+    their overlap's corners. The ranges are a correct prefilter; callers
+    still filter on the exact coordinates.
+    """
+    y0, y1 = min_lat_e6 + _LAT_OFFSET, max_lat_e6 + _LAT_OFFSET
+    x0, x1 = min_lng_e6 + _LNG_OFFSET, max_lng_e6 + _LNG_OFFSET
+
+    def code(y, x):
+        return (_spread_bits(y) << 1) | _spread_bits(x)
+
+    # Smallest aligned cell holding the whole box
+    level = max((y0 ^ y1).bit_length(), (x0 ^ x1).bit_length())
+    edge = [(y0 >> level << level, x0 >> level << level)]
+    ranges = []
+    while edge and level > 0:
+        level -= 1
+        size = 1 << level
+        inside, split = [], []
+        for cell_y, cell_x in edge:
+            for y in (cell_y, cell_y + size):
+                for x in (cell_x, cell_x + size):
+                    if y > y1 or x > x1 or y + size - 1 < y0 or x + size - 1 < x0:
+                        continue
+                    if y >= y0 and x >= x0 and y + size - 1 <= y1 and x + size - 1 <= x1:
+                        inside.append((y, x))
+                    else:
+                        split.append((y, x))
+        if len(ranges) + len(inside) + len(split) > max_ranges:
+            level += 1
+            break
+        ranges.extend((code(y, x), code(y + size - 1, x + size - 1)) for y, x in inside)
+        edge = split
+    size = 1 << level
+    ranges.extend(
+        (code(max(y, y0), max(x, x0)), code(min(y + size - 1, y1), min(x + size - 1, x1)))
+        for y, x in edge
+    )
+
+    merged: List[Tuple[int, int]] = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def morton_encode_array(lat_e6, lng_e6):
+    """Vectorized morton_encode over NumPy integer arrays (int64 result)."""
+    import numpy as np
+
+    def spread(values):
+        values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+        for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                            (2, 0x3333333333333333), (1, 0x5555555555555555)):
+            values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+        return values
+
+    lat = spread(np.asarray(lat_e6, dtype=np.int64) + _LAT_OFFSET)
+    lng = spread(np.asarray(lng_e6, dtype=np.int64) + _LNG_OFFSET)
+    return ((lat << np.uint64(1)) | lng).astype(np.int64)
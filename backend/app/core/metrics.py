@@ -0,0 +1,288 @@
+"""
+Lightweight in-process metrics exposed in the Prometheus text format.
+
+Collection is a dictionary lookup, a bisect over a small bucket list and an
+increment under a lock, so it is cheap enough to leave on under full load.
+Metrics are per process: with several workers, Prometheus scrapes each one
+(or sums them) the same way it would with the official client library.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Increment the counter for the given label values."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def get(self, *labelvalues: str) -> float:
+        """Return the current value for the given label values."""
+        return self._values.get(labelvalues, 0.0)
+
+    def collect(self):
+        """Yield exposition lines."""
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        """Set the gauge for the given label values."""
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and optional labels."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labelvalues: str, value: float) -> None:
+        """Record one observation."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[labelvalues] = series
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        """Return the number of observations for the given label values."""
+        series = self._values.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def collect(self):
+        """Yield exposition lines."""
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        for labelvalues, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """Register a metric and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed per HTTP request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements per HTTP request",
+    ("route",)
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Latency of individual SQL statements",
+    ("engine",)
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ("engine",)
+))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ("engine",)
+))
+s3_operation_duration = registry.register(Histogram(
+    "s3_operation_duration_seconds",
+    "Latency of storage backend operations",
+    ("operation", "status")
+))
+cache_requests = registry.register(Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ("cache", "result")
+))
+job_duration = registry.register(Histogram(
+    "job_duration_seconds",
+    "Background job run time by type and outcome (succeeded, retried or failed)",
+    ("type", "outcome"),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+))
+
+
+class RequestStats:
+    """Per-request database counters collected by the engine hooks."""
+
+    __slots__ = ("query_count", "query_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+
+
+# Set by the HTTP middleware; the object is shared with the threadpool tasks
+# FastAPI spawns for dependencies, so engine hooks can update it in place.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup result."""
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def track_s3(operation: str):
+    """Decorator recording the latency of a storage backend operation."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = func(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                s3_operation_duration.observe(
+                    operation, status, value=time.perf_counter() - start
+                )
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine, name: str = "primary") -> None:
+    """Attach query timing and pool checkout hooks to a SQLAlchemy engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        db_query_duration.observe(name, value=elapsed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.query_time += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checked_out.inc(name)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.inc(name, amount=-1)
+
+    _time_pool_connect(engine.pool, name)
+
+    @event.listens_for(engine, "engine_disposed")
+    def _engine_disposed(engine):
+        # dispose() replaces the pool (e.g. after a fork); listeners carry over, the wrapper doesn't
+        _time_pool_connect(engine.pool, name)
+
+
+def _time_pool_connect(pool, name: str) -> None:
+    """Record how long pool.connect() waits; the pool has no "before checkout" event."""
+    pool_connect = pool.connect
+
+    @wraps(pool_connect)
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return pool_connect()
+        finally:
+            db_pool_checkout_wait.observe(name, value=time.perf_counter() - start)
+
+    pool.connect = timed_connect
@@ -0,0 +1,106 @@
+"""
+Schema migration helpers.
+
+Migrations live in backend/alembic and are applied with ``alembic upgrade
+head`` (or ``upgrade_database``). Application startup only runs
+``check_schema_version``, a single query against ``alembic_version``.
+"""
+import logging
+import os
+from typing import Sequence, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema does not match the migrations shipped with the code."""
+
+
+def get_alembic_config():
+    """Return an Alembic config that works from any working directory."""
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def head_revisions() -> Set[str]:
+    """Revisions the code expects the database to be at."""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+
+
+def current_revisions(engine) -> Set[str]:
+    """Revisions recorded in the database, empty when it was never migrated."""
+    try:
+        with engine.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except DBAPIError:
+        return set()
+
+
+def check_schema_version(engine) -> None:
+    """Raise SchemaVersionError unless the database is at the migration head."""
+    expected = head_revisions()
+    current = current_revisions(engine)
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(expected)}. Run `alembic upgrade head` from the backend directory."
+        )
+
+
+def upgrade_database(revision: str = "head") -> None:
+    """Apply migrations up to ``revision``."""
+    from alembic import command
+
+    config = get_alembic_config()
+    # Keep the application's logging configuration intact
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+
+
+def _is_postgresql(op) -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def create_index_online(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    **kwargs
+) -> None:
+    """Create an index from a migration without blocking writes.
+
+    On PostgreSQL this runs CREATE INDEX CONCURRENTLY outside the migration
+    transaction; other databases get a regular CREATE INDEX.
+    """
+    from alembic import op
+
+    if _is_postgresql(op):
+        with op.get_context().autocommit_block():
+            op.create_index(
+                index_name, table_name, columns,
+                postgresql_concurrently=True, if_not_exists=True, **kwargs
+            )
+    else:
+        op.create_index(index_name, table_name, columns, **kwargs)
+
+
+def drop_index_online(index_name: str, table_name: str) -> None:
+    """Drop an index from a migration without blocking reads or writes."""
+    from alembic import op
+
+    if _is_postgresql(op):
+        with op.get_context().autocommit_block():
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(index_name, table_name=table_name)
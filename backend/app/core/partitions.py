@@ -0,0 +1,129 @@
+"""
+Monthly range partitions of the photos table on PostgreSQL.
+
+Migration 0003 turns ``photos`` into a table partitioned by ``created_at``
+with one partition per month (``photos_y2026m01``) and a default partition
+for anything outside them. ``ensure_partitions`` creates upcoming months
+ahead of time, moving rows for them out of the default partition, and
+``drop_empty_partitions_before`` removes months emptied by the archival
+job. On other databases every helper is a no-op.
+"""
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Iterator, List
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "photos"
+DEFAULT_PARTITION = "photos_default"
+_PARTITION_NAME = re.compile(r"^photos_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing value."""
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months."""
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def month_starts(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Month starts covering [start, end]."""
+    current = month_start(start)
+    while current <= end:
+        yield current
+        current = add_months(current, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partition_table(name: str) -> bool:
+    """True for the child tables created by this module."""
+    return name == DEFAULT_PARTITION or bool(_PARTITION_NAME.match(name))
+
+
+def is_partitioned(conn) -> bool:
+    """True when photos is a partitioned PostgreSQL table."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+    ), {"table": PARENT_TABLE}).scalar())
+
+
+def create_partition(conn, month: datetime) -> str:
+    """Create the partition for one month if it does not exist.
+
+    PostgreSQL refuses to add a partition while the default partition holds
+    rows that belong in it, so those rows are moved into the new table
+    before it is attached.
+    """
+    name = partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    in_month = f"created_at >= '{start}' AND created_at < '{end}'"
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return name
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+    if not has_default or not conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"
+    )).scalar():
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return name
+
+    # Keep new rows for the month out of the default partition until the move commits
+    conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    # Attaching builds the partition's indexes to match the parent's
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+    logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into new partition {name}")
+    return name
+
+
+def ensure_partitions(conn, start: datetime, end: datetime) -> List[str]:
+    """Create monthly partitions covering [start, end]."""
+    if not is_partitioned(conn):
+        return []
+    return [create_partition(conn, month) for month in month_starts(start, end)]
+
+
+def list_partitions(conn) -> List[str]:
+    """Names of the monthly partitions, oldest first."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table"
+    ), {"table": PARENT_TABLE})
+    return sorted(name for (name,) in rows if _PARTITION_NAME.match(name))
+
+
+def drop_empty_partitions_before(conn, cutoff: datetime) -> List[str]:
+    """Drop monthly partitions that end before cutoff and hold no rows."""
+    if not is_partitioned(conn):
+        return []
+    dropped = []
+    for name in list_partitions(conn):
+        year, month = (int(part) for part in _PARTITION_NAME.match(name).groups())
+        month_end = add_months(datetime(year, month, 1, tzinfo=timezone.utc), 1)
+        if month_end > cutoff:
+            continue
+        if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        logger.info(f"Dropped empty partition {name}")
+    return dropped
@@ -0,0 +1,248 @@
+"""
+Opt-in request profiling and slow-query capture.
+
+Requests are profiled when they carry the ``X-Profile`` header or are picked
+by ``settings.profile_sample_rate``. pyinstrument is used when installed,
+otherwise cProfile. Slow SQL statements are captured from engine events
+and explained in the background.
+Both keep their most recent entries in bounded ring buffers that the admin
+endpoints expose.
+"""
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import pstats
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyinstrument import Profiler as _PyinstrumentProfiler
+except ImportError:  # pragma: no cover - optional dependency
+    _PyinstrumentProfiler = None
+
+PROFILE_HEADER = "X-Profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+# EXPLAIN prefixes per dialect; dialects missing here are logged without a plan
+_EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+}
+# Slow statements are explained by a background thread on a separate pooled
+# connection, after the fact: a failed EXPLAIN in the request's own
+# transaction would abort it on PostgreSQL, and planning would add to every
+# slow request. The explainer marks its statements with this execution option.
+_EXPLAIN_OPTION = "slow_query_explain"
+_explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+_explain_lock = threading.Lock()
+_explain_thread: Optional[threading.Thread] = None
+
+
+class RingBuffer:
+    """Thread-safe bounded buffer of dict entries with increasing ids."""
+
+    def __init__(self, maxlen: int):
+        self._entries = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an entry, assigning it an id."""
+        with self._lock:
+            entry["id"] = next(self._ids)
+            self._entries.append(entry)
+        return entry
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Return the entry with the given id, if it is still buffered."""
+        with self._lock:
+            for entry in self._entries:
+                if entry["id"] == entry_id:
+                    return entry
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return buffered entries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        """Drop all buffered entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = RingBuffer(settings.slow_query_log_size)
+profile_log = RingBuffer(settings.profile_log_size)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def is_admin_request(headers) -> bool:
+    """Check the admin token header; nothing is allowed when no token is configured."""
+    if not settings.admin_token:
+        return False
+    return hmac.compare_digest(headers.get(ADMIN_TOKEN_HEADER, "").encode(), settings.admin_token.encode())
+
+
+def should_profile(request) -> bool:
+    """Decide whether to profile this request."""
+    if request.headers.get(PROFILE_HEADER):
+        # Only admins may force a profile; without ADMIN_TOKEN the header is ignored
+        if is_admin_request(request.headers):
+            return True
+    rate = settings.profile_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+# Held while a request is profiled. Both profilers hook the interpreter's
+# profile function: a second cProfile.Profile().enable() replaces the first
+# one's hook on 3.11 (corrupting both reports) and raises on 3.12+, so only
+# one request per process is profiled at a time.
+_profiling = threading.Lock()
+
+
+class RequestProfiler:
+    """Profiles one request with pyinstrument or cProfile."""
+
+    def __init__(self):
+        if _PyinstrumentProfiler is not None:
+            self.engine = "pyinstrument"
+            self._profiler = _PyinstrumentProfiler(async_mode="enabled")
+        else:
+            # cProfile sees the whole thread, so other requests served on
+            # the event loop meanwhile show up in the output as well
+            self.engine = "cProfile"
+            self._profiler = cProfile.Profile()
+        self._start = 0.0
+
+    def start(self) -> bool:
+        """Start profiling; False (and nothing is profiled) while another request is."""
+        if not _profiling.acquire(blocking=False):
+            return False
+        self._start = time.perf_counter()
+        try:
+            if self.engine == "pyinstrument":
+                self._profiler.start()
+            else:
+                self._profiler.enable()
+        except Exception:
+            _profiling.release()
+            raise
+        return True
+
+    def stop(self, method: str, path: str, status: str) -> Dict[str, Any]:
+        """Stop profiling and store the report in the profile log."""
+        duration = time.perf_counter() - self._start
+        try:
+            if self.engine == "pyinstrument":
+                self._profiler.stop()
+            else:
+                self._profiler.disable()
+        finally:
+            _profiling.release()
+        if self.engine == "pyinstrument":
+            report = self._profiler.output_text(unicode=True, color=False)
+        else:
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(50)
+            report = stream.getvalue()
+        return profile_log.append({
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "engine": self.engine,
+            "captured_at": _now(),
+            "report": report,
+        })
+
+
+def _parameters_shape(parameters, executemany: bool):
+    """Describe bound parameters by type only, never by value."""
+    if executemany:
+        rows = list(parameters or [])
+        first = _parameters_shape(rows[0], False) if rows else None
+        return {"rows": len(rows), "row": first}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _explain_worker() -> None:
+    while True:
+        engine, statement, parameters, entry = _explain_queue.get()
+        try:
+            with engine.connect() as conn:
+                conn.execution_options(**{_EXPLAIN_OPTION: True})
+                if parameters:
+                    result = conn.exec_driver_sql(statement, parameters)
+                else:
+                    result = conn.exec_driver_sql(statement)
+                entry["plan"] = "\n".join(" ".join(str(column) for column in row) for row in result)
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+
+
+def _schedule_explain(engine, statement: str, parameters, entry: Dict[str, Any]) -> None:
+    """Queue EXPLAIN for a read statement; the plan is filled into the entry later."""
+    global _explain_thread
+    prefix = _EXPLAIN_PREFIXES.get(engine.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return
+    with _explain_lock:
+        # Threads don't survive a fork, so a worker starts its own
+        if _explain_thread is None or not _explain_thread.is_alive():
+            _explain_thread = threading.Thread(target=_explain_worker, name="slow-query-explain", daemon=True)
+            _explain_thread.start()
+    try:
+        _explain_queue.put_nowait((engine, prefix + statement, parameters, entry))
+        entry["plan"] = "pending"
+    except queue.Full:
+        entry["plan"] = "EXPLAIN skipped: too many pending"
+
+
+def instrument_slow_queries(engine, name: str = "primary") -> None:
+    """Record statements slower than settings.slow_query_threshold_ms."""
+    threshold = settings.slow_query_threshold_ms / 1000.0
+    if threshold <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_start
+        if duration < threshold or context.execution_options.get(_EXPLAIN_OPTION):
+            return
+        entry = slow_query_log.append({
+            "engine": name,
+            "statement": statement,
+            "parameters": _parameters_shape(parameters, executemany),
+            "duration_ms": round(duration * 1000, 3),
+            "plan": None,
+            "captured_at": _now(),
+        })
+        if settings.slow_query_explain and not executemany:
+            _schedule_explain(conn.engine, statement, parameters, entry)
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement[:200]}")
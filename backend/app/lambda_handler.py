@@ -1,8 +1,21 @@
 """
 Lambda handler for AWS Lambda deployment
 """
+import os
+
+# Defer the S3 client, the database engine and table creation to first use
+# so cold starts only pay for importing the application itself.
+os.environ.setdefault("LAZY_INIT", "true")
+
 from mangum import Mangum
 from app.main import app
 
 # Create the Lambda handler
-handler = Mangum(app, lifespan="off")
\ No newline at end of file
+handler = Mangum(app, lifespan="off")
+
+
+def ensure_partitions(event, context):
+    """Scheduled entry point: Lambda runs no job runner to keep partitions created."""
+    from app.services.partition_service import partition_service
+
+    return {"partitions": partition_service.ensure_upcoming()}
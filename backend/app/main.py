@@ -1,12 +1,27 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import time
 import logging
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import PRIMARY_STICKY_HEADER, get_engine
+from app.core.migrations import check_schema_version, upgrade_database
+from app.core.metrics import (
+    RequestStats,
+    current_request_stats,
+    db_queries_per_request,
+    db_time_per_request,
+    http_request_duration,
+    registry,
+)
+from app.core.profiling import RequestProfiler, should_profile
 from app.api.photos import router as photos_router
+from app.api.admin import router as admin_router
+from app.api.jobs import router as jobs_router
+from app.api.places import router as places_router
+from app.api.hotspots import router as hotspots_router
+from app.services.s3_service import IS_LOCAL_DEV
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +46,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    # Multipart uploads need the part ETags to complete; the client echoes
+    # the read-your-writes header back on its reads
+    expose_headers=["ETag", PRIMARY_STICKY_HEADER],
 )
 
 # Add trusted host middleware for security
@@ -42,11 +60,32 @@ app.add_middleware(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Add processing time to response headers."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    """Add processing time to response headers and record request metrics."""
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    profiler = RequestProfiler() if should_profile(request) else None
+    if profiler is not None and not profiler.start():
+        # Another request is being profiled in this process
+        profiler = None
+    start_time = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        process_time = time.perf_counter() - start_time
+        current_request_stats.reset(token)
+        # Label by route template so path parameters don't explode cardinality
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        http_request_duration.observe(request.method, route_path, status, value=process_time)
+        db_queries_per_request.observe(route_path, value=stats.query_count)
+        db_time_per_request.observe(route_path, value=stats.query_time)
+        if profiler is not None:
+            profile = profiler.stop(request.method, request.url.path, status)
     response.headers["X-Process-Time"] = str(process_time)
+    if profiler is not None:
+        response.headers["X-Profile-Id"] = str(profile["id"])
     return response
 
 # Exception handlers
@@ -83,6 +122,33 @@ app.include_router(
     prefix=f"{settings.api_v1_str}",
     tags=["photos"]
 )
+app.include_router(
+    admin_router,
+    prefix=f"{settings.api_v1_str}/admin",
+    tags=["admin"]
+)
+app.include_router(
+    jobs_router,
+    prefix=f"{settings.api_v1_str}/jobs",
+    tags=["jobs"]
+)
+app.include_router(
+    places_router,
+    prefix=f"{settings.api_v1_str}/places",
+    tags=["places"]
+)
+app.include_router(
+    hotspots_router,
+    prefix=f"{settings.api_v1_str}/hotspots",
+    tags=["hotspots"]
+)
+if IS_LOCAL_DEV:
+    from app.api.mock_storage import router as mock_storage_router
+    app.include_router(
+        mock_storage_router,
+        prefix=f"{settings.api_v1_str}",
+        tags=["mock-storage"]
+    )
 
 # Health check endpoint
 @app.get("/health")
@@ -94,6 +160,15 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -108,21 +183,45 @@ async def root():
 # Startup event
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup."""
+    """Check the database schema and start the job runner, hotspot schedule and read model refresher."""
     logger.info("Starting up Dirty Nairobi API...")
+    if settings.lazy_init:
+        # Lambda cold starts skip the catalog round trips entirely
+        logger.info("Lazy init enabled, skipping schema check")
+        return
     try:
-        create_tables()
-        logger.info("Database tables created successfully")
+        if settings.auto_migrate:
+            upgrade_database()
+            logger.info("Database migrations applied")
+        elif settings.schema_check_on_startup:
+            check_schema_version(get_engine())
+            logger.info("Database schema is up to date")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error(f"Database schema check failed: {e}")
         raise
+    
+    if settings.jobs_enabled:
+        from app.services.hotspot_service import start_hotspot_schedule
+        from app.services.job_service import job_runner
+        from app.services.partition_service import start_partition_schedule
+        job_runner.start()
+        start_hotspot_schedule()
+        start_partition_schedule()
+    if settings.read_model_enabled:
+        from app.services.read_model import read_model
+        read_model.start()
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down Dirty Nairobi API...")
+    from app.services.job_service import job_runner
+    from app.services.read_model import read_model
+    job_runner.stop()
+    read_model.stop()
 
+# Development server with auto-reload; production runs `python -m app.server`
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,3 +1,5 @@
 from .photo import Photo
+from .job import Job
+from .hotspot import Hotspot
 
-__all__ = ["Photo"]
\ No newline at end of file
+__all__ = ["Photo", "Job", "Hotspot"]
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, JSON, String
+from sqlalchemy.sql import func
+from app.core.geo import from_microdegrees
+from app.models.photo import Base
+import uuid
+
+class Hotspot(Base):
+    """Persistent dumping hotspot; see app/services/hotspot_service.py for how they are found."""
+
+    __tablename__ = "hotspots"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # 1 is the highest score; every detection run replaces all rows
+    rank = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    report_count = Column(Integer, nullable=False)
+    # Periods of hotspot_period_days within the window that had reports here
+    active_periods = Column(Integer, nullable=False)
+    # Centroid of the reports in integer microdegrees
+    lat_e6 = Column(Integer, nullable=False)
+    lng_e6 = Column(Integer, nullable=False)
+    area_m2 = Column(Float, nullable=False)
+    # GeoJSON Polygon geometry around the reports
+    polygon = Column(JSON, nullable=False)
+    first_report_at = Column(DateTime(timezone=True), nullable=False)
+    last_report_at = Column(DateTime(timezone=True), nullable=False)
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    window_end = Column(DateTime(timezone=True), nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_hotspots_rank', 'rank'),
+    )
+
+    @property
+    def latitude(self):
+        return from_microdegrees(self.lat_e6)
+
+    @property
+    def longitude(self):
+        return from_microdegrees(self.lng_e6)
+
+    def __repr__(self):
+        return f"<Hotspot(rank={self.rank}, score={self.score:.1f}, reports={self.report_count})>"
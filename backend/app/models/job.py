@@ -0,0 +1,42 @@
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String, Text
+from sqlalchemy.sql import func
+from app.models.photo import Base
+import uuid
+
+class Job(Base):
+    """Background job; see app/services/job_service.py for the lease protocol."""
+    
+    __tablename__ = "jobs"
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default=QUEUED)
+    # Higher runs first
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    # Earliest time the job may run; pushed back by retry backoff
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Runner holding the job and until when; an expired lease can be reclaimed
+    locked_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('idx_jobs_claim', 'status', 'run_at'),
+        Index('idx_jobs_type_status', 'type', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.type}', status='{self.status}', attempts={self.attempts})>"
@@ -1,30 +1,69 @@
-from sqlalchemy import Column, String, Text, Numeric, DateTime, Index
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
+from app.core.geo import MICRODEGREES, from_microdegrees, morton_encode, to_microdegrees
 import uuid
 
 Base = declarative_base()
 
 class Photo(Base):
     """Photo model for storing uploaded photo metadata."""
-    
+
     __tablename__ = "photos"
-    
+
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     s3_key = Column(String(255), nullable=False, index=True)
     s3_url = Column(String(500), nullable=False)
     description = Column(Text, nullable=False)
-    latitude = Column(Numeric(10, 8), nullable=False)
-    longitude = Column(Numeric(11, 8), nullable=False)
+    # Coordinates in integer microdegrees; use the latitude/longitude properties
+    lat_e6 = Column(Integer, nullable=False)
+    lng_e6 = Column(Integer, nullable=False)
+    # Morton (Z-order) code of the coordinates for bounding-box range scans
+    geo_key = Column(BigInteger, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
-    
+
     # Indexes for performance optimization (SQLite compatible)
     __table_args__ = (
-        Index('idx_photos_location', 'latitude', 'longitude'),
+        Index('idx_photos_location', 'lat_e6', 'lng_e6'),
+        Index('idx_photos_geo_key', 'geo_key'),
         Index('idx_photos_created_at', 'created_at'),
+        Index('idx_photos_updated_at', 'updated_at'),
         Index('idx_photos_description', 'description'),
     )
-    
+
+    @hybrid_property
+    def latitude(self):
+        """Latitude in degrees."""
+        return from_microdegrees(self.lat_e6) if self.lat_e6 is not None else None
+
+    @latitude.setter
+    def latitude(self, value):
+        self.lat_e6 = to_microdegrees(value)
+        self._update_geo_key()
+
+    @latitude.expression
+    def latitude(cls):
+        return cls.lat_e6 / float(MICRODEGREES)
+
+    @hybrid_property
+    def longitude(self):
+        """Longitude in degrees."""
+        return from_microdegrees(self.lng_e6) if self.lng_e6 is not None else None
+
+    @longitude.setter
+    def longitude(self, value):
+        self.lng_e6 = to_microdegrees(value)
+        self._update_geo_key()
+
+    @longitude.expression
+    def longitude(cls):
+        return cls.lng_e6 / float(MICRODEGREES)
+
+    def _update_geo_key(self):
+        if self.lat_e6 is not None and self.lng_e6 is not None:
+            self.geo_key = morton_encode(self.lat_e6, self.lng_e6)
+
     def __repr__(self):
-        return f"<Photo(id={self.id}, description='{self.description[:50]}...', lat={self.latitude}, lng={self.longitude})>"
\ No newline at end of file
+        return f"<Photo(id={self.id}, description='{self.description[:50]}...', lat={self.latitude}, lng={self.longitude})>"
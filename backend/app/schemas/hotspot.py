@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class HotspotResponse(BaseModel):
+    """Schema for a detected hotspot."""
+    id: str
+    rank: int
+    score: float = Field(..., description="Reports times the share of periods in the window with reports")
+    report_count: int
+    active_periods: int = Field(..., description="Periods of HOTSPOT_PERIOD_DAYS with reports here")
+    latitude: float
+    longitude: float
+    area_m2: float
+    polygon: Dict[str, Any] = Field(..., description="GeoJSON Polygon around the reports")
+    first_report_at: datetime
+    last_report_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class HotspotListResponse(BaseModel):
+    """Schema for the ranked hotspot list."""
+    hotspots: List[HotspotResponse]
+    window_start: Optional[datetime] = Field(None, description="Oldest report time considered")
+    window_end: Optional[datetime] = None
+    computed_at: Optional[datetime] = Field(None, description="When the hotspots were detected; null before the first run")
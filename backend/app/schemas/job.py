@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class JobResponse(BaseModel):
+    """Schema for a background job."""
+    id: str
+    type: str
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    priority: int
+    attempts: int
+    max_attempts: int
+    payload: Dict[str, Any]
+    result: Optional[Any] = None
+    last_error: Optional[str] = None
+    locked_by: Optional[str] = None
+    run_at: datetime
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class JobListResponse(BaseModel):
+    """Schema for the job status listing."""
+    jobs: List[JobResponse]
+    counts: Dict[str, Dict[str, int]] = Field(..., description="Number of jobs per type and status")
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional, Tuple
 from decimal import Decimal
+from app.core.geo import to_microdegrees
 
 class PhotoBase(BaseModel):
     """Base photo schema with common fields."""
@@ -42,11 +43,23 @@ class PhotoResponse(PhotoBase):
     class Config:
         from_attributes = True
 
+class PhotoChangesResponse(BaseModel):
+    """Schema for photos written since a snapshot."""
+    photos: List[PhotoResponse] = Field(..., description="Ordered by updated_at, then id")
+    has_more: bool
+    next_since: datetime = Field(..., description="Pass as since with next_after_id to get the next page")
+    next_after_id: Optional[str] = None
+
 class PhotoFilter(BaseModel):
     """Schema for filtering photos."""
     description: Optional[str] = Field(None, description="Filter by description (case-insensitive)")
     limit: int = Field(100, ge=1, le=1000, description="Maximum number of results")
     offset: int = Field(0, ge=0, description="Number of results to skip")
+    include_archived: bool = Field(False, description="Also search photos archived to Parquet")
+    min_lat: Optional[float] = Field(None, ge=-90, le=90, description="Viewport south edge")
+    min_lng: Optional[float] = Field(None, ge=-180, le=180, description="Viewport west edge")
+    max_lat: Optional[float] = Field(None, ge=-90, le=90, description="Viewport north edge")
+    max_lng: Optional[float] = Field(None, ge=-180, le=180, description="Viewport east edge")
     
     @validator('description')
     def validate_description_filter(cls, v):
@@ -54,4 +67,24 @@ class PhotoFilter(BaseModel):
             v = v.strip()
             if not v:
                 return None
-        return v
\ No newline at end of file
+        return v
+    
+    @validator('max_lng', always=True)
+    def validate_viewport(cls, v, values):
+        edges = [values.get('min_lat'), values.get('min_lng'), values.get('max_lat'), v]
+        if any(edge is None for edge in edges):
+            if any(edge is not None for edge in edges):
+                raise ValueError('Viewport needs all of min_lat, min_lng, max_lat and max_lng')
+            return v
+        if edges[0] > edges[2] or edges[1] > edges[3]:
+            raise ValueError('Viewport minimums must not exceed its maximums')
+        return v
+    
+    def viewport_e6(self) -> Optional[Tuple[int, int, int, int]]:
+        """Viewport as (min_lat, min_lng, max_lat, max_lng) microdegrees, if set."""
+        if self.min_lat is None:
+            return None
+        return (
+            to_microdegrees(self.min_lat), to_microdegrees(self.min_lng),
+            to_microdegrees(self.max_lat), to_microdegrees(self.max_lng)
+        )
\ No newline at end of file
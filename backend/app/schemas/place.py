@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+class PlaceResponse(BaseModel):
+    """Schema for a place search result."""
+    name: str
+    kind: str = Field(..., description="neighbourhood, town, road, landmark, market, park, river, mall, hospital or school")
+    area: str = Field(..., description="Area or constituency the place is in")
+    latitude: float
+    longitude: float
+    
+    class Config:
+        from_attributes = True
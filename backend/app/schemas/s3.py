@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field, validator
+from typing import List, Optional
 import re
+from app.core.config import settings
 
 class PresignedUrlRequest(BaseModel):
     """Schema for requesting a pre-signed URL."""
@@ -48,4 +50,50 @@ class PresignedUrlResponse(BaseModel):
                 "s3_key": "photos/2023/12/uuid-filename.jpg",
                 "expires_in": 3600
             }
-        }
\ No newline at end of file
+        }
+
+class MultipartUploadRequest(PresignedUrlRequest):
+    """Schema for starting a multipart upload."""
+    file_size: int = Field(..., gt=0, description="Size of the file in bytes")
+    
+    @validator('file_size')
+    def validate_file_size(cls, v):
+        if v > settings.multipart_max_file_size:
+            raise ValueError(f'File size must not exceed {settings.multipart_max_file_size} bytes')
+        return v
+
+class PartUploadUrl(BaseModel):
+    """Pre-signed URL for one part of a multipart upload."""
+    part_number: int
+    upload_url: str
+
+class UploadedPart(BaseModel):
+    """A part that has been uploaded."""
+    part_number: int = Field(..., ge=1, le=10000)
+    etag: str = Field(..., min_length=1, description="ETag header returned by the part upload")
+    size: Optional[int] = None
+
+class MultipartUploadResponse(BaseModel):
+    """Schema for a started or resumed multipart upload."""
+    upload_id: str
+    s3_key: str
+    part_size: int = Field(..., description="Bytes per part; the last part may be smaller")
+    part_count: int
+    parts: List[PartUploadUrl] = Field(..., description="Pre-signed URLs for the parts still to upload")
+    uploaded_parts: List[UploadedPart] = Field(default_factory=list)
+    expires_in: int = Field(3600, description="URL expiration time in seconds")
+
+class MultipartUploadRef(BaseModel):
+    """Identifies a multipart upload."""
+    s3_key: str = Field(..., min_length=1, max_length=255)
+    upload_id: str = Field(..., min_length=1)
+
+class MultipartResumeRequest(MultipartUploadRef):
+    """Schema for resuming a multipart upload."""
+    file_size: int = Field(..., gt=0, description="Size of the file in bytes")
+
+class MultipartCompleteRequest(MultipartUploadRef):
+    """Schema for completing a multipart upload."""
+    parts: Optional[List[UploadedPart]] = Field(
+        None, description="Uploaded parts; when omitted the parts stored so far are used"
+    )
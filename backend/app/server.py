@@ -0,0 +1,139 @@
+"""
+Production server.
+
+Runs the API under gunicorn with uvicorn workers (uvloop and httptools):
+- The app is imported once in the master, so forked workers share its memory.
+- The worker count follows the container's CPU quota.
+- Each worker is restarted gracefully after ``server_max_requests`` requests.
+- Each worker fills its database pool before accepting requests.
+
+Examples:
+    python -m app.server
+    WEB_CONCURRENCY=4 python -m app.server --port 8080
+
+``python -m app.main`` remains the auto-reloading development server.
+"""
+import argparse
+import gc
+import logging
+import math
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UvicornWorker(_UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools instead of the pure-Python fallbacks."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+def cpu_limit() -> float:
+    """CPUs this process may use: the cgroup quota when one is set, else the CPUs it may run on."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return min(cpus, int(quota) / int(period))
+        return cpus
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1; a quota of -1 means unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return min(cpus, quota / period)
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def default_workers() -> int:
+    """One async worker per whole CPU; more would only be throttled by the quota."""
+    return max(1, math.floor(cpu_limit()))
+
+
+def when_ready(server):
+    # Objects loaded by the master are never collected again, so the
+    # collector doesn't touch (and copy) their shared pages in the workers
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.core.database import reset_engines_after_fork
+    reset_engines_after_fork()
+
+
+def post_worker_init(worker):
+    if not settings.server_warm_db_connections or settings.lazy_init:
+        return
+    from app.core.database import warm_pool
+    try:
+        opened = warm_pool(settings.db_pool_size)
+        logger.info(f"Worker {worker.pid} opened {opened} database connections")
+    except Exception as e:
+        # Requests connect on demand; the schema check at startup reports a broken database
+        logger.warning(f"Could not warm the database pool: {e}")
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving app.main:app."""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        from app.services.gazetteer_service import gazetteer
+        gazetteer.load()
+        if settings.read_model_enabled:
+            # Loaded lazily by the read model; share one copy between workers
+            import numpy  # noqa: F401
+        return app
+
+
+def options(host: str, port: int, workers: int) -> dict:
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "app.server.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests_jitter,
+        "timeout": settings.server_timeout,
+        "graceful_timeout": settings.server_graceful_timeout,
+        "keepalive": settings.server_keepalive,
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Run the Dirty Nairobi API in production")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency,
+                        help="Defaults to WEB_CONCURRENCY, or one per CPU in the quota")
+    args = parser.parse_args(argv)
+    Server(options(args.host, args.port, args.workers or default_workers())).run()
+
+
+if __name__ == "__main__":
+    main()
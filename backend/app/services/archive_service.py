@@ -0,0 +1,284 @@
+"""
+Archival of old photo reports to Parquet on the storage backend.
+
+Rows older than ``settings.archive_after_days`` are written, one file per
+month and batch, to ``archive/photos/month=YYYY-MM/part-<hash>.parquet`` and
+then deleted from the database. File names are derived from the archived
+ids, so re-running a batch that failed after the upload overwrites the same
+file instead of duplicating rows.
+
+Archived rows are read back for ``include_archived=true`` queries as a
+``pyarrow.dataset`` partitioned by the ``month=`` directories. Months are
+scanned newest first, so a page only reads the months it needs, and the
+description and viewport filters are pushed down into the Parquet scan.
+Scans are cached in memory up to ``settings.archive_cache_bytes`` (files
+never change once written); a cached whole month answers any filter.
+pyarrow is imported on first use to keep it out of the API's startup path.
+"""
+import functools
+import hashlib
+import io
+import logging
+import operator
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.geo import from_microdegrees
+from app.core.partitions import drop_empty_partitions_before
+from app.models.photo import Photo
+from app.services.s3_service import s3_service
+from app.services.snapshot_service import snapshot_publisher
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "archive/photos/"
+ARCHIVE_COLUMNS = ["id", "s3_key", "s3_url", "description", "lat_e6", "lng_e6", "geo_key", "created_at", "updated_at"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is required for photo archival; install it with `pip install pyarrow`")
+    return pyarrow
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ArchiveService:
+    """Moves old photos to Parquet and scans them back."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._keys_loaded_at = 0.0
+        self._dataset = None
+        self._months: List[Tuple[str, tuple]] = []
+        # Archive files are immutable, so scans are cached by the month's
+        # files and the filters, least recently used first
+        self._scans: "OrderedDict[tuple, object]" = OrderedDict()
+        self._scans_bytes = 0
+
+    def _schema(self):
+        pa = _pyarrow()
+        return pa.schema([
+            ("id", pa.string()),
+            ("s3_key", pa.string()),
+            ("s3_url", pa.string()),
+            ("description", pa.string()),
+            ("lat_e6", pa.int32()),
+            ("lng_e6", pa.int32()),
+            ("geo_key", pa.int64()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("updated_at", pa.timestamp("us", tz="UTC")),
+        ])
+
+    def _write_month(self, month: str, photos: List[Photo]) -> str:
+        """Write one month's batch as a Parquet file and return its key."""
+        pa = _pyarrow()
+        columns = {name: [getattr(photo, name) for photo in photos] for name in ARCHIVE_COLUMNS}
+        columns["created_at"] = [_as_utc(value) for value in columns["created_at"]]
+        columns["updated_at"] = [_as_utc(value) for value in columns["updated_at"]]
+        table = pa.table(columns, schema=self._schema())
+
+        buffer = io.BytesIO()
+        pa.parquet.write_table(table, buffer, compression="zstd")
+        digest = hashlib.sha1("\n".join(sorted(columns["id"])).encode()).hexdigest()[:16]
+        key = f"{ARCHIVE_PREFIX}month={month}/part-{digest}.parquet"
+        s3_service.put_object(key, buffer.getvalue(), content_type="application/vnd.apache.parquet")
+        return key
+
+    def archive_photos(
+        self,
+        db: Session,
+        older_than_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False
+    ) -> dict:
+        """Archive photos created before the cutoff; returns a summary."""
+        days = settings.archive_after_days if older_than_days is None else older_than_days
+        batch_size = batch_size or settings.archive_batch_size
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        query = db.query(Photo).filter(Photo.created_at < cutoff)
+
+        if dry_run:
+            return {"cutoff": cutoff.isoformat(), "archived": 0, "pending": query.count(), "files": []}
+
+        archived, files = 0, []
+        while True:
+            photos = query.order_by(Photo.created_at, Photo.id).limit(batch_size).all()
+            if not photos:
+                break
+            by_month = defaultdict(list)
+            for photo in photos:
+                by_month[_as_utc(photo.created_at).strftime("%Y-%m")].append(photo)
+            try:
+                # Upload first: a failure leaves the rows in place for the next run
+                for month, month_photos in sorted(by_month.items()):
+                    files.append(self._write_month(month, month_photos))
+                db.query(Photo).filter(Photo.id.in_([photo.id for photo in photos])).delete(synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error archiving photos: {e}")
+                raise ValueError(f"Failed to archive photos: {str(e)}")
+            db.expunge_all()
+            archived += len(photos)
+            logger.info(f"Archived {archived} photos older than {cutoff.isoformat()}")
+
+        dropped = drop_empty_partitions_before(db.connection(), cutoff)
+        if archived:
+            snapshot_publisher.schedule(db)
+        db.commit()
+        self.invalidate()
+        return {"cutoff": cutoff.isoformat(), "archived": archived, "files": files, "dropped_partitions": dropped}
+
+    def invalidate(self) -> None:
+        """Forget the cached listing so new archive files are picked up."""
+        with self._lock:
+            self._keys_loaded_at = 0.0
+
+    def _open_dataset(self, keys: List[str]):
+        pa = _pyarrow()
+        ds = pa.dataset
+        filesystem, root = s3_service.arrow_filesystem()
+        return ds.dataset(
+            [root + key for key in keys],
+            schema=self._schema().append(pa.field("month", pa.string())),
+            format="parquet",
+            filesystem=filesystem,
+            # The month=YYYY-MM directories become a column that prunes whole files
+            partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+            partition_base_dir=root + ARCHIVE_PREFIX.rstrip("/"),
+        )
+
+    def _archive_dataset(self):
+        """The dataset over all archive files and their keys per month, newest month first."""
+        with self._lock:
+            if time.monotonic() - self._keys_loaded_at > settings.archive_listing_ttl_seconds:
+                keys = [key for key in s3_service.list_objects(ARCHIVE_PREFIX) if key.endswith(".parquet")]
+                if keys != self._keys or self._dataset is None:
+                    by_month = defaultdict(list)
+                    for key in keys:
+                        by_month[key[len(ARCHIVE_PREFIX):].split("/", 1)[0].partition("=")[2]].append(key)
+                    self._months = [(month, tuple(by_month[month])) for month in sorted(by_month, reverse=True)]
+                    self._dataset = self._open_dataset(keys) if keys else None
+                    self._keys = keys
+                    current = {files for _, files in self._months}
+                    for cache_key in [cache_key for cache_key in self._scans if cache_key[0] not in current]:
+                        self._scans_bytes -= self._scans.pop(cache_key).nbytes
+                self._keys_loaded_at = time.monotonic()
+            return self._dataset, list(self._months)
+
+    @staticmethod
+    def _filter(description: Optional[str], viewport: Optional[Tuple[int, int, int, int]]):
+        """Dataset expression for the description and viewport filters, or None."""
+        pa = _pyarrow()
+        field = pa.dataset.field
+        conditions = []
+        if description:
+            conditions.append(pa.compute.match_substring(field("description"), description, ignore_case=True))
+        if viewport:
+            min_lat, min_lng, max_lat, max_lng = viewport
+            conditions.append(
+                (field("lat_e6") >= min_lat) & (field("lat_e6") <= max_lat)
+                & (field("lng_e6") >= min_lng) & (field("lng_e6") <= max_lng)
+            )
+        return functools.reduce(operator.and_, conditions) if conditions else None
+
+    def _cached(self, cache_key: tuple):
+        with self._lock:
+            table = self._scans.get(cache_key)
+            if table is not None:
+                self._scans.move_to_end(cache_key)
+            return table
+
+    def _remember(self, cache_key: tuple, table) -> None:
+        """Cache a scan, evicting the least recently used ones past settings.archive_cache_bytes."""
+        if table.nbytes > settings.archive_cache_bytes:
+            return
+        with self._lock:
+            if cache_key in self._scans:
+                return
+            self._scans[cache_key] = table
+            self._scans_bytes += table.nbytes
+            while self._scans_bytes > settings.archive_cache_bytes:
+                _, evicted = self._scans.popitem(last=False)
+                self._scans_bytes -= evicted.nbytes
+
+    def _month_rows(self, dataset, month: str, files: tuple, description: Optional[str], viewport):
+        """Rows of one month matching the filters."""
+        cached = self._cached((files, description, viewport))
+        if cached is not None:
+            return cached
+        condition = self._filter(description, viewport)
+        # A cached scan of the whole month answers any filter
+        whole = self._cached((files, None, None)) if condition is not None else None
+        if whole is not None:
+            return whole.filter(condition)
+        # Otherwise only this month's files are read, with the filters pushed
+        # down to skip row groups whose statistics rule them out
+        month_filter = _pyarrow().dataset.field("month") == month
+        table = dataset.to_table(
+            columns=ARCHIVE_COLUMNS,
+            filter=month_filter if condition is None else month_filter & condition
+        )
+        self._remember((files, description, viewport), table)
+        return table
+
+    def _scan(self, description: Optional[str], viewport: Optional[Tuple[int, int, int, int]] = None, limit: Optional[int] = None):
+        """Matching archived rows, newest month first; stops after the month reaching limit rows."""
+        pa = _pyarrow()
+        dataset, months = self._archive_dataset()
+        tables, found = [], 0
+        for month, files in months:
+            table = self._month_rows(dataset, month, files, description, viewport)
+            tables.append(table)
+            found += table.num_rows
+            if limit is not None and found >= limit:
+                break
+        if not tables:
+            return self._schema().empty_table()
+        return pa.concat_tables(tables)
+
+    def count_photos(self, description: Optional[str] = None, viewport: Optional[Tuple[int, int, int, int]] = None) -> int:
+        """Count archived photos matching the description and viewport filters."""
+        if not description and not viewport:
+            dataset, _ = self._archive_dataset()
+            # Read from the Parquet footers without decoding any rows
+            return dataset.count_rows() if dataset is not None else 0
+        return self._scan(description, viewport).num_rows
+
+    def get_photos(
+        self,
+        description: Optional[str],
+        offset: int,
+        limit: int,
+        viewport: Optional[Tuple[int, int, int, int]] = None
+    ) -> List[dict]:
+        """Archived photos matching the filters, newest first."""
+        # Months never overlap, so the newest ones holding offset + limit rows suffice
+        table = self._scan(description, viewport, limit=offset + limit)
+        if table.num_rows == 0:
+            return []
+        table = table.sort_by([("created_at", "descending")]).slice(offset, limit)
+        rows = table.to_pylist()
+        for row in rows:
+            row["latitude"] = from_microdegrees(row.pop("lat_e6"))
+            row["longitude"] = from_microdegrees(row.pop("lng_e6"))
+        return rows
+
+
+# Create service instance
+archive_service = ArchiveService()
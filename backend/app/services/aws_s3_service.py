@@ -0,0 +1,258 @@
+"""
+AWS S3 storage backend
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError, NoCredentialsError
+
+from app.core.config import settings
+from app.core.metrics import track_s3
+
+logger = logging.getLogger(__name__)
+
+class AwsS3Service:
+    """Service for handling AWS S3 operations."""
+
+    def __init__(self):
+        """Initialize S3 client."""
+        try:
+            self.s3_client = boto3.client(
+                's3',
+                aws_access_key_id=settings.aws_access_key_id,
+                aws_secret_access_key=settings.aws_secret_access_key,
+                region_name=settings.aws_region
+            )
+            self.bucket_name = settings.s3_bucket_name
+            logger.info(f"AWS S3 Service initialized for bucket: {self.bucket_name}")
+        except NoCredentialsError:
+            logger.error("AWS credentials not found")
+            raise ValueError("AWS credentials not configured")
+
+    def generate_s3_key(self, filename: str) -> str:
+        """Generate a unique S3 key for the file."""
+        # Extract file extension
+        file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
+
+        # Create date-based path
+        now = datetime.utcnow()
+        date_path = f"{now.year}/{now.month:02d}/{now.day:02d}"
+
+        # Generate unique filename
+        unique_id = str(uuid.uuid4())
+        s3_key = f"photos/{date_path}/{unique_id}.{file_ext}"
+
+        return s3_key
+
+    @track_s3("generate_presigned_url")
+    def generate_presigned_url(
+        self, 
+        s3_key: str, 
+        content_type: str, 
+        expires_in: int = 3600
+    ) -> str:
+        """Generate a pre-signed URL for uploading to S3."""
+        try:
+            presigned_url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': s3_key,
+                    'ContentType': content_type,
+                },
+                ExpiresIn=expires_in
+            )
+            return presigned_url
+        except ClientError as e:
+            logger.error(f"Error generating pre-signed URL: {e}")
+            raise ValueError(f"Failed to generate upload URL: {str(e)}")
+
+    def get_public_url(self, s3_key: str) -> str:
+        """Get the public URL for an S3 object."""
+        return f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{s3_key}"
+
+    @track_s3("delete_object")
+    def delete_object(self, s3_key: str) -> bool:
+        """Delete an object from S3."""
+        try:
+            self.s3_client.delete_object(
+                Bucket=self.bucket_name,
+                Key=s3_key
+            )
+            logger.info(f"Deleted S3 object: {s3_key}")
+            return True
+        except ClientError as e:
+            logger.error(f"Error deleting S3 object {s3_key}: {e}")
+            return False
+
+    @track_s3("put_object")
+    def put_object(
+        self,
+        s3_key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        content_encoding: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> None:
+        """Upload an object to S3."""
+        headers = {}
+        if content_encoding:
+            headers["ContentEncoding"] = content_encoding
+        if cache_control:
+            headers["CacheControl"] = cache_control
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Body=data,
+                ContentType=content_type,
+                **headers
+            )
+        except ClientError as e:
+            logger.error(f"Error uploading S3 object {s3_key}: {e}")
+            raise ValueError(f"Failed to upload object: {str(e)}")
+
+    @track_s3("get_object")
+    def get_object(self, s3_key: str) -> bytes:
+        """Download an object from S3."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            return response['Body'].read()
+        except ClientError as e:
+            logger.error(f"Error downloading S3 object {s3_key}: {e}")
+            raise ValueError(f"Failed to download object: {str(e)}")
+
+    @track_s3("list_objects")
+    def list_objects(self, prefix: str) -> List[str]:
+        """List object keys under a prefix."""
+        keys = []
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys.extend(item['Key'] for item in page.get('Contents', []))
+        except ClientError as e:
+            logger.error(f"Error listing S3 objects under {prefix}: {e}")
+            raise ValueError(f"Failed to list objects: {str(e)}")
+        return sorted(keys)
+
+    def arrow_filesystem(self):
+        """pyarrow filesystem and path prefix for reading objects as a dataset."""
+        from pyarrow import fs
+
+        filesystem = fs.S3FileSystem(
+            access_key=settings.aws_access_key_id,
+            secret_key=settings.aws_secret_access_key,
+            region=settings.aws_region
+        )
+        return filesystem, f"{self.bucket_name}/"
+
+    @track_s3("create_multipart_upload")
+    def create_multipart_upload(self, s3_key: str, content_type: str) -> str:
+        """Start a multipart upload and return its upload ID."""
+        try:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                ContentType=content_type
+            )
+            return response['UploadId']
+        except ClientError as e:
+            logger.error(f"Error starting multipart upload for {s3_key}: {e}")
+            raise ValueError(f"Failed to start multipart upload: {str(e)}")
+
+    @track_s3("generate_presigned_part_url")
+    def generate_presigned_part_url(
+        self,
+        s3_key: str,
+        upload_id: str,
+        part_number: int,
+        expires_in: int = 3600
+    ) -> str:
+        """Generate a pre-signed URL for uploading one part."""
+        try:
+            return self.s3_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': s3_key,
+                    'UploadId': upload_id,
+                    'PartNumber': part_number,
+                },
+                ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            logger.error(f"Error generating part URL for {s3_key}: {e}")
+            raise ValueError(f"Failed to generate part upload URL: {str(e)}")
+
+    @track_s3("list_parts")
+    def list_parts(self, s3_key: str, upload_id: str) -> List[Dict]:
+        """List the parts uploaded so far as dicts with part_number, etag and size."""
+        parts = []
+        try:
+            paginator = self.s3_client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id):
+                parts.extend(
+                    {"part_number": part['PartNumber'], "etag": part['ETag'], "size": part['Size']}
+                    for part in page.get('Parts', [])
+                )
+        except ClientError as e:
+            logger.error(f"Error listing parts of {s3_key}: {e}")
+            raise ValueError(f"Failed to list uploaded parts: {str(e)}")
+        return parts
+
+    @track_s3("complete_multipart_upload")
+    def complete_multipart_upload(
+        self,
+        s3_key: str,
+        upload_id: str,
+        parts: List[Dict]
+    ) -> None:
+        """Assemble the uploaded parts (dicts with part_number and etag) into the final object."""
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': part['part_number'], 'ETag': part['etag']}
+                    for part in sorted(parts, key=lambda part: part['part_number'])
+                ]}
+            )
+            logger.info(f"Completed multipart upload: {s3_key}")
+        except ClientError as e:
+            logger.error(f"Error completing multipart upload for {s3_key}: {e}")
+            raise ValueError(f"Failed to complete multipart upload: {str(e)}")
+
+    @track_s3("abort_multipart_upload")
+    def abort_multipart_upload(self, s3_key: str, upload_id: str) -> bool:
+        """Abort a multipart upload and discard its parts."""
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id
+            )
+            logger.info(f"Aborted multipart upload: {s3_key}")
+            return True
+        except ClientError as e:
+            logger.error(f"Error aborting multipart upload for {s3_key}: {e}")
+            return False
+
+    @track_s3("check_bucket_exists")
+    def check_bucket_exists(self) -> bool:
+        """Check if the S3 bucket exists and is accessible."""
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            return True
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == '404':
+                logger.error(f"Bucket {self.bucket_name} does not exist")
+            elif error_code == '403':
+                logger.error(f"Access denied to bucket {self.bucket_name}")
+            else:
+                logger.error(f"Error accessing bucket {self.bucket_name}: {e}")
+            return False
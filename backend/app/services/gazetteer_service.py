@@ -0,0 +1,226 @@
+"""
+Offline place search for the location autocomplete.
+
+Places come from a CSV gazetteer (``settings.gazetteer_path``, by default
+the bundled ``app/data/nairobi_places.csv``) with one row per place:
+name, kind, area, latitude, longitude and ``|``-separated aliases.
+
+Names, aliases and areas are split into normalized tokens (lowercase,
+accents and apostrophes dropped). Each query token is matched against
+them three ways, best first:
+- exactly, through a token -> places dictionary;
+- as a prefix, by bisecting the sorted token list (a flattened trie);
+- with typos, by collecting tokens that share trigrams with it and
+  keeping those within one or two Damerau-Levenshtein edits.
+
+A place must match every query token. Results are cached per normalized
+query in a small LRU, since autocomplete repeats the same prefixes.
+"""
+import csv
+import logging
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "nairobi_places.csv")
+
+# Per-token match scores
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+# Tokens from the area column count for less than the place's own names
+AREA_WEIGHT = 0.5
+# Shorter query tokens are too ambiguous to correct
+FUZZY_MIN_LENGTH = 4
+KIND_BONUS = {"neighbourhood": 0.3, "town": 0.3, "landmark": 0.2, "market": 0.2}
+# Query words that also match the word they abbreviate
+ABBREVIATIONS = {
+    "rd": "road", "st": "street", "ave": "avenue", "av": "avenue", "hwy": "highway",
+    "mkt": "market", "hosp": "hospital", "stn": "station", "univ": "university",
+}
+
+_APOSTROPHES = re.compile(r"['’`]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+class Place(NamedTuple):
+    name: str
+    kind: str
+    area: str
+    latitude: float
+    longitude: float
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", _APOSTROPHES.sub("", text.lower())).strip()
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class Gazetteer:
+    """In-memory place index, loaded on first use."""
+
+    def __init__(self, path: Optional[str] = None, cache_size: int = 1024):
+        self.path = path
+        self.cache_size = cache_size
+        self.places: List[Place] = []
+        # token -> {place index: weight}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._tokens: List[str] = []
+        self._trigrams: Dict[str, List[str]] = {}
+        # Normalized names and aliases per place, for the "starts with the query" bonus
+        self._names: List[List[str]] = []
+        self._cache: "OrderedDict[Tuple[str, int], List[Place]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self) -> None:
+        """Read the gazetteer file and build the indexes (once)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            path = self.path or settings.gazetteer_path or BUNDLED_GAZETTEER
+            places, names, postings = [], [], {}
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    index = len(places)
+                    places.append(Place(
+                        name=row["name"],
+                        kind=row["kind"],
+                        area=row["area"],
+                        latitude=float(row["latitude"]),
+                        longitude=float(row["longitude"]),
+                    ))
+                    aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias]
+                    names.append([normalize(name) for name in [row["name"]] + aliases])
+                    fields = [(name, 1.0) for name in names[-1]] + [(normalize(row["area"]), AREA_WEIGHT)]
+                    for text, weight in fields:
+                        for token in text.split():
+                            entry = postings.setdefault(token, {})
+                            entry[index] = max(entry.get(index, 0.0), weight)
+            trigrams: Dict[str, List[str]] = {}
+            for token in postings:
+                for trigram in _trigrams(token):
+                    trigrams.setdefault(trigram, []).append(token)
+            self.places, self._names, self._postings = places, names, postings
+            self._tokens = sorted(postings)
+            self._trigrams = trigrams
+            self._cache.clear()
+            self._loaded = True
+            logger.info(f"Loaded {len(places)} places ({len(postings)} tokens) from {path}")
+
+    def search(self, query: str, limit: int = 8) -> List[Place]:
+        """Places matching every word of the query, best first."""
+        self.load()
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        key = (normalized, limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        record_cache("places", cached is not None)
+        if cached is not None:
+            return cached
+
+        results = self._search(normalized, limit)
+        with self._lock:
+            self._cache[key] = results
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    def _search(self, normalized: str, limit: int) -> List[Place]:
+        tokens = normalized.split()
+        scores: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            # Only the word being typed is completed; earlier ones were finished
+            matches = self._match(token, complete=position == len(tokens) - 1)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {index: score + matches[index] for index, score in scores.items() if index in matches}
+            if not scores:
+                return []
+
+        ranked = []
+        for index, score in scores.items():
+            place = self.places[index]
+            if any(name.startswith(normalized) for name in self._names[index]):
+                score += 1.0
+            score += KIND_BONUS.get(place.kind, 0.0)
+            ranked.append((-score, len(place.name), place.name, index))
+        ranked.sort()
+        return [self.places[index] for _, _, _, index in ranked[:limit]]
+
+    def _match(self, token: str, complete: bool) -> Dict[int, float]:
+        """Best score per place for one query token."""
+        matches: Dict[int, float] = {}
+
+        def add(candidate: str, score: float):
+            for index, weight in self._postings[candidate].items():
+                if score * weight > matches.get(index, 0.0):
+                    matches[index] = score * weight
+
+        if token in self._postings:
+            add(token, EXACT)
+        if ABBREVIATIONS.get(token) in self._postings:
+            add(ABBREVIATIONS[token], EXACT)
+        if complete:
+            start = bisect_left(self._tokens, token)
+            for candidate in self._tokens[start:]:
+                if not candidate.startswith(token):
+                    break
+                if candidate != token:
+                    add(candidate, PREFIX)
+        if len(token) >= FUZZY_MIN_LENGTH:
+            limit = 1 if len(token) <= 5 else 2
+            seen = set()
+            for trigram in _trigrams(token):
+                for candidate in self._trigrams.get(trigram, ()):
+                    if candidate in seen or candidate == token:
+                        continue
+                    seen.add(candidate)
+                    # A typo in a partly typed word is judged against the same length of the candidate
+                    target = candidate[:len(token)] if complete and len(candidate) > len(token) else candidate
+                    if edit_distance(token, target, limit) <= limit:
+                        add(candidate, FUZZY)
+        return matches
+
+
+# Create gazetteer instance
+gazetteer = Gazetteer(cache_size=settings.gazetteer_cache_size)
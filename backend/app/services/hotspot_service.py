@@ -0,0 +1,534 @@
+"""
+Detection of persistent dumping hotspots.
+
+The ``hotspots.detect`` job runs every ``hotspot_interval_seconds``. It
+reads the coordinates and creation times of the reports in the last
+``hotspot_window_days`` in one pass (binary ``COPY`` on PostgreSQL), so
+the window slides forward with every run. The reports are clustered with
+DBSCAN (radius ``hotspot_radius_meters``, ``hotspot_min_reports`` points
+per core) and the results replace the ``hotspots`` table in one
+transaction.
+
+The DBSCAN is grid accelerated and vectorized with NumPy:
+- coordinates are projected to metres around the centre of the data and
+  bucketed into square cells of side eps/sqrt(2), so any two points in a
+  cell are neighbours and every neighbour of a point lies in the 21 cells
+  of the 5x5 block around its own (the corners are too far away);
+- points in cells holding at least min_points points are core points
+  without any distance checks; the rest count their neighbours against
+  the points of the nearby cells in chunks of candidate pairs;
+- clusters are connected components of the cells with core points, two
+  cells being linked when some pair of their core points is within eps.
+  A first pass pairs up only a few core points per cell, which links most
+  cells inside a dense cluster; only cell pairs still in different
+  components get a full check, one at a time for pairs of very full cells;
+- non-core points join the cluster of their nearest core point within eps.
+
+A hotspot's score is its number of reports times the fraction of
+``hotspot_period_days`` periods in the window that had reports there, so
+a site reported week after week ranks above a one-off clean-up drive.
+Clusters active in fewer than ``hotspot_min_active_periods`` periods are
+dropped. The polygon is the 16-sided polygon whose sides touch the
+outermost reports in 16 directions, moved out by ``hotspot_buffer_meters``.
+"""
+import io
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.core.geo import MICRODEGREES
+from app.models.hotspot import Hotspot
+from app.models.job import Job
+from app.models.photo import Photo
+from app.services.job_service import job_handler, job_service
+
+logger = logging.getLogger(__name__)
+
+DETECT_JOB = "hotspots.detect"
+METERS_PER_DEGREE = 111_320.0
+SECONDS_PER_DAY = 86_400
+
+# Cell offsets that can hold points within eps of a cell of side eps/sqrt(2)
+_NEIGHBOURS = tuple((dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if abs(dx) + abs(dy) < 4)
+# Candidate pairs checked per NumPy step; bounds the temporary arrays to a few hundred MB
+PAIR_BUDGET = 4_000_000
+# Core points per cell paired up in the first, cheap pass over the cell links
+LINK_SAMPLE = 4
+# Cell pairs with more core point pairs than this are linked one at a time
+HEAVY_PAIRS = 4096
+# Grids with fewer cells than this use a direct lookup table instead of a binary search
+DENSE_GRID_LIMIT = 1 << 23
+POLYGON_SIDES = 16
+
+
+class HotspotParams(NamedTuple):
+    """Detection settings, passed explicitly so the work can run in the process pool."""
+    radius_meters: float
+    min_reports: int
+    window_days: int
+    period_days: int
+    min_active_periods: int
+    buffer_meters: float
+    max_results: int
+
+    @classmethod
+    def from_settings(cls) -> "HotspotParams":
+        return cls(
+            radius_meters=settings.hotspot_radius_meters,
+            min_reports=settings.hotspot_min_reports,
+            window_days=settings.hotspot_window_days,
+            period_days=settings.hotspot_period_days,
+            min_active_periods=settings.hotspot_min_active_periods,
+            buffer_meters=settings.hotspot_buffer_meters,
+            max_results=settings.hotspot_max_results,
+        )
+
+
+def _neighbour_cells(cell_keys, width: int, height: int):
+    """Occupied _NEIGHBOURS (including itself) of every occupied cell, as an (indptr, indices) table."""
+    import numpy as np
+
+    cells = len(cell_keys)
+    found = np.empty((cells, len(_NEIGHBOURS)), dtype=np.int32)
+    if width * height <= DENSE_GRID_LIMIT:
+        lookup = np.full(width * height, -1, dtype=np.int32)
+        lookup[cell_keys] = np.arange(cells)
+        for k, (dx, dy) in enumerate(_NEIGHBOURS):
+            found[:, k] = lookup[cell_keys + (dx * height + dy)]
+    else:
+        for k, (dx, dy) in enumerate(_NEIGHBOURS):
+            wanted = cell_keys + (dx * height + dy)
+            position = np.minimum(np.searchsorted(cell_keys, wanted), cells - 1)
+            found[:, k] = np.where(cell_keys[position] == wanted, position, -1)
+    occupied = found >= 0
+    indptr = np.zeros(cells + 1, dtype=np.int64)
+    np.cumsum(occupied.sum(axis=1), out=indptr[1:])
+    return indptr, found[occupied].astype(np.int64)
+
+
+def _select(table, keep):
+    """The table with only the entries where keep is true."""
+    import numpy as np
+
+    indptr, indices = table
+    return np.r_[0, np.cumsum(keep)][indptr], indices[keep]
+
+
+def _owners(table):
+    """The row of every entry of the table."""
+    import numpy as np
+
+    indptr, _ = table
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _cell_totals(table, size):
+    """Sum of size over the cells in each row of the table."""
+    import numpy as np
+
+    indptr, indices = table
+    sums = np.r_[0, np.cumsum(size[indices])]
+    return sums[indptr[1:]] - sums[indptr[:-1]]
+
+
+def _pairs(row_cells, table, start, size, totals=None, budget: int = PAIR_BUDGET):
+    """Yield (row, candidate) index arrays pairing each row with every point in the cells
+    of its table row (row_cells[row]), a chunk of whole rows at a time.
+
+    Candidates are positions in the array that start and size describe per cell;
+    totals is _cell_totals(table, size) when the caller already has it.
+    """
+    import numpy as np
+
+    indptr, indices = table
+    per_row = (_cell_totals(table, size) if totals is None else totals)[row_cells]
+    active = np.flatnonzero(per_row)
+    ends = np.cumsum(per_row[active])
+    first, done = 0, 0
+    while first < len(active):
+        last = max(first + 1, int(np.searchsorted(ends, done + budget, side="right")))
+        rows = active[first:last]
+        row_start, degree = indptr[row_cells[rows]], np.diff(indptr)[row_cells[rows]]
+        cells = indices[np.arange(int(degree.sum())) - np.repeat(np.cumsum(degree) - degree - row_start, degree)]
+        sizes = size[cells]
+        offsets = np.cumsum(sizes) - sizes
+        yield np.repeat(rows, per_row[rows]), np.arange(int(ends[last - 1]) - done) - np.repeat(offsets - start[cells], sizes)
+        done = int(ends[last - 1])
+        first = last
+
+
+def _components(count: int, a, b):
+    """Component label of each of count items linked by the edges a[i]-b[i]."""
+    import numpy as np
+
+    parent = np.arange(count)
+    while len(a):
+        # Hook the larger root of every edge under the smaller one, then flatten the trees
+        root_a, root_b = parent[a], parent[b]
+        low = np.minimum(root_a, root_b)
+        np.minimum.at(parent, root_a, low)
+        np.minimum.at(parent, root_b, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        pending = parent[a] != parent[b]
+        a, b = a[pending], b[pending]
+    return parent
+
+
+def cluster_points(x, y, eps: float, min_points: int):
+    """DBSCAN cluster labels, -1 for noise, of points given in metres (see the module docstring)."""
+    import numpy as np
+
+    labels = np.full(len(x), -1, dtype=np.int64)
+    if not len(x):
+        return labels
+    eps2 = eps * eps
+    side = eps / math.sqrt(2)
+    # Two empty columns and rows around the data keep every neighbour key on the grid
+    cx = ((x - x.min()) // side).astype(np.int64) + 2
+    cy = ((y - y.min()) // side).astype(np.int64) + 2
+    width, height = int(cx.max()) + 3, int(cy.max()) + 3
+    keys = cx * height + cy
+    order = np.argsort(keys, kind="stable")
+    keys, xs, ys = keys[order], x[order], y[order]
+    cell_start = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    cell_count = np.diff(np.r_[cell_start, len(keys)])
+    cell_keys = keys[cell_start]
+    cells = len(cell_keys)
+    cell_of = np.repeat(np.arange(cells), cell_count)
+    neighbours = _neighbour_cells(cell_keys, width, height)
+
+    # Core points: everything in a full cell, plus points with enough neighbours nearby
+    core = (cell_count >= min_points)[cell_of]
+    reachable = _cell_totals(neighbours, cell_count)
+    queries = np.flatnonzero(~core & (reachable[cell_of] >= min_points))
+    if len(queries):
+        within = np.zeros(len(queries), dtype=np.int64)
+        for rows, candidates in _pairs(cell_of[queries], neighbours, cell_start, cell_count, reachable):
+            points = queries[rows]
+            close = (xs[points] - xs[candidates]) ** 2 + (ys[points] - ys[candidates]) ** 2 <= eps2
+            within += np.bincount(rows[close], minlength=len(queries))
+        core[queries[within >= min_points]] = True
+    core_points = np.flatnonzero(core)
+    if not len(core_points):
+        return labels
+    core_count = np.bincount(cell_of[core_points], minlength=cells)
+    core_start = np.cumsum(core_count) - core_count
+
+    # Links between cells with core points, each pair of cells once (b > a). A first pass
+    # only pairs up a few core points per cell; cell pairs it leaves in different
+    # clusters are then checked in full
+    owner, neighbour = _owners(neighbours), neighbours[1]
+    forward = _select(neighbours, (neighbour > owner) & (core_count[neighbour] > 0) & (core_count[owner] > 0))
+    links_a, links_b = [], []
+
+    def link(queries, table, size):
+        for rows, candidates in _pairs(cell_of[queries], table, core_start, size):
+            points, targets = queries[rows], core_points[candidates]
+            close = (xs[points] - xs[targets]) ** 2 + (ys[points] - ys[targets]) ** 2 <= eps2
+            linked = cell_of[points[close]] * cells + cell_of[targets[close]]
+            # Pairs come grouped by point and then by cell, so most repeats are adjacent
+            linked = linked[np.r_[True, linked[1:] != linked[:-1]]] if len(linked) else linked
+            links_a.append(linked // cells)
+            links_b.append(linked % cells)
+
+    def components():
+        if not links_a:
+            return np.arange(cells)
+        return _components(cells, np.concatenate(links_a), np.concatenate(links_b))
+
+    rank = np.arange(len(core_points)) - core_start[cell_of[core_points]]
+    link(core_points[rank < LINK_SAMPLE], forward, np.minimum(core_count, LINK_SAMPLE))
+    component = components()
+    owner, neighbour = _owners(forward), forward[1]
+    unresolved = component[owner] != component[neighbour]
+    heavy = unresolved & (core_count[owner] * core_count[neighbour] > HEAVY_PAIRS)
+    link(core_points, _select(forward, unresolved & ~heavy), core_count)
+    for a, b in zip(owner[heavy].tolist(), neighbour[heavy].tolist()):
+        if _cells_linked(xs, ys, core_points, core_start, core_count, a, b, eps2):
+            links_a.append(np.array([a]))
+            links_b.append(np.array([b]))
+    component = components()
+    sorted_labels = np.full(len(xs), -1, dtype=np.int64)
+    sorted_labels[core_points] = component[cell_of[core_points]]
+
+    # Border points join the cluster of their nearest core point within eps
+    reachable = _cell_totals(neighbours, core_count)
+    queries = np.flatnonzero(~core & (reachable[cell_of] > 0))
+    if len(queries):
+        for rows, candidates in _pairs(cell_of[queries], neighbours, core_start, core_count, reachable):
+            points, targets = queries[rows], core_points[candidates]
+            distance = (xs[points] - xs[targets]) ** 2 + (ys[points] - ys[targets]) ** 2
+            close = distance <= eps2
+            rows, targets, distance = rows[close], targets[close], distance[close]
+            nearest = np.lexsort((distance, rows))
+            rows, targets = rows[nearest], targets[nearest]
+            first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else rows
+            sorted_labels[queries[rows[first]]] = sorted_labels[targets[first]]
+
+    clustered = sorted_labels >= 0
+    sorted_labels[clustered] = np.unique(sorted_labels[clustered], return_inverse=True)[1]
+    labels[order] = sorted_labels
+    return labels
+
+
+def _cells_linked(xs, ys, core_points, core_start, core_count, a: int, b: int, eps2: float) -> bool:
+    """Whether two full cells have core points within eps, checking a's points nearest b first."""
+    import numpy as np
+
+    points_a = core_points[core_start[a]:core_start[a] + core_count[a]]
+    points_b = core_points[core_start[b]:core_start[b] + core_count[b]]
+    bx, by = xs[points_b], ys[points_b]
+    nearest = np.argsort((xs[points_a] - bx.mean()) ** 2 + (ys[points_a] - by.mean()) ** 2)
+    step = max(1, PAIR_BUDGET // len(points_b))
+    for first in range(0, len(nearest), step):
+        chunk = points_a[nearest[first:first + step]]
+        if (((xs[chunk, None] - bx) ** 2 + (ys[chunk, None] - by) ** 2) <= eps2).any():
+            return True
+    return False
+
+
+def detect_hotspots(lat_e6, lng_e6, created, window_end: int, params: HotspotParams) -> List[dict]:
+    """Hotspots among reports (microdegree and epoch second arrays) in the window ending at window_end.
+
+    Returns up to params.max_results hotspots, best first, with times in epoch seconds.
+    """
+    import numpy as np
+
+    if not len(lat_e6):
+        return []
+    # Equirectangular projection around the centre of the data, exact enough across a city
+    lat0 = (int(lat_e6.min()) + int(lat_e6.max())) // 2
+    lng0 = (int(lng_e6.min()) + int(lng_e6.max())) // 2
+    y_scale = METERS_PER_DEGREE / MICRODEGREES
+    x_scale = y_scale * math.cos(math.radians(lat0 / MICRODEGREES))
+    x = (lng_e6.astype(np.float64) - lng0) * x_scale
+    y = (lat_e6.astype(np.float64) - lat0) * y_scale
+    labels = cluster_points(x, y, params.radius_meters, params.min_reports)
+
+    clustered = np.flatnonzero(labels >= 0)
+    if not len(clustered):
+        return []
+    members = clustered[np.argsort(labels[clustered], kind="stable")]
+    starts = np.flatnonzero(np.r_[True, np.diff(labels[members]) != 0])
+    sizes = np.diff(np.r_[starts, len(members)])
+    px, py, times = x[members], y[members], created[members].astype(np.int64)
+
+    # Periods count back from the end of the window, so the newest is always a whole one
+    period_seconds = params.period_days * SECONDS_PER_DAY
+    periods = max(1, math.ceil(params.window_days / params.period_days))
+    period = np.clip((window_end - 1 - times) // period_seconds, 0, periods - 1)
+    cluster = np.repeat(np.arange(len(starts)), sizes)
+    active = np.bincount(np.unique(cluster * periods + period) // periods, minlength=len(starts))
+    score = sizes * active / periods
+    selected = np.flatnonzero(active >= params.min_active_periods)
+    selected = selected[np.lexsort((-sizes[selected], -score[selected]))][:params.max_results]
+    if not len(selected):
+        return []
+
+    centre_x = np.add.reduceat(px, starts)[selected] / sizes[selected]
+    centre_y = np.add.reduceat(py, starts)[selected] / sizes[selected]
+    first_report = np.minimum.reduceat(times, starts)[selected]
+    last_report = np.maximum.reduceat(times, starts)[selected]
+    # Sides touch the outermost report in each direction; neighbouring sides meet at the vertices
+    angles = np.arange(POLYGON_SIDES) * (2 * math.pi / POLYGON_SIDES)
+    cos, sin = np.cos(angles), np.sin(angles)
+    support = np.stack([
+        np.maximum.reduceat(px * cos[k] + py * sin[k], starts)[selected] for k in range(POLYGON_SIDES)
+    ], axis=1) + params.buffer_meters
+    following = np.roll(support, -1, axis=1)
+    cos_next, sin_next = np.roll(cos, -1), np.roll(sin, -1)
+    determinant = math.sin(2 * math.pi / POLYGON_SIDES)
+    vertex_x = (support * sin_next - following * sin) / determinant
+    vertex_y = (following * cos - support * cos_next) / determinant
+    area = np.abs(np.sum(vertex_x * np.roll(vertex_y, -1, axis=1) - np.roll(vertex_x, -1, axis=1) * vertex_y, axis=1)) / 2
+    vertex_lng = (lng0 + vertex_x / x_scale) / MICRODEGREES
+    vertex_lat = (lat0 + vertex_y / y_scale) / MICRODEGREES
+
+    hotspots = []
+    for rank, index in enumerate(selected.tolist()):
+        ring = []
+        for point in zip(np.round(vertex_lng[rank], 6).tolist(), np.round(vertex_lat[rank], 6).tolist()):
+            if not ring or list(point) != ring[-1]:
+                ring.append(list(point))
+        ring.append(ring[0])
+        hotspots.append({
+            "rank": rank + 1,
+            "score": round(float(score[index]), 3),
+            "report_count": int(sizes[index]),
+            "active_periods": int(active[index]),
+            "lat_e6": int(round(lat0 + centre_y[rank] / y_scale)),
+            "lng_e6": int(round(lng0 + centre_x[rank] / x_scale)),
+            "area_m2": round(float(area[rank]), 1),
+            "polygon": {"type": "Polygon", "coordinates": [ring]},
+            "first_report_at": int(first_report[rank]),
+            "last_report_at": int(last_report[rank]),
+        })
+    return hotspots
+
+
+def _from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+class HotspotService:
+    """Runs detection, stores the results and schedules the next run."""
+
+    def load_points(self, since: datetime, until: datetime):
+        """(lat_e6, lng_e6, created epoch seconds) arrays of the reports created in [since, until)."""
+        import numpy as np
+
+        with get_engine().connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return self._copy_points(conn, since, until)
+            rows = conn.execute(
+                select(Photo.lat_e6, Photo.lng_e6, Photo.created_at)
+                .where(Photo.created_at >= since, Photo.created_at < until)
+            ).all()
+        count = len(rows)
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.int32, count=count),
+            np.fromiter((row[1] for row in rows), dtype=np.int32, count=count),
+            np.fromiter(
+                (int((row[2] if row[2].tzinfo else row[2].replace(tzinfo=timezone.utc)).timestamp()) for row in rows),
+                dtype=np.int64, count=count
+            ),
+        )
+
+    @staticmethod
+    def _copy_points(conn, since: datetime, until: datetime):
+        """Read the window with a binary COPY and view the fixed-width rows as NumPy columns."""
+        import numpy as np
+
+        # Per row: field count, then length and value of int4, int4 and int8 columns (big-endian)
+        row_type = np.dtype([
+            ("fields", ">i2"), ("lat_length", ">i4"), ("lat_e6", ">i4"), ("lng_length", ">i4"),
+            ("lng_e6", ">i4"), ("created_length", ">i4"), ("created", ">i8"),
+        ])
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            query = cursor.mogrify(
+                "COPY (SELECT lat_e6, lng_e6, floor(extract(epoch FROM created_at))::bigint FROM photos "
+                "WHERE created_at >= %s AND created_at < %s) TO STDOUT WITH (FORMAT binary)",
+                (since, until)
+            ).decode()
+            buffer = io.BytesIO()
+            cursor.copy_expert(query, buffer)
+        finally:
+            cursor.close()
+        data = buffer.getbuffer()
+        # 11-byte signature, flags, then the header extension length and area; a 2-byte trailer
+        header = 19 + int.from_bytes(data[15:19], "big")
+        body = len(data) - header - 2
+        if body % row_type.itemsize:
+            raise ValueError(f"Unexpected COPY output size {len(data)}")
+        rows = np.frombuffer(data, dtype=row_type, count=body // row_type.itemsize, offset=header)
+        return rows["lat_e6"].astype(np.int32), rows["lng_e6"].astype(np.int32), rows["created"].astype(np.int64)
+
+    def detect(self, window_end: Optional[datetime] = None, run_cpu: Optional[Callable] = None) -> dict:
+        """Detect hotspots in the window ending at window_end (now) and replace the stored ones.
+
+        run_cpu runs the clustering elsewhere, e.g. JobContext.run_cpu for the process pool.
+        """
+        params = HotspotParams.from_settings()
+        window_end = window_end or datetime.now(timezone.utc)
+        window_start = window_end - timedelta(days=params.window_days)
+        started = time.perf_counter()
+        lat_e6, lng_e6, created = self.load_points(window_start, window_end)
+        loaded = time.perf_counter()
+        arguments = (lat_e6, lng_e6, created, int(window_end.timestamp()), params)
+        hotspots = run_cpu(detect_hotspots, *arguments) if run_cpu else detect_hotspots(*arguments)
+        clustered = time.perf_counter()
+        self.store(hotspots, window_start, window_end)
+        stored = time.perf_counter()
+        logger.info(f"Found {len(hotspots)} hotspots among {len(lat_e6)} reports in {stored - started:.2f}s")
+        return {
+            "reports": len(lat_e6),
+            "hotspots": len(hotspots),
+            "window_start": window_start.isoformat(),
+            "window_end": window_end.isoformat(),
+            "seconds": {
+                "load": round(loaded - started, 3),
+                "cluster": round(clustered - loaded, 3),
+                "store": round(stored - clustered, 3),
+            },
+        }
+
+    @staticmethod
+    def store(hotspots: List[dict], window_start: datetime, window_end: datetime) -> None:
+        """Replace all stored hotspots in one transaction."""
+        computed_at = datetime.now(timezone.utc)
+        rows = [
+            dict(
+                hotspot,
+                first_report_at=_from_epoch(hotspot["first_report_at"]),
+                last_report_at=_from_epoch(hotspot["last_report_at"]),
+                window_start=window_start,
+                window_end=window_end,
+                computed_at=computed_at,
+            )
+            for hotspot in hotspots
+        ]
+        with get_engine().begin() as conn:
+            conn.execute(delete(Hotspot))
+            if rows:
+                conn.execute(insert(Hotspot), rows)
+
+    @staticmethod
+    def get_hotspots(db: Session, limit: int = 50) -> List[Hotspot]:
+        """Stored hotspots, highest score first."""
+        return db.query(Hotspot).order_by(Hotspot.rank).limit(limit).all()
+
+    @staticmethod
+    def schedule(db: Session, delay_seconds: float = 0, include_running: bool = True) -> bool:
+        """Queue a detection run unless one is already queued (or running); returns whether one was queued."""
+        statuses = [Job.QUEUED, Job.RUNNING] if include_running else [Job.QUEUED]
+        pending = db.query(Job.id).filter(Job.type == DETECT_JOB, Job.status.in_(statuses)).first()
+        if pending is not None:
+            return False
+        job_service.enqueue(db, DETECT_JOB, delay_seconds=delay_seconds)
+        return True
+
+    def ensure_scheduled(self) -> None:
+        """Start the detection schedule if no run is pending (called when job runners start)."""
+        db = SessionLocal()
+        try:
+            if self.schedule(db):
+                logger.info("Scheduled hotspot detection")
+        finally:
+            db.close()
+
+
+# Create service instance
+hotspot_service = HotspotService()
+
+
+def start_hotspot_schedule() -> None:
+    """Start the detection schedule when it is enabled; called wherever a job runner starts."""
+    if settings.hotspots_enabled:
+        try:
+            hotspot_service.ensure_scheduled()
+        except Exception as e:
+            logger.error(f"Could not schedule hotspot detection: {e}")
+
+
+@job_handler(DETECT_JOB, concurrency=1, max_attempts=3)
+def detect_hotspots_job(payload: dict, context) -> dict:
+    """Queue the next run, then detect hotspots; queueing first keeps the schedule going after failures."""
+    db = SessionLocal()
+    try:
+        # This run counts as running, so only a queued run means the next one is taken care of
+        hotspot_service.schedule(db, delay_seconds=settings.hotspot_interval_seconds, include_running=False)
+    finally:
+        db.close()
+    return hotspot_service.detect(run_cpu=context.run_cpu)
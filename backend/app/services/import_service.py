@@ -0,0 +1,453 @@
+"""
+Bulk import of photo reports from CSV or GeoJSON files.
+
+Input is streamed in chunks of ``settings.import_chunk_size`` records. Each
+chunk is checked against the ``PhotoCreate`` rules with NumPy (bounds and
+lengths are read from the schema) and loaded in one transaction, with
+``COPY`` on PostgreSQL and ``executemany`` on SQLite. Rows that fail
+validation are reported by record number and skipped.
+
+Ids are derived from the file contents and the record number, and a
+checkpoint file next to the input records how far the import got. An
+interrupted import resumes after the last committed chunk. Rows whose ids
+already exist (e.g. importing the same file again with ``--no-resume``)
+are skipped and counted as duplicates instead of being added twice; the
+check is by id alone because on a partitioned table the primary key also
+includes ``created_at``, which defaults to the import time.
+
+CSV files need ``description``, ``latitude``, ``longitude`` and ``s3_key``
+columns (``lat``, ``lng`` and ``lon`` are accepted too) and may have a
+``created_at`` column with ISO 8601 timestamps. GeoJSON files are
+FeatureCollections, or one Feature per line (``.geojsonl``, ``.ndjson``),
+with Point geometries and the other fields as properties.
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.core.geo import MICRODEGREES, morton_encode_array
+from app.core.partitions import create_partition, is_partitioned, month_starts
+from app.models.photo import Photo
+from app.schemas.photo import PhotoCreate
+from app.services.s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "geojson", "geojsonseq")
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".geojsonl": "geojsonseq",
+    ".geojsons": "geojsonseq",
+    ".ndjson": "geojsonseq",
+    ".jsonl": "geojsonseq",
+}
+_ALIASES = {"lat": "latitude", "lng": "longitude", "lon": "longitude", "long": "longitude"}
+COLUMNS = ("id", "s3_key", "s3_url", "description", "lat_e6", "lng_e6", "geo_key", "created_at", "updated_at")
+# Namespace for ids derived from (file fingerprint, record number)
+_ID_NAMESPACE = uuid.UUID("89ee2d18-f73d-42ab-baa6-6f34fda2ea90")
+_FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+_READ_SIZE = 1 << 20
+MAX_REPORTED_ERRORS = 20
+# Ids per existing-row lookup; SQLite before 3.32 allows 999 bound parameters
+EXISTING_ID_BATCH = 900
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("numpy is required for bulk imports; install it with `pip install numpy`")
+    return numpy
+
+
+def _constraint(field: str, name: str):
+    """A Field constraint (ge, le, min_length, max_length) of PhotoCreate."""
+    for item in PhotoCreate.model_fields[field].metadata:
+        if hasattr(item, name):
+            return getattr(item, name)
+    return None
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Cannot tell the format of {path}; pass one of: {', '.join(FORMATS)}")
+    return _EXTENSIONS[extension]
+
+
+def fingerprint(path: str) -> str:
+    """Identifies an input file by its size and first megabyte."""
+    digest = hashlib.sha1(str(os.path.getsize(path)).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_READ_SIZE))
+    return digest.hexdigest()
+
+
+def _normalize(record: dict) -> dict:
+    normalized = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        normalized[_ALIASES.get(key, key)] = value
+    return normalized
+
+
+def _from_feature(feature) -> dict:
+    if not isinstance(feature, dict):
+        return {"_error": "not a GeoJSON Feature"}
+    record = _normalize(feature.get("properties") or {})
+    geometry = feature.get("geometry") or {}
+    coordinates = geometry.get("coordinates")
+    if geometry.get("type") != "Point" or not isinstance(coordinates, list) or len(coordinates) < 2:
+        record["_error"] = "geometry must be a Point"
+    else:
+        # GeoJSON positions are [longitude, latitude]
+        record["longitude"], record["latitude"] = coordinates[0], coordinates[1]
+    return record
+
+
+def _iter_feature_collection(f) -> Iterator[dict]:
+    """Features of a FeatureCollection, decoded one at a time."""
+    decoder = json.JSONDecoder()
+    buffer, eof = "", False
+    while True:
+        match = _FEATURES_START.search(buffer)
+        if match:
+            position = match.end()
+            break
+        if eof:
+            raise ValueError("No features array found in the GeoJSON file")
+        chunk = f.read(_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[-64:] + chunk
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Truncated GeoJSON features array")
+            chunk = f.read(_READ_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield feature
+        position = end
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    """Stream normalized records from a CSV or GeoJSON file."""
+    with open(path, encoding="utf-8-sig", newline="" if fmt == "csv" else None) as f:
+        if fmt == "csv":
+            for record in csv.DictReader(f):
+                yield _normalize(record)
+        elif fmt == "geojson":
+            for feature in _iter_feature_collection(f):
+                yield _from_feature(feature)
+        elif fmt == "geojsonseq":
+            for line in f:
+                # RFC 8142 separates records with an ASCII record separator
+                line = line.strip().lstrip("\x1e")
+                if not line:
+                    continue
+                try:
+                    yield _from_feature(json.loads(line))
+                except ValueError:
+                    yield {"_error": "invalid JSON"}
+        else:
+            raise ValueError(f"Unknown format {fmt}; use one of: {', '.join(FORMATS)}")
+
+
+def _strings(records: List[dict], field: str) -> List[str]:
+    return ["" if record.get(field) is None else str(record[field]) for record in records]
+
+
+def _floats(np, values: list):
+    """Parse numbers into a float array; anything unparsable becomes NaN."""
+    try:
+        return np.array(["nan" if value in (None, "") else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(float(value))
+            except (TypeError, ValueError):
+                parsed.append(float("nan"))
+        return np.array(parsed, dtype=np.float64)
+
+
+def _parse_timestamp(value: str, default: datetime) -> Optional[datetime]:
+    if not value.strip():
+        return default
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class ImportService:
+    """Validates and loads photo records in bulk."""
+
+    def validate(self, records: List[dict], first_row: int, imported_at: datetime) -> Tuple[Dict[str, list], List[Tuple[int, str]]]:
+        """Check a chunk against the PhotoCreate rules.
+
+        Returns the valid rows as columns (see COLUMNS, without id and
+        s3_url) plus their record numbers, and (record number, error) pairs
+        for the rest.
+        """
+        np = _numpy()
+        count = len(records)
+        valid = np.ones(count, dtype=bool)
+        errors: Dict[int, str] = {}
+
+        def reject(mask, message: str) -> None:
+            for index in np.flatnonzero(mask & valid).tolist():
+                errors[index] = message
+            valid[mask] = False
+
+        for index, record in enumerate(records):
+            if "_error" in record:
+                errors[index] = record["_error"]
+                valid[index] = False
+
+        texts = {}
+        for field in ("description", "s3_key"):
+            raw = _strings(records, field)
+            lengths = np.fromiter(map(len, raw), dtype=np.int64, count=count)
+            texts[field] = [value.strip() for value in raw]
+            stripped = np.fromiter(map(len, texts[field]), dtype=np.int64, count=count)
+            reject(lengths < _constraint(field, "min_length"), f"{field} is required")
+            reject(lengths > _constraint(field, "max_length"),
+                   f"{field} must be at most {_constraint(field, 'max_length')} characters")
+            reject(stripped == 0, f"{field} cannot be empty")
+
+        coordinates = {}
+        for field in ("latitude", "longitude"):
+            values = _floats(np, [record.get(field) for record in records])
+            low, high = _constraint(field, "ge"), _constraint(field, "le")
+            reject(~np.isfinite(values), f"{field} must be a number")
+            with np.errstate(invalid="ignore"):
+                reject((values < low) | (values > high), f"{field} must be between {low} and {high}")
+            coordinates[field] = values
+
+        created_at = [_parse_timestamp(value, imported_at) for value in _strings(records, "created_at")]
+        reject(np.array([value is None for value in created_at], dtype=bool), "created_at must be an ISO 8601 timestamp")
+
+        keep = np.flatnonzero(valid)
+        # Same rounding as to_microdegrees (round half to even)
+        lat_e6 = np.rint(coordinates["latitude"][keep] * MICRODEGREES).astype(np.int64)
+        lng_e6 = np.rint(coordinates["longitude"][keep] * MICRODEGREES).astype(np.int64)
+        indices = keep.tolist()
+        columns = {
+            "row": [first_row + index for index in indices],
+            "s3_key": [texts["s3_key"][index] for index in indices],
+            "description": [texts["description"][index] for index in indices],
+            "lat_e6": lat_e6.tolist(),
+            "lng_e6": lng_e6.tolist(),
+            "geo_key": morton_encode_array(lat_e6, lng_e6).tolist(),
+            "created_at": [created_at[index] for index in indices],
+        }
+        return columns, sorted((first_row + index, message) for index, message in errors.items())
+
+    def _rows(self, columns: Dict[str, list], source: str, imported_at: datetime) -> List[tuple]:
+        """Complete validated columns into table rows in COLUMNS order."""
+        return [
+            (str(uuid.uuid5(_ID_NAMESPACE, f"{source}:{row}")), s3_key, s3_service.get_public_url(s3_key),
+             description, lat_e6, lng_e6, geo_key, created_at, imported_at)
+            for row, s3_key, description, lat_e6, lng_e6, geo_key, created_at in zip(
+                columns["row"], columns["s3_key"], columns["description"], columns["lat_e6"],
+                columns["lng_e6"], columns["geo_key"], columns["created_at"]
+            )
+        ]
+
+    def _load(self, conn, rows: List[tuple]) -> None:
+        """Insert rows in the connection's transaction."""
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            if conn.dialect.name == "postgresql":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY photos ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                # Store timestamps the way SQLAlchemy does for this dialect
+                process = Photo.__table__.c.created_at.type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+                if process is not None:
+                    rows = [row[:7] + (process(row[7]), process(row[8])) for row in rows]
+                placeholders = ", ".join("?" for _ in COLUMNS)
+                cursor.executemany(f"INSERT INTO photos ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows)
+        finally:
+            cursor.close()
+
+    def _existing_ids(self, conn, ids: List[str]) -> set:
+        """Which of the ids are already stored, looked up in batches of EXISTING_ID_BATCH."""
+        existing = set()
+        for start in range(0, len(ids), EXISTING_ID_BATCH):
+            batch = ids[start:start + EXISTING_ID_BATCH]
+            existing.update(conn.execute(select(Photo.id).where(Photo.id.in_(batch))).scalars())
+        return existing
+
+    def _ensure_partitions(self, conn, created_at: List[datetime]) -> None:
+        """Create the monthly partitions a chunk needs (PostgreSQL only)."""
+        if not created_at or not is_partitioned(conn):
+            return
+        for month in month_starts(min(created_at), max(created_at)):
+            try:
+                with conn.begin_nested():
+                    create_partition(conn, month)
+            except Exception as e:
+                # e.g. another import is creating it; the rows land in photos_default and move on the next run
+                logger.warning(f"Could not create the partition for {month:%Y-%m}: {e}")
+
+    def _read_checkpoint(self, path: str) -> Optional[dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_checkpoint(self, path: str, checkpoint: dict) -> None:
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary, path)
+
+    def import_file(
+        self,
+        path: str,
+        fmt: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        dry_run: bool = False,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = True,
+        rejects_path: Optional[str] = None
+    ) -> dict:
+        """Import a CSV or GeoJSON file; returns a summary."""
+        fmt = fmt or detect_format(path)
+        chunk_size = chunk_size or settings.import_chunk_size
+        checkpoint_path = checkpoint_path or f"{path}.import-checkpoint.json"
+        source = fingerprint(path)
+        started = time.perf_counter()
+        imported_at = datetime.now(timezone.utc)
+
+        checkpoint = {"fingerprint": source, "rows": 0, "imported": 0, "duplicates": 0, "rejected": 0, "completed": False}
+        previous = self._read_checkpoint(checkpoint_path) if resume and not dry_run else None
+        if previous is not None:
+            if previous.get("fingerprint") != source:
+                raise ValueError(f"{checkpoint_path} belongs to a different file; delete it or pass --no-resume")
+            checkpoint = dict({"duplicates": 0}, **previous)
+            if checkpoint["completed"]:
+                return dict(checkpoint, input=path, format=fmt, skipped=checkpoint["rows"], seconds=0.0)
+        skip = checkpoint["rows"]
+
+        engine = None if dry_run else get_engine()
+        rejects = open(rejects_path, "w", newline="") if rejects_path else None
+        reported: List[dict] = []
+        chunks = 0
+        try:
+            reject_writer = csv.writer(rejects) if rejects else None
+            if reject_writer:
+                reject_writer.writerow(["row", "error"])
+
+            def flush(records: List[dict], first_row: int) -> None:
+                nonlocal chunks
+                columns, errors = self.validate(records, first_row, imported_at)
+                rows = self._rows(columns, source, imported_at)
+                valid = len(rows)
+                if not dry_run and rows:
+                    with engine.begin() as conn:
+                        # Rows already imported, by an earlier run or before a crash between a
+                        # commit and its checkpoint
+                        existing = self._existing_ids(conn, [row[0] for row in rows])
+                        rows = [row for row in rows if row[0] not in existing]
+                        self._ensure_partitions(conn, [row[7] for row in rows])
+                        try:
+                            self._load(conn, rows)
+                        except conn.dialect.dbapi.IntegrityError as e:
+                            raise ValueError(f"Another import of {path} is inserting the same rows: {e}") from e
+                chunks += 1
+                checkpoint["rows"] = first_row - 1 + len(records)
+                checkpoint["imported"] += len(rows)
+                checkpoint["duplicates"] += valid - len(rows)
+                checkpoint["rejected"] += len(errors)
+                for row, message in errors:
+                    if reject_writer:
+                        reject_writer.writerow([row, message])
+                    if len(reported) < MAX_REPORTED_ERRORS:
+                        reported.append({"row": row, "error": message})
+                if not dry_run:
+                    self._write_checkpoint(checkpoint_path, checkpoint)
+                logger.info(f"Import of {path}: {checkpoint['rows']} records read, {checkpoint['imported']} "
+                            f"{'valid' if dry_run else 'imported'}, {checkpoint['duplicates']} duplicates, "
+                            f"{checkpoint['rejected']} rejected")
+
+            records: List[dict] = []
+            first_row = skip + 1
+            for number, record in enumerate(read_records(path, fmt), start=1):
+                if number <= skip:
+                    continue
+                records.append(record)
+                if len(records) >= chunk_size:
+                    flush(records, first_row)
+                    first_row += len(records)
+                    records = []
+            if records:
+                flush(records, first_row)
+        finally:
+            if rejects:
+                rejects.close()
+
+        checkpoint["completed"] = True
+        if not dry_run:
+            self._write_checkpoint(checkpoint_path, checkpoint)
+            if checkpoint["imported"]:
+                from app.services.read_model import read_model
+                from app.services.snapshot_service import snapshot_publisher
+                read_model.invalidate()
+                db = SessionLocal()
+                try:
+                    snapshot_publisher.schedule(db, commit=True)
+                finally:
+                    db.close()
+
+        seconds = time.perf_counter() - started
+        processed = checkpoint["rows"] - skip
+        return {
+            "input": path,
+            "format": fmt,
+            "dry_run": dry_run,
+            "rows": checkpoint["rows"],
+            "skipped": skip,
+            # A dry run counts the rows that would be imported
+            "valid" if dry_run else "imported": checkpoint["imported"],
+            "duplicates": checkpoint["duplicates"],
+            "rejected": checkpoint["rejected"],
+            "chunks": chunks,
+            "seconds": round(seconds, 2),
+            "rows_per_second": round(processed / seconds) if seconds > 0 else 0,
+            "errors": reported,
+        }
+
+
+# Create import service instance
+import_service = ImportService()
@@ -0,0 +1,426 @@
+"""
+Background jobs.
+
+Jobs are rows in the ``jobs`` table. ``job_service.enqueue`` adds one in the
+caller's session, so follow-up work is only scheduled if the request's own
+write commits. Each API process runs a ``JobRunner`` thread that claims due
+jobs under a lease, renews the lease with a heartbeat while the handler runs
+and records the outcome. If a runner dies its leases expire and another
+runner picks the jobs up again, so handlers must be idempotent.
+
+Handlers are registered with ``@job_handler("type")`` in the modules listed
+in ``HANDLER_MODULES`` and run on a thread pool; CPU-heavy steps go to a
+process pool through ``JobContext.run_cpu``. Failures are retried with
+exponential backoff until the job's ``max_attempts``. Per-type concurrency
+limits count running jobs across all runners; on PostgreSQL claims are
+serialized with an advisory lock so the limits are exact, on SQLite
+concurrent runners may briefly exceed them. Runners delete succeeded and
+failed jobs once they are ``job_retention_days`` old.
+"""
+import importlib
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.metrics import job_duration
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Modules whose @job_handler registrations the runner loads on start
+HANDLER_MODULES = (
+    "app.services.hotspot_service",
+    "app.services.partition_service",
+    "app.services.photo_service",
+    "app.services.snapshot_service",
+)
+
+MAX_ERROR_LENGTH = 2000
+
+# Advisory lock key serializing job claims on PostgreSQL
+CLAIM_LOCK_ID = 7_262_732
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobSpec:
+    """A registered job type."""
+
+    __slots__ = ("type", "func", "concurrency", "max_attempts", "priority")
+
+    def __init__(self, job_type: str, func: Callable, concurrency: int, max_attempts: int, priority: int):
+        self.type = job_type
+        self.func = func
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.priority = priority
+
+
+_handlers: Dict[str, JobSpec] = {}
+
+
+def job_handler(job_type: str, concurrency: int = 1, max_attempts: int = 5, priority: int = 0):
+    """Register func(payload, context) as the handler for job_type.
+
+    concurrency caps how many jobs of this type run at once across all
+    runners; the return value (JSON-serializable) is stored as the result.
+    """
+    def decorator(func):
+        _handlers[job_type] = JobSpec(job_type, func, concurrency, max_attempts, priority)
+        return func
+    return decorator
+
+
+def load_handlers() -> Dict[str, JobSpec]:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    return _handlers
+
+
+class JobContext:
+    """Passed to handlers: job metadata and access to the process pool."""
+
+    def __init__(self, runner: "JobRunner", job_id: str, attempt: int):
+        self.job_id = job_id
+        self.attempt = attempt
+        self._runner = runner
+
+    def run_cpu(self, func: Callable, *args) -> Any:
+        """Run a picklable, module-level function in the process pool and wait for it."""
+        return self._runner.process_pool().submit(func, *args).result()
+
+
+class JobService:
+    """Enqueueing and inspection of jobs."""
+
+    def __init__(self):
+        # Set by enqueue so a runner in this process doesn't wait a full poll interval
+        self.wakeup = threading.Event()
+
+    def enqueue(
+        self,
+        db: Session,
+        job_type: str,
+        payload: Optional[dict] = None,
+        priority: Optional[int] = None,
+        delay_seconds: float = 0,
+        max_attempts: Optional[int] = None,
+        commit: bool = True
+    ) -> Job:
+        """Add a job; with commit=False it is committed with the caller's transaction."""
+        spec = _handlers.get(job_type)
+        job = Job(
+            type=job_type,
+            payload=payload or {},
+            status=Job.QUEUED,
+            priority=priority if priority is not None else (spec.priority if spec else 0),
+            attempts=0,
+            max_attempts=max_attempts or (spec.max_attempts if spec else 5),
+            run_at=_utcnow() + timedelta(seconds=delay_seconds),
+        )
+        db.add(job)
+        if commit:
+            db.commit()
+        self.wakeup.set()
+        return job
+
+    @staticmethod
+    def runs_in_process() -> bool:
+        """True when this process runs a job runner (never on Lambda, where lazy_init is set)."""
+        return settings.jobs_enabled and not settings.lazy_init
+
+    @staticmethod
+    def get_job(db: Session, job_id: str) -> Optional[Job]:
+        return db.query(Job).filter(Job.id == job_id).first()
+
+    @staticmethod
+    def get_jobs(
+        db: Session,
+        status: Optional[str] = None,
+        job_type: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Job]:
+        """Most recent jobs, optionally filtered by status and type."""
+        query = db.query(Job)
+        if status:
+            query = query.filter(Job.status == status)
+        if job_type:
+            query = query.filter(Job.type == job_type)
+        return query.order_by(Job.created_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def delete_finished(older_than: timedelta, batch_size: int = 1000) -> int:
+        """Delete succeeded and failed jobs finished before older_than ago, in short batches."""
+        cutoff = _utcnow() - older_than
+        deleted = 0
+        while True:
+            with get_engine().begin() as conn:
+                batch = select(Job.id).where(
+                    Job.status.in_((Job.SUCCEEDED, Job.FAILED)), Job.finished_at < cutoff
+                ).limit(batch_size)
+                count = conn.execute(delete(Job).where(Job.id.in_(batch))).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+    @staticmethod
+    def get_counts(db: Session) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per type and status."""
+        counts: Dict[str, Dict[str, int]] = {}
+        rows = db.query(Job.type, Job.status, func.count(Job.id)).group_by(Job.type, Job.status)
+        for job_type, status, count in rows:
+            counts.setdefault(job_type, {})[status] = count
+        return counts
+
+
+class JobRunner:
+    """Claims and executes jobs in a background thread."""
+
+    def __init__(self):
+        # Set when the runner starts: the instance is created at import, and with
+        # a preloaded app every forked worker would otherwise share the same id
+        self.worker_id: Optional[str] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._running: Dict[str, str] = {}  # job id -> type
+        self._threads: List[threading.Thread] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._next_cleanup = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._threads)
+
+    @staticmethod
+    def _new_worker_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self) -> None:
+        """Start the claim loop and heartbeat threads."""
+        if self._threads:
+            return
+        load_handlers()
+        self.worker_id = self._new_worker_id()
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(max_workers=settings.job_workers, thread_name_prefix="job")
+        self._threads = [
+            threading.Thread(target=self._claim_loop, name="job-runner", daemon=True),
+            threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Job runner {self.worker_id} started for: {', '.join(sorted(_handlers))}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming and wait up to timeout for running jobs.
+
+        Jobs still running afterwards are picked up by another runner once
+        their lease expires.
+        """
+        if not self._threads:
+            return
+        self._stopping.set()
+        job_service.wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self._running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        self._threads = []
+        logger.info(f"Job runner {self.worker_id} stopped")
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        """Process pool for CPU-bound work, created on first use."""
+        with self._lock:
+            if self._process_pool is None:
+                # forkserver children don't inherit this process's threads or DB connections
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=settings.job_process_workers or None,
+                    mp_context=multiprocessing.get_context(method)
+                )
+            return self._process_pool
+
+    def run_until_idle(self, timeout: float = 60.0) -> None:
+        """Process due jobs in the calling thread until none are left (CLI and scripts)."""
+        load_handlers()
+        if not self._threads:
+            self.worker_id = self._new_worker_id()
+        self._executor = self._executor or ThreadPoolExecutor(max_workers=settings.job_workers, thread_name_prefix="job")
+        self._cleanup()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._claim() and not self._running:
+                break
+            time.sleep(0.05)
+
+    def _claim_loop(self) -> None:
+        while not self._stopping.is_set():
+            self._cleanup()
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming jobs: {e}")
+                claimed = 0
+            if not claimed:
+                job_service.wakeup.wait(settings.job_poll_interval)
+                job_service.wakeup.clear()
+
+    def _cleanup(self) -> None:
+        """Delete old finished jobs every job_cleanup_interval so the table doesn't grow forever."""
+        if not settings.job_retention_days or time.monotonic() < self._next_cleanup:
+            return
+        self._next_cleanup = time.monotonic() + settings.job_cleanup_interval
+        try:
+            deleted = job_service.delete_finished(timedelta(days=settings.job_retention_days))
+            if deleted:
+                logger.info(f"Deleted {deleted} finished jobs older than {settings.job_retention_days:g} days")
+        except Exception as e:
+            logger.error(f"Error deleting finished jobs: {e}")
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stopping.wait(settings.job_lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._running)
+            if not job_ids:
+                continue
+            now = _utcnow()
+            try:
+                with get_engine().begin() as conn:
+                    conn.execute(
+                        update(Job)
+                        .where(Job.id.in_(job_ids), Job.locked_by == self.worker_id, Job.status == Job.RUNNING)
+                        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=settings.job_lease_seconds))
+                    )
+            except Exception as e:
+                logger.error(f"Error renewing job leases: {e}")
+
+    def _claim(self) -> int:
+        """Claim as many due jobs as there are free slots; returns the number claimed."""
+        with self._lock:
+            free = settings.job_workers - len(self._running)
+        if free <= 0 or not _handlers:
+            return 0
+
+        now = _utcnow()
+        claimed = 0
+        with get_engine().begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # Serialize claims so concurrency limits hold across runners;
+                # released when this short transaction commits
+                conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": CLAIM_LOCK_ID})
+            running = dict(conn.execute(
+                select(Job.type, func.count(Job.id))
+                .where(Job.status == Job.RUNNING, Job.lease_expires_at >= now)
+                .group_by(Job.type)
+            ).all())
+            due = or_(
+                and_(Job.status == Job.QUEUED, Job.run_at <= now),
+                and_(Job.status == Job.RUNNING, Job.lease_expires_at < now),
+            )
+            available = [spec.type for spec in _handlers.values() if running.get(spec.type, 0) < spec.concurrency]
+            if not available:
+                return 0
+            candidates = conn.execute(
+                select(Job.id, Job.type, Job.status, Job.attempts, Job.max_attempts, Job.payload)
+                .where(due, Job.type.in_(available))
+                .order_by(Job.priority.desc(), Job.run_at)
+                .limit(free * 4)
+            ).all()
+
+            for job in candidates:
+                if claimed >= free:
+                    break
+                spec = _handlers[job.type]
+                if running.get(job.type, 0) >= spec.concurrency:
+                    continue
+                if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                    # The runner died on the last attempt
+                    conn.execute(
+                        update(Job)
+                        .where(Job.id == job.id, Job.status == Job.RUNNING, Job.lease_expires_at < now)
+                        .values(status=Job.FAILED, finished_at=now, locked_by=None,
+                                last_error="Lease expired on the final attempt")
+                    )
+                    continue
+                result = conn.execute(
+                    update(Job)
+                    .where(Job.id == job.id, Job.status == job.status, Job.attempts == job.attempts)
+                    .values(
+                        status=Job.RUNNING,
+                        locked_by=self.worker_id,
+                        attempts=job.attempts + 1,
+                        started_at=now,
+                        heartbeat_at=now,
+                        lease_expires_at=now + timedelta(seconds=settings.job_lease_seconds),
+                    )
+                )
+                if result.rowcount != 1:
+                    continue  # another runner got it first
+                running[job.type] = running.get(job.type, 0) + 1
+                with self._lock:
+                    self._running[job.id] = job.type
+                self._executor.submit(self._execute, spec, job.id, job.payload, job.attempts + 1)
+                claimed += 1
+        return claimed
+
+    def _execute(self, spec: JobSpec, job_id: str, payload: dict, attempt: int) -> None:
+        start = time.perf_counter()
+        try:
+            result = spec.func(payload, JobContext(self, job_id, attempt))
+            self._finish(job_id, status=Job.SUCCEEDED, result=result, finished_at=_utcnow(), last_error=None)
+            outcome = "succeeded"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:MAX_ERROR_LENGTH]
+            with get_engine().connect() as conn:
+                max_attempts = conn.execute(select(Job.max_attempts).where(Job.id == job_id)).scalar()
+            if max_attempts is not None and attempt < max_attempts:
+                delay = min(settings.job_retry_max_seconds, settings.job_retry_base_seconds * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                self._finish(job_id, status=Job.QUEUED, run_at=_utcnow() + timedelta(seconds=delay), last_error=error)
+                logger.warning(f"Job {spec.type} {job_id} failed (attempt {attempt}), retrying in {delay:.0f}s: {error}")
+                outcome = "retried"
+            else:
+                self._finish(job_id, status=Job.FAILED, finished_at=_utcnow(), last_error=error)
+                logger.error(f"Job {spec.type} {job_id} failed after {attempt} attempts: {error}")
+                outcome = "failed"
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+        job_duration.observe(spec.type, outcome, value=time.perf_counter() - start)
+
+    def _finish(self, job_id: str, **values) -> None:
+        """Record the outcome, unless the lease was lost to another runner meanwhile."""
+        with get_engine().begin() as conn:
+            result = conn.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id, Job.status == Job.RUNNING)
+                .values(locked_by=None, lease_expires_at=None, **values)
+            )
+        if result.rowcount != 1:
+            logger.warning(f"Job {job_id} lease was lost before it finished; outcome discarded")
+
+
+# Create service instances
+job_service = JobService()
+job_runner = JobRunner()
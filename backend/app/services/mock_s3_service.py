@@ -1,14 +1,24 @@
 """
 Mock S3 service for local development without AWS credentials
 """
+import hashlib
+import json
 import os
+import re
+import shutil
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 import logging
+from app.core.metrics import track_s3
 
 logger = logging.getLogger(__name__)
 
+# S3 rejects multipart uploads whose parts (other than the last) are smaller
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_NUMBER = 10000
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
 class MockS3Service:
     """Mock S3 service for local development."""
     
@@ -34,6 +44,7 @@ class MockS3Service:
         
         return s3_key
     
+    @track_s3("generate_presigned_url")
     def generate_presigned_url(
         self, 
         s3_key: str, 
@@ -52,11 +63,162 @@ class MockS3Service:
         mock_public_url = f"http://localhost:8000/api/v1/mock-photos/{s3_key.replace('/', '_')}"
         return mock_public_url
     
+    @track_s3("delete_object")
     def delete_object(self, s3_key: str) -> bool:
         """Mock delete operation."""
         logger.info(f"Mock delete operation for: {s3_key}")
         return True
     
+    @track_s3("put_object")
+    def put_object(
+        self,
+        s3_key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        content_encoding: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> None:
+        """Store an object in local storage (headers are not kept)."""
+        file_path = os.path.join(self.local_storage_path, s3_key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+    
+    @track_s3("get_object")
+    def get_object(self, s3_key: str) -> bytes:
+        """Read an object from local storage."""
+        file_path = os.path.join(self.local_storage_path, s3_key)
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ValueError(f"Object not found: {s3_key}")
+    
+    @track_s3("list_objects")
+    def list_objects(self, prefix: str) -> List[str]:
+        """List object keys under a prefix in local storage."""
+        keys = []
+        root = os.path.join(self.local_storage_path, prefix)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                keys.append(os.path.relpath(path, self.local_storage_path).replace(os.sep, '/'))
+        return sorted(keys)
+    
+    def arrow_filesystem(self):
+        """pyarrow filesystem and path prefix for reading objects as a dataset."""
+        from pyarrow import fs
+
+        return fs.LocalFileSystem(), os.path.abspath(self.local_storage_path) + "/"
+    
+    def _upload_dir(self, upload_id: str) -> str:
+        """Directory holding the parts of a multipart upload."""
+        if not _UPLOAD_ID.match(upload_id):
+            raise ValueError("Unknown upload ID")
+        path = os.path.join(self.local_storage_path, ".multipart", upload_id)
+        if not os.path.isdir(path):
+            raise ValueError("Unknown upload ID")
+        return path
+    
+    def _check_upload(self, s3_key: str, upload_id: str) -> str:
+        upload_dir = self._upload_dir(upload_id)
+        with open(os.path.join(upload_dir, "upload.json")) as f:
+            if json.load(f)["s3_key"] != s3_key:
+                raise ValueError("Upload ID does not match the S3 key")
+        return upload_dir
+    
+    @track_s3("create_multipart_upload")
+    def create_multipart_upload(self, s3_key: str, content_type: str) -> str:
+        """Start a local multipart upload; parts are kept until completion."""
+        upload_id = uuid.uuid4().hex
+        upload_dir = os.path.join(self.local_storage_path, ".multipart", upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, "upload.json"), 'w') as f:
+            json.dump({"s3_key": s3_key, "content_type": content_type}, f)
+        return upload_id
+    
+    @track_s3("generate_presigned_part_url")
+    def generate_presigned_part_url(
+        self,
+        s3_key: str,
+        upload_id: str,
+        part_number: int,
+        expires_in: int = 3600
+    ) -> str:
+        """Generate a mock part upload URL pointing at the mock part endpoint."""
+        return f"http://localhost:8000/api/v1/mock-upload-part/{upload_id}/{part_number}"
+    
+    @track_s3("upload_part")
+    def upload_part(self, upload_id: str, part_number: int, data: bytes) -> str:
+        """Store one part and return its ETag (quoted MD5, like S3)."""
+        if not 1 <= part_number <= MAX_PART_NUMBER:
+            raise ValueError(f"Part number must be between 1 and {MAX_PART_NUMBER}")
+        upload_dir = self._upload_dir(upload_id)
+        # Write to a temporary file first so an interrupted upload never
+        # leaves a truncated part behind
+        part_path = os.path.join(upload_dir, f"{part_number:05d}.part")
+        with open(part_path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(part_path + ".tmp", part_path)
+        return f'"{hashlib.md5(data).hexdigest()}"'
+    
+    @track_s3("list_parts")
+    def list_parts(self, s3_key: str, upload_id: str) -> List[Dict]:
+        """List the parts uploaded so far as dicts with part_number, etag and size."""
+        upload_dir = self._check_upload(s3_key, upload_id)
+        parts = []
+        for filename in sorted(os.listdir(upload_dir)):
+            if not filename.endswith(".part"):
+                continue
+            with open(os.path.join(upload_dir, filename), 'rb') as f:
+                data = f.read()
+            parts.append({
+                "part_number": int(filename[:-len(".part")]),
+                "etag": f'"{hashlib.md5(data).hexdigest()}"',
+                "size": len(data),
+            })
+        return parts
+    
+    @track_s3("complete_multipart_upload")
+    def complete_multipart_upload(
+        self,
+        s3_key: str,
+        upload_id: str,
+        parts: List[Dict]
+    ) -> None:
+        """Concatenate the parts in order into the final object."""
+        upload_dir = self._check_upload(s3_key, upload_id)
+        uploaded = {part["part_number"]: part for part in self.list_parts(s3_key, upload_id)}
+        if not parts:
+            raise ValueError("No parts have been uploaded")
+        
+        parts = sorted(parts, key=lambda part: part["part_number"])
+        for index, part in enumerate(parts):
+            stored = uploaded.get(part["part_number"])
+            if stored is None or stored["etag"].strip('"') != part["etag"].strip('"'):
+                raise ValueError(f"Part {part['part_number']} is missing or does not match its ETag")
+            if index < len(parts) - 1 and stored["size"] < MIN_PART_SIZE:
+                raise ValueError(f"Part {part['part_number']} is smaller than the 5 MiB minimum")
+        
+        file_path = os.path.join(self.local_storage_path, s3_key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as output:
+            for part in parts:
+                with open(os.path.join(upload_dir, f"{part['part_number']:05d}.part"), 'rb') as f:
+                    shutil.copyfileobj(f, output)
+        shutil.rmtree(upload_dir)
+        logger.info(f"Mock multipart upload completed: {s3_key}")
+    
+    @track_s3("abort_multipart_upload")
+    def abort_multipart_upload(self, s3_key: str, upload_id: str) -> bool:
+        """Discard the parts of a local multipart upload."""
+        try:
+            shutil.rmtree(self._check_upload(s3_key, upload_id))
+            return True
+        except ValueError:
+            return False
+    
+    @track_s3("check_bucket_exists")
     def check_bucket_exists(self) -> bool:
         """Mock bucket check - always returns True for local testing."""
         return True
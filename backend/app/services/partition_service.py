@@ -0,0 +1,83 @@
+"""
+Keeps monthly partitions of the photos table created ahead of time.
+
+Rows whose month has no partition land in ``photos_default``, where every
+query on ``created_at`` has to scan them and creating the month's partition
+later means moving them. Job runners therefore schedule a recurring
+``partitions.ensure`` job that creates the partitions for the current month
+and the next ``settings.partition_months_ahead`` months, like the hotspot
+detection schedule. ``python -m app.cli partitions`` does the same once.
+Nothing is scheduled on databases other than PostgreSQL.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.core.partitions import add_months, ensure_partitions, month_start
+from app.models.job import Job
+from app.services.job_service import job_handler, job_service
+
+logger = logging.getLogger(__name__)
+
+ENSURE_JOB = "partitions.ensure"
+
+
+class PartitionService:
+    """Creates upcoming monthly partitions and schedules doing so."""
+
+    @staticmethod
+    def ensure_upcoming(months_ahead: Optional[int] = None) -> List[str]:
+        """Create partitions from the current month to months_ahead months later."""
+        months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+        current = month_start(datetime.now(timezone.utc))
+        with get_engine().begin() as conn:
+            return ensure_partitions(conn, current, add_months(current, months_ahead))
+
+    @staticmethod
+    def schedule(db: Session, delay_seconds: float = 0, include_running: bool = True) -> bool:
+        """Queue a run unless one is already queued (or running); returns whether one was queued."""
+        statuses = [Job.QUEUED, Job.RUNNING] if include_running else [Job.QUEUED]
+        pending = db.query(Job.id).filter(Job.type == ENSURE_JOB, Job.status.in_(statuses)).first()
+        if pending is not None:
+            return False
+        job_service.enqueue(db, ENSURE_JOB, delay_seconds=delay_seconds)
+        return True
+
+    def ensure_scheduled(self) -> None:
+        """Start the schedule if no run is pending (called when job runners start)."""
+        db = SessionLocal()
+        try:
+            if self.schedule(db):
+                logger.info("Scheduled partition maintenance")
+        finally:
+            db.close()
+
+
+# Create service instance
+partition_service = PartitionService()
+
+
+def start_partition_schedule() -> None:
+    """Start the schedule on PostgreSQL; called wherever a job runner starts."""
+    if get_engine().dialect.name != "postgresql":
+        return
+    try:
+        partition_service.ensure_scheduled()
+    except Exception as e:
+        logger.error(f"Could not schedule partition maintenance: {e}")
+
+
+@job_handler(ENSURE_JOB, concurrency=1, max_attempts=3)
+def ensure_partitions_job(payload: dict, context) -> dict:
+    """Queue the next run, then create the upcoming partitions."""
+    db = SessionLocal()
+    try:
+        # This run counts as running, so only a queued run means the next one is taken care of
+        partition_service.schedule(db, delay_seconds=settings.partition_interval_seconds, include_running=False)
+    finally:
+        db.close()
+    return {"partitions": partition_service.ensure_upcoming()}
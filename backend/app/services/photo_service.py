@@ -1,9 +1,16 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple, Union
+from app.core.config import settings
+from app.core.geo import morton_ranges
 from app.models.photo import Photo
 from app.schemas.photo import PhotoCreate, PhotoUpdate, PhotoFilter
+from app.services.archive_service import archive_service
+from app.services.job_service import job_handler, job_service
+from app.services.read_model import read_model
 from app.services.s3_service import s3_service
+from app.services.snapshot_service import snapshot_publisher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,10 +34,12 @@ class PhotoService:
                 longitude=photo_data.longitude
             )
             
-            # Add to database
+            # Add to database; the snapshot publish is queued in the same transaction
             db.add(db_photo)
+            snapshot_publisher.schedule(db)
             db.commit()
             db.refresh(db_photo)
+            read_model.invalidate()
             
             logger.info(f"Created photo with ID: {db_photo.id}")
             return db_photo
@@ -40,6 +49,29 @@ class PhotoService:
             logger.error(f"Error creating photo: {e}")
             raise ValueError(f"Failed to create photo: {str(e)}")
     
+    @staticmethod
+    def _apply_filters(query, filters: PhotoFilter):
+        """Apply the description and viewport filters."""
+        if filters.description:
+            # Case-insensitive substring search; % and _ are matched literally,
+            # as by the read model and the archive
+            query = query.filter(
+                func.lower(Photo.description).contains(filters.description.lower(), autoescape=True)
+            )
+        
+        viewport = filters.viewport_e6()
+        if viewport:
+            min_lat, min_lng, max_lat, max_lng = viewport
+            # The Morton ranges let idx_photos_geo_key prefilter; the exact
+            # bounds are checked on the coordinates
+            ranges = morton_ranges(min_lat, min_lng, max_lat, max_lng)
+            query = query.filter(
+                or_(*(Photo.geo_key.between(low, high) for low, high in ranges)),
+                Photo.lat_e6.between(min_lat, max_lat),
+                Photo.lng_e6.between(min_lng, max_lng)
+            )
+        return query
+    
     @staticmethod
     def get_photo(db: Session, photo_id: str) -> Optional[Photo]:
         """Get a photo by ID."""
@@ -48,18 +80,24 @@ class PhotoService:
     @staticmethod
     def get_photos(
         db: Session, 
-        filters: PhotoFilter
-    ) -> List[Photo]:
-        """Get photos with optional filtering."""
-        query = db.query(Photo)
+        filters: PhotoFilter,
+        use_read_model: bool = False
+    ) -> List[Union[Photo, dict]]:
+        """Get photos with optional filtering.
         
-        # Apply description filter if provided
-        if filters.description:
-            # Case-insensitive search in description
-            search_term = f"%{filters.description.lower()}%"
-            query = query.filter(
-                func.lower(Photo.description).like(search_term)
+        With use_read_model the shared snapshot answers when it is fresh.
+        """
+        if filters.include_archived:
+            return PhotoService._get_photos_with_archive(db, filters)
+        
+        if use_read_model and settings.read_model_enabled:
+            photos = read_model.get_photos(
+                filters.description, filters.offset, filters.limit, filters.viewport_e6()
             )
+            if photos is not None:
+                return photos
+        
+        query = PhotoService._apply_filters(db.query(Photo), filters)
         
         # Order by creation date (newest first)
         query = query.order_by(Photo.created_at.desc())
@@ -69,6 +107,25 @@ class PhotoService:
         
         return query.all()
     
+    @staticmethod
+    def _get_photos_with_archive(db: Session, filters: PhotoFilter) -> List[Union[Photo, dict]]:
+        """Page through live photos, then archived ones (always older)."""
+        live_filters = filters.copy(update={"include_archived": False})
+        live_count = PhotoService.get_photos_count(db, live_filters)
+        
+        photos = []
+        if filters.offset < live_count:
+            photos = PhotoService.get_photos(db, live_filters)
+        remaining = filters.limit - len(photos)
+        if remaining > 0:
+            photos.extend(archive_service.get_photos(
+                description=filters.description,
+                offset=max(0, filters.offset - live_count),
+                limit=remaining,
+                viewport=filters.viewport_e6()
+            ))
+        return photos
+    
     @staticmethod
     def update_photo(
         db: Session, 
@@ -86,8 +143,10 @@ class PhotoService:
             for field, value in update_data.items():
                 setattr(db_photo, field, value)
             
+            snapshot_publisher.schedule(db)
             db.commit()
             db.refresh(db_photo)
+            read_model.invalidate()
             
             logger.info(f"Updated photo with ID: {photo_id}")
             return db_photo
@@ -105,12 +164,18 @@ class PhotoService:
             if not db_photo:
                 return False
             
-            # Delete from S3
-            s3_service.delete_object(db_photo.s3_key)
-            
-            # Delete from database
+            # Delete from database; a job with retries removes the S3 object
+            # where a runner picks it up, otherwise it is deleted right away
+            s3_key = db_photo.s3_key
+            queue_delete = job_service.runs_in_process()
             db.delete(db_photo)
+            if queue_delete:
+                job_service.enqueue(db, "photo.delete_object", {"s3_key": s3_key}, commit=False)
+            snapshot_publisher.schedule(db)
             db.commit()
+            read_model.invalidate(deleted=True)
+            if not queue_delete and not s3_service.delete_object(s3_key):
+                logger.warning(f"Photo {photo_id} deleted but its object {s3_key} was not")
             
             logger.info(f"Deleted photo with ID: {photo_id}")
             return True
@@ -121,17 +186,52 @@ class PhotoService:
             return False
     
     @staticmethod
-    def get_photos_count(db: Session, filters: PhotoFilter) -> int:
-        """Get total count of photos matching filters."""
-        query = db.query(func.count(Photo.id))
+    def get_changes(
+        db: Session,
+        since: datetime,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> Tuple[List[Photo], bool]:
+        """Photos updated at or after since, oldest change first, and whether more follow.
         
-        if filters.description:
-            search_term = f"%{filters.description.lower()}%"
-            query = query.filter(
-                func.lower(Photo.description).like(search_term)
-            )
+        With after_id, rows updated exactly at since are skipped up to and including that ID.
+        """
+        since = since.astimezone(timezone.utc) if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        updated_at, since_value = Photo.updated_at, since
+        if db.get_bind().dialect.name == "sqlite":
+            # SQLite stores CURRENT_TIMESTAMP defaults without fractional seconds,
+            # so compare the times as numbers rather than as strings
+            updated_at, since_value = func.julianday(Photo.updated_at), func.julianday(since.replace(tzinfo=None))
+        query = db.query(Photo)
+        if after_id:
+            query = query.filter(or_(
+                updated_at > since_value,
+                and_(updated_at == since_value, Photo.id > after_id)
+            ))
+        else:
+            query = query.filter(updated_at >= since_value)
+        photos = query.order_by(updated_at, Photo.id).limit(limit + 1).all()
+        return photos[:limit], len(photos) > limit
+    
+    @staticmethod
+    def get_photos_count(db: Session, filters: PhotoFilter, use_read_model: bool = False) -> int:
+        """Get total count of photos matching filters."""
+        if use_read_model and settings.read_model_enabled and not filters.include_archived:
+            count = read_model.count_photos(filters.description, filters.viewport_e6())
+            if count is not None:
+                return count
         
-        return query.scalar()
+        query = PhotoService._apply_filters(db.query(func.count(Photo.id)), filters)
+        count = query.scalar()
+        if filters.include_archived:
+            count += archive_service.count_photos(filters.description, filters.viewport_e6())
+        return count
+
+@job_handler("photo.delete_object", concurrency=4, max_attempts=8)
+def delete_photo_object(payload: dict, context) -> None:
+    """Delete a removed photo's object from storage."""
+    if not s3_service.delete_object(payload["s3_key"]):
+        raise ValueError(f"Failed to delete {payload['s3_key']}")
 
 # Create service instance
 photo_service = PhotoService()
\ No newline at end of file
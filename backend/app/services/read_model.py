@@ -0,0 +1,568 @@
+"""
+Memory-mapped read model for photo listings.
+
+A snapshot of the photos table is kept as column files (NumPy arrays plus
+byte blobs with offsets) under ``settings.read_model_path``, sorted newest
+first. Every worker process maps the same files, so the operating system
+shares one copy of the pages between them.
+
+One process per host refreshes the snapshot (whichever holds the lock
+file). A generation is a base segment (a full copy of the table) plus a
+delta segment holding the rows added or updated since the base was built;
+readers hide the base rows the delta replaces and merge the two in order.
+New and updated rows are fetched by ``updated_at`` and only the delta is
+rewritten, so a refresh costs the number of changed rows. The whole table
+is reloaded when the row count shows rows were deleted or archived, after
+a delete on this host, when the delta outgrows
+``read_model_max_delta_rows`` and every ``read_model_full_refresh_seconds``.
+Segments are written to new directories, then ``current.json`` is
+atomically replaced and readers switch on their next check.
+
+``get_photos`` and ``count_photos`` return None when the snapshot is
+missing, older than ``read_model_max_staleness_seconds`` or predates a
+write made on this host (see ``invalidate``); callers then use the database.
+"""
+import fcntl
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.metrics import record_cache
+from app.models.photo import Photo
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "current.json"
+LOCK_FILE = "refresh.lock"
+# Touched after every write on this host; readers fall back to the database until the next refresh
+DIRTY_FILE = "dirty"
+# Touched after deletes; the next refresh reloads everything
+DELETED_FILE = "deleted"
+COUNT_CACHE_SIZE = 256
+# Rows masked in the first step of a viewport listing
+VIEWPORT_CHUNK = 8192
+
+Viewport = Tuple[int, int, int, int]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SNAPSHOT_COLUMNS = (Photo.id, Photo.s3_url, Photo.description, Photo.lat_e6, Photo.lng_e6, Photo.created_at, Photo.updated_at)
+# Variable-length columns: blob file, offsets file, separator after each value
+_BLOBS = (
+    ("urls", "url_offsets", b""),
+    ("descriptions", "description_offsets", b""),
+    # Lowercased descriptions for search; the NUL keeps matches inside one row
+    ("search", "search_offsets", b"\0"),
+)
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _in_viewport(lat, lng, viewport: Viewport):
+    min_lat, min_lng, max_lat, max_lng = viewport
+    return (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+
+
+class Segment:
+    """Column files of one directory, sorted newest first."""
+
+    def __init__(self, directory: str):
+        import numpy as np
+
+        self.directory = directory
+        self._id_index: Optional[Dict[str, int]] = None
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._counts_lock = threading.Lock()
+
+        def array(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        def blob(name):
+            with open(os.path.join(directory, f"{name}.bin"), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.ids = array("ids")
+        self.lat_e6 = array("lat_e6")
+        self.lng_e6 = array("lng_e6")
+        self.created_us = array("created_us")
+        self.updated_us = array("updated_us")
+        self.url_offsets = array("url_offsets")
+        self.description_offsets = array("description_offsets")
+        self.search_offsets = array("search_offsets")
+        self.urls = blob("urls")
+        self.descriptions = blob("descriptions")
+        self.search = blob("search")
+        self.rows = len(self.ids)
+
+    def record(self, index: int) -> tuple:
+        """Row as (id, s3_url, description, lat_e6, lng_e6, created_us, updated_us)."""
+        return (
+            self.ids[index].decode(),
+            self.urls[int(self.url_offsets[index]):int(self.url_offsets[index + 1])].decode(),
+            self.descriptions[int(self.description_offsets[index]):int(self.description_offsets[index + 1])].decode(),
+            int(self.lat_e6[index]),
+            int(self.lng_e6[index]),
+            int(self.created_us[index]),
+            int(self.updated_us[index]),
+        )
+
+    def rows_at(self, indices: List[int]) -> List[dict]:
+        """Rows in the shape of PhotoResponse, gathered column by column."""
+        import numpy as np
+
+        indices = np.asarray(indices, dtype=np.int64)
+        url_starts, url_ends = self.url_offsets[indices].tolist(), self.url_offsets[indices + 1].tolist()
+        desc_starts, desc_ends = self.description_offsets[indices].tolist(), self.description_offsets[indices + 1].tolist()
+        urls, descriptions = self.urls, self.descriptions
+        return [
+            {
+                "id": photo_id.decode(),
+                "s3_url": urls[url_start:url_end].decode(),
+                "description": descriptions[desc_start:desc_end].decode(),
+                "latitude": lat_e6 / 1_000_000,
+                "longitude": lng_e6 / 1_000_000,
+                "created_at": _EPOCH + timedelta(microseconds=created_us),
+                "updated_at": _EPOCH + timedelta(microseconds=updated_us),
+            }
+            for photo_id, url_start, url_end, desc_start, desc_end, lat_e6, lng_e6, created_us, updated_us in zip(
+                self.ids[indices].tolist(), url_starts, url_ends, desc_starts, desc_ends,
+                self.lat_e6[indices].tolist(), self.lng_e6[indices].tolist(),
+                self.created_us[indices].tolist(), self.updated_us[indices].tolist()
+            )
+        ]
+
+    def id_index(self) -> Dict[str, int]:
+        if self._id_index is None:
+            self._id_index = {value.decode(): index for index, value in enumerate(self.ids.tolist())}
+        return self._id_index
+
+    def viewport_mask(self, viewport: Viewport, start: int = 0, end: Optional[int] = None):
+        return _in_viewport(self.lat_e6[start:end], self.lng_e6[start:end], viewport)
+
+    def matching(self, indices, description: Optional[str], viewport: Optional[Viewport]):
+        """The given row indices that match the filters."""
+        if viewport:
+            indices = indices[_in_viewport(self.lat_e6[indices], self.lng_e6[indices], viewport)]
+        if description:
+            term = description.lower().encode()
+            offsets = self.search_offsets
+            indices = indices[[term in self.search[int(offsets[i]):int(offsets[i + 1])] for i in indices.tolist()]]
+        return indices
+
+    def matches(self, description: Optional[str], viewport: Optional[Viewport], stop: Optional[int] = None) -> List[int]:
+        """Row indices (newest first) matching the filters, at most stop of them."""
+        import numpy as np
+
+        if not description:
+            if not viewport:
+                return list(range(min(stop, self.rows) if stop is not None else self.rows))
+            # Mask newest rows first in growing chunks until the page is filled
+            found, start, chunk = [], 0, VIEWPORT_CHUNK
+            while start < self.rows and (stop is None or len(found) < stop):
+                end = start + chunk if stop is not None else self.rows
+                found.extend((np.flatnonzero(self.viewport_mask(viewport, start, end)) + start).tolist())
+                start, chunk = end, chunk * 4
+            return found[:stop]
+
+        mask = self.viewport_mask(viewport) if viewport else None
+
+        # Rows are newest first, so the scan stops as soon as a page is
+        # filled. Match positions are mapped to rows in batches.
+        term = description.lower().encode()
+        batch = max(64, stop or 4096)
+        found, last_row = [], -1
+        position = self.search.find(term)
+        while position != -1 and (stop is None or len(found) < stop):
+            positions = []
+            while position != -1 and len(positions) < batch:
+                positions.append(position)
+                position = self.search.find(term, position + len(term))
+            rows = np.searchsorted(self.search_offsets, positions, side="right") - 1
+            # Several matches in one row are adjacent
+            keep = np.empty(len(rows), dtype=bool)
+            keep[0] = rows[0] != last_row
+            np.not_equal(rows[1:], rows[:-1], out=keep[1:])
+            last_row = int(rows[-1])
+            rows = rows[keep]
+            if mask is not None:
+                rows = rows[mask[rows]]
+            found.extend(rows.tolist())
+        return found[:stop]
+
+    def count(self, description: Optional[str], viewport: Optional[Viewport]) -> int:
+        if not description:
+            return int(self.viewport_mask(viewport).sum()) if viewport else self.rows
+        # Full scans for a term are cached per segment
+        key = (description.lower(), viewport)
+        with self._counts_lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+        record_cache("read_model_count", count is not None)
+        if count is None:
+            count = len(self.matches(description, viewport))
+            with self._counts_lock:
+                self._counts[key] = count
+                if len(self._counts) > COUNT_CACHE_SIZE:
+                    self._counts.popitem(last=False)
+        return count
+
+
+class Snapshot:
+    """One published generation: a base segment plus the rows changed since it was built.
+
+    Row indices below ``base.rows`` are base rows; delta rows follow them.
+    Base rows that have a newer version in the delta are hidden.
+    """
+
+    def __init__(self, path: str, manifest: dict, base: Optional[Segment] = None):
+        import numpy as np
+
+        self.generation = manifest["generation"]
+        self.rows = manifest["rows"]
+        directory = os.path.join(path, manifest["directory"])
+        # Generations that only add a delta keep the base mapped, with its count cache
+        self.base = base if base is not None and base.directory == directory else Segment(directory)
+        self.delta: Optional[Segment] = None
+        self.hidden = np.zeros(0, dtype=np.int64)
+        if manifest.get("delta"):
+            self.delta = Segment(os.path.join(path, manifest["delta"]))
+            self.hidden = np.load(os.path.join(path, manifest["delta"], "hidden.npy"))
+
+    def delta_records(self) -> List[tuple]:
+        return [self.delta.record(index) for index in range(self.delta.rows)] if self.delta else []
+
+    def rows_at(self, indices: List[int]) -> List[dict]:
+        """Rows in the shape of PhotoResponse."""
+        import numpy as np
+
+        indices = np.asarray(indices, dtype=np.int64)
+        in_delta = indices >= self.base.rows
+        if not in_delta.any():
+            return self.base.rows_at(indices)
+        rows = [None] * len(indices)
+        for positions, segment_rows in (
+            (np.flatnonzero(~in_delta), self.base.rows_at(indices[~in_delta])),
+            (np.flatnonzero(in_delta), self.delta.rows_at(indices[in_delta] - self.base.rows)),
+        ):
+            for position, row in zip(positions.tolist(), segment_rows):
+                rows[position] = row
+        return rows
+
+    def matches(self, description: Optional[str], viewport: Optional[Viewport], stop: Optional[int] = None) -> List[int]:
+        """Row indices (newest first) matching the filters, at most stop of them."""
+        import numpy as np
+
+        if self.delta is None:
+            return self.base.matches(description, viewport, stop)
+        base = np.asarray(self.base.matches(description, viewport, None if stop is None else stop + len(self.hidden)), dtype=np.int64)
+        base = base[np.isin(base, self.hidden, invert=True)]
+        delta = np.asarray(self.delta.matches(description, viewport, stop), dtype=np.int64)
+        if not len(delta):
+            return base[:stop].tolist()
+        # Merge the two newest-first lists on (created_us, id), the order segments are sorted in
+        created = np.concatenate([self.base.created_us[base], self.delta.created_us[delta]])
+        ids = np.concatenate([self.base.ids[base], self.delta.ids[delta]])
+        order = np.lexsort((ids, created))[::-1]
+        return np.concatenate([base, delta + self.base.rows])[order][:stop].tolist()
+
+    def count(self, description: Optional[str], viewport: Optional[Viewport]) -> int:
+        count = self.base.count(description, viewport)
+        if self.delta is None:
+            return count
+        return (
+            count
+            - len(self.base.matching(self.hidden, description, viewport))
+            + len(self.delta.matches(description, viewport))
+        )
+
+
+class ReadModel:
+    """Serves photo listings from the shared snapshot and keeps it refreshed."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.read_model_path
+        self._snapshot: Optional[Snapshot] = None
+        self._built_at = 0.0
+        self._dirty_at = 0.0
+        self._checked_at = 0.0
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+        self._watermark_us = 0
+
+    # Reading
+
+    def _current(self) -> Optional[Snapshot]:
+        """The snapshot if it is fresh enough to serve, else None."""
+        now = time.time()
+        if now - self._checked_at > settings.read_model_check_interval:
+            self._checked_at = now
+            self._dirty_at = max(self._dirty_at, _mtime(os.path.join(self.path, DIRTY_FILE)))
+            self._reload()
+        if self._snapshot is None:
+            return None
+        if now - self._built_at > settings.read_model_max_staleness_seconds or self._dirty_at >= self._built_at:
+            return None
+        return self._snapshot
+
+    def _reload(self) -> None:
+        """Map the current generation when current.json changed."""
+        manifest_path = os.path.join(self.path, MANIFEST)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with self._lock:
+            try:
+                manifest = self._load_manifest()
+                if self._snapshot is None or self._snapshot.generation != manifest["generation"]:
+                    base = self._snapshot.base if self._snapshot is not None else None
+                    self._snapshot = Snapshot(self.path, manifest, base)
+                self._built_at = manifest["built_at"]
+                self._manifest_mtime = mtime
+            except (OSError, TypeError, ValueError, KeyError) as e:
+                # The generation was replaced while loading; the next check retries
+                logger.warning(f"Could not load read model snapshot: {e}")
+
+    def get_photos(
+        self,
+        description: Optional[str],
+        offset: int,
+        limit: int,
+        viewport: Optional[Viewport] = None
+    ) -> Optional[List[dict]]:
+        """Newest photos matching the filters, or None to fall back to the database."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        indices = snapshot.matches(description, viewport, stop=offset + limit)
+        return snapshot.rows_at(indices[offset:offset + limit])
+
+    def count_photos(self, description: Optional[str], viewport: Optional[Viewport] = None) -> Optional[int]:
+        """Number of photos matching the filters, or None to fall back to the database."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+        return snapshot.count(description, viewport)
+
+    def invalidate(self, deleted: bool = False) -> None:
+        """Call after committing a write: readers on this host use the database until the next refresh."""
+        if not settings.read_model_enabled:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        for name in (DIRTY_FILE, DELETED_FILE) if deleted else (DIRTY_FILE,):
+            with open(os.path.join(self.path, name), "a"):
+                pass
+            os.utime(os.path.join(self.path, name))
+        self._dirty_at = time.time()
+
+    # Refreshing
+
+    def start(self) -> None:
+        """Start the background refresher thread."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="read-model", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(5)
+        self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _is_refresher(self) -> bool:
+        """Take the host-wide refresh lock; the kernel releases it if this process dies."""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.path, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _refresh_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self._is_refresher():
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Read model refresh failed: {e}")
+            self._stopping.wait(settings.read_model_refresh_interval)
+
+    def refresh(self, full: bool = False) -> dict:
+        """Bring the snapshot up to date, publishing a new generation if anything changed."""
+        import numpy as np
+
+        started = time.time()
+        os.makedirs(self.path, exist_ok=True)
+        previous = self._load_manifest()
+        self._reload()
+        snapshot = self._snapshot
+        full = (
+            full
+            or previous is None
+            or snapshot is None
+            or self._watermark_us == 0
+            or started - previous["full_at"] > settings.read_model_full_refresh_seconds
+            or _mtime(os.path.join(self.path, DELETED_FILE)) >= previous["full_at"]
+        )
+
+        with get_engine().connect() as conn:
+            if full:
+                fetched = conn.execute(select(*_SNAPSHOT_COLUMNS)).all()
+                total = len(fetched)
+            else:
+                total = conn.execute(select(func.count(Photo.id))).scalar()
+                # Overlap the watermark so rows committed late by long transactions are not missed
+                since = _from_micros(self._watermark_us) - timedelta(seconds=settings.read_model_refresh_overlap_seconds)
+                fetched = conn.execute(select(*_SNAPSHOT_COLUMNS).where(Photo.updated_at >= since)).all()
+
+        records = [
+            (row.id, row.s3_url, row.description, row.lat_e6, row.lng_e6,
+             _to_micros(row.created_at), _to_micros(row.updated_at))
+            for row in fetched
+        ]
+        generation = previous["generation"] + 1 if previous else 1
+        if full:
+            self._write_segment(f"gen-{generation}", records)
+            self._watermark_us = max((record[6] for record in records), default=0)
+            self._publish(dict(
+                generation=generation, directory=f"gen-{generation}", delta=None, rows=len(records),
+                built_at=started, full_at=started,
+            ), previous)
+            return {"rows": len(records), "changed": len(records), "full": True, "seconds": round(time.time() - started, 3)}
+
+        # Only the changed rows are written, as a delta next to the base
+        # segment; the next full refresh folds them in
+        base, delta = snapshot.base, {record[0]: record for record in snapshot.delta_records()}
+        index = base.id_index()
+
+        def current_updated_us(photo_id):
+            if photo_id in delta:
+                return delta[photo_id][6]
+            return int(base.updated_us[index[photo_id]]) if photo_id in index else None
+
+        changed = [record for record in records if current_updated_us(record[0]) != record[6]]
+        added = sum(record[0] not in delta and record[0] not in index for record in changed)
+        if snapshot.rows + added != total:
+            # Rows were deleted or archived, which updated_at can't show
+            return self.refresh(full=True)
+        if not changed:
+            self._write_manifest(dict(previous, built_at=started))
+            return {"rows": snapshot.rows, "changed": 0, "full": False, "seconds": round(time.time() - started, 3)}
+        delta.update((record[0], record) for record in changed)
+        if len(delta) > settings.read_model_max_delta_rows:
+            return self.refresh(full=True)
+
+        directory = f"delta-{generation}"
+        self._write_segment(directory, list(delta.values()))
+        hidden = np.array(sorted(index[photo_id] for photo_id in delta if photo_id in index), dtype=np.int64)
+        np.save(os.path.join(self.path, directory, "hidden.npy"), hidden)
+        self._watermark_us = max(self._watermark_us, max(record[6] for record in changed))
+        self._publish(dict(
+            previous, generation=generation, delta=directory, rows=base.rows - len(hidden) + len(delta), built_at=started,
+        ), previous)
+        return {"rows": snapshot.rows + added, "changed": len(changed), "full": False, "seconds": round(time.time() - started, 3)}
+
+    def _load_manifest(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_segment(self, directory: str, records: list) -> None:
+        """Write records as column files, sorted newest first."""
+        import numpy as np
+
+        records = sorted(records, key=lambda record: (record[5], record[0]), reverse=True)
+        target = os.path.join(self.path, directory)
+        os.makedirs(target, exist_ok=True)
+
+        columns = {
+            "ids": np.array([record[0].encode() for record in records], dtype="S36"),
+            "lat_e6": np.array([record[3] for record in records], dtype=np.int32),
+            "lng_e6": np.array([record[4] for record in records], dtype=np.int32),
+            "created_us": np.array([record[5] for record in records], dtype=np.int64),
+            "updated_us": np.array([record[6] for record in records], dtype=np.int64),
+        }
+        values = {
+            "urls": [record[1].encode() for record in records],
+            "descriptions": [record[2].encode() for record in records],
+            "search": [record[2].lower().encode() for record in records],
+        }
+        for name, column in columns.items():
+            np.save(os.path.join(target, f"{name}.npy"), column)
+        for name, offsets_name, separator in _BLOBS:
+            chunks = values[name]
+            offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+            np.cumsum([len(chunk) + len(separator) for chunk in chunks], out=offsets[1:])
+            with open(os.path.join(target, f"{name}.bin"), "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk + separator)
+            np.save(os.path.join(target, f"{offsets_name}.npy"), offsets)
+
+    def _publish(self, manifest: dict, previous: Optional[dict]) -> None:
+        """Switch readers to the new generation and remove the ones before the previous."""
+        self._write_manifest(manifest)
+        # Keep the previous generation for readers that have not switched yet
+        keep = {manifest["directory"], manifest["delta"]}
+        if previous:
+            keep.update((previous.get("directory"), previous.get("delta")))
+        for name in os.listdir(self.path):
+            if name.startswith(("gen-", "delta-")) and name not in keep:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        logger.info(f"Read model generation {manifest['generation']}: {manifest['rows']} rows"
+                    f"{' (delta)' if manifest['delta'] else ''}")
+
+    def _write_manifest(self, manifest: dict) -> None:
+        temporary = os.path.join(self.path, f".{MANIFEST}.{os.getpid()}")
+        with open(temporary, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temporary, os.path.join(self.path, MANIFEST))
+
+
+# Create read model instance
+read_model = ReadModel()
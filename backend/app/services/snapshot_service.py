@@ -0,0 +1,270 @@
+"""
+Static snapshots of the map data for CDN delivery.
+
+The ``snapshot.publish`` job writes every live photo, newest first, to the
+storage backend as two gzip-compressed files under a new version prefix:
+- ``snapshots/photos/v<N>/photos.geojson.gz``: a GeoJSON FeatureCollection;
+- ``snapshots/photos/v<N>/photos.columns.json.gz``: the same rows as one
+  JSON array per column (coordinates in microdegrees, times in epoch
+  milliseconds), which is what the frontend loads.
+Version files never change and are cached for a year. ``manifest.json``
+is written last and points at the latest version. Its ``changes_since``
+is passed to ``GET /photos/changes`` to fetch rows written after the
+snapshot was taken.
+
+Writes call ``snapshot_publisher.schedule`` in their transaction. It
+queues a publish ``snapshot_debounce_seconds`` ahead unless one is
+already waiting, so a burst of writes produces one new version.
+Publishing is incremental, like the read model: rows updated since the
+previous watermark are merged into the previous version, and when the row
+count shows rows were deleted or archived only the live ids are read to
+drop them. The whole table is reloaded every
+``snapshot_full_refresh_seconds``.
+"""
+import gzip
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.models.job import Job
+from app.models.photo import Photo
+from app.services.job_service import job_handler, job_service
+from app.services.s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_JOB = "snapshot.publish"
+SNAPSHOT_PREFIX = "snapshots/photos/"
+MANIFEST_KEY = f"{SNAPSHOT_PREFIX}manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_COLUMNS = (Photo.id, Photo.s3_url, Photo.description, Photo.lat_e6, Photo.lng_e6, Photo.created_at, Photo.updated_at)
+# Column names in the columnar file, in record order
+_COLUMN_NAMES = ("id", "s3_url", "description", "lat_e6", "lng_e6", "created_at", "updated_at")
+
+# (id, s3_url, description, lat_e6, lng_e6, created_ms, updated_ms)
+Record = Tuple[str, str, str, int, int, int, int]
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _to_millis(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp()) * 1000 + value.microsecond // 1000
+
+
+def _iso(millis: int) -> str:
+    # time.strftime is several times faster than building datetimes per row
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(millis // 1000)) + f".{millis % 1000:03d}Z"
+
+
+def _version_key(version: int, name: str) -> str:
+    return f"{SNAPSHOT_PREFIX}v{version}/{name}"
+
+
+def encode_geojson(records: List[Record]) -> bytes:
+    """A FeatureCollection, built from string pieces (json.dumps per feature is several times slower)."""
+    dumps = json.dumps
+    features = ",".join(
+        f'{{"type":"Feature","id":"{record[0]}","geometry":{{"type":"Point",'
+        f'"coordinates":[{record[4] / 1e6:.6f},{record[3] / 1e6:.6f}]}},'
+        f'"properties":{{"description":{dumps(record[2])},"s3_url":{dumps(record[1])},'
+        f'"created_at":"{_iso(record[5])}"}}}}'
+        for record in records
+    )
+    return f'{{"type":"FeatureCollection","features":[{features}]}}'.encode()
+
+
+def encode_columns(records: List[Record], version: int) -> bytes:
+    columns = {name: [record[i] for record in records] for i, name in enumerate(_COLUMN_NAMES)}
+    return json.dumps({"version": version, "count": len(records), "columns": columns}, separators=(",", ":")).encode()
+
+
+def decode_columns(data: bytes) -> List[Record]:
+    columns = json.loads(data)["columns"]
+    return list(zip(*(columns[name] for name in _COLUMN_NAMES)))
+
+
+class SnapshotPublisher:
+    """Publishes versioned snapshots and schedules them after writes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Rows of the version this process published or loaded last
+        self._version = 0
+        self._records: List[Record] = []
+        # Monotonic time until which this process knows a publish is queued
+        self._queued_until = 0.0
+
+    def schedule(self, db: Session, commit: bool = False) -> None:
+        """Queue a debounced publish in the caller's transaction unless one is already waiting."""
+        if not settings.snapshot_enabled:
+            return
+        now = time.monotonic()
+        if now < self._queued_until:
+            return
+        pending = db.query(Job.id).filter(Job.type == PUBLISH_JOB, Job.status == Job.QUEUED).first()
+        if pending is None:
+            job_service.enqueue(db, PUBLISH_JOB, delay_seconds=settings.snapshot_debounce_seconds, commit=commit)
+            # The job can't start during the first half of the window, so later writes skip the lookup
+            self._queued_until = now + settings.snapshot_debounce_seconds / 2
+
+    def get_manifest(self) -> Optional[dict]:
+        """The latest manifest, or None before the first publish."""
+        try:
+            return json.loads(s3_service.get_object(MANIFEST_KEY))
+        except ValueError:
+            return None
+
+    def _previous_records(self, manifest: dict) -> Optional[List[Record]]:
+        """Rows of the manifest's version, from memory or the storage backend."""
+        if self._version == manifest["version"]:
+            return self._records
+        try:
+            return decode_columns(gzip.decompress(s3_service.get_object(manifest["files"]["columns"]["key"])))
+        except Exception as e:
+            logger.warning(f"Could not load snapshot v{manifest['version']}, rebuilding: {e}")
+            return None
+
+    def publish(self, full: bool = False) -> dict:
+        """Publish a new version if anything changed since the last one."""
+        with self._lock:
+            return self._publish(full)
+
+    def _publish(self, full: bool) -> dict:
+        started = time.time()
+        now = datetime.now(timezone.utc)
+        previous = self.get_manifest()
+        records = None
+        if previous and not full:
+            full_at = datetime.fromisoformat(previous["full_at"])
+            if (now - full_at).total_seconds() <= settings.snapshot_full_refresh_seconds:
+                records = self._previous_records(previous)
+        full = records is None
+
+        with get_engine().connect() as conn:
+            if full:
+                fetched = conn.execute(select(*_COLUMNS)).all()
+                total = len(fetched)
+            else:
+                total = conn.execute(select(func.count(Photo.id))).scalar()
+                # Overlap the watermark so rows committed late by long transactions are not missed
+                since = datetime.fromisoformat(previous["watermark"]) - timedelta(seconds=settings.snapshot_refresh_overlap_seconds)
+                fetched = conn.execute(select(*_COLUMNS).where(Photo.updated_at >= since)).all()
+
+        watermark = datetime.fromisoformat(previous["watermark"]) if previous and not full else _EPOCH
+        if fetched:
+            watermark = max(watermark, _as_utc(max(row.updated_at for row in fetched)))
+        changed: List[Record] = [
+            (row.id, row.s3_url, row.description, row.lat_e6, row.lng_e6, _to_millis(row.created_at), _to_millis(row.updated_at))
+            for row in fetched
+        ]
+
+        removed = 0
+        if not full:
+            merged = {record[0]: record for record in records}
+            changed = [record for record in changed if merged.get(record[0]) != record]
+            merged.update((record[0], record) for record in changed)
+            if len(merged) != total:
+                # Rows were deleted or archived, which updated_at can't show;
+                # the ids alone are much cheaper to read than the rows
+                with get_engine().connect() as conn:
+                    live = set(conn.execute(select(Photo.id)).scalars())
+                removed = len(merged)
+                merged = {photo_id: record for photo_id, record in merged.items() if photo_id in live}
+                removed -= len(merged)
+            if not changed and not removed:
+                return {"version": previous["version"], "rows": len(merged), "changed": 0, "removed": 0,
+                        "full": False, "seconds": round(time.time() - started, 3)}
+            records = list(merged.values())
+        else:
+            records = changed
+
+        records.sort(key=lambda record: (record[5], record[0]), reverse=True)
+        version = previous["version"] + 1 if previous else 1
+        manifest = self._write_version(version, records, {
+            "generated_at": now.isoformat(),
+            "full_at": now.isoformat() if full else previous["full_at"],
+            "watermark": watermark.isoformat(),
+            "changes_since": (watermark - timedelta(seconds=settings.snapshot_refresh_overlap_seconds)).isoformat(),
+        })
+        self._version, self._records = version, records
+        self._delete_old_versions(version)
+        logger.info(f"Published snapshot v{version} with {len(records)} photos ({len(changed)} changed, {removed} removed)")
+
+        self._schedule_if_behind(watermark)
+        return {"version": version, "rows": len(records), "changed": len(changed), "removed": removed, "full": full,
+                "bytes": {name: file["bytes"] for name, file in manifest["files"].items()},
+                "seconds": round(time.time() - started, 3)}
+
+    def _write_version(self, version: int, records: List[Record], manifest: dict) -> dict:
+        files = {}
+        # zlib releases the GIL, so the columns compress while the GeoJSON is encoded
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            level = settings.snapshot_compression_level
+            outputs = [
+                (name, filename, content_type, pool.submit(gzip.compress, encode(), compresslevel=level))
+                for name, filename, content_type, encode in (
+                    ("columns", "photos.columns.json.gz", "application/json", lambda: encode_columns(records, version)),
+                    ("geojson", "photos.geojson.gz", "application/geo+json", lambda: encode_geojson(records)),
+                )
+            ]
+            for name, filename, content_type, future in outputs:
+                key = _version_key(version, filename)
+                compressed = future.result()
+                s3_service.put_object(key, compressed, content_type=content_type,
+                                      content_encoding="gzip", cache_control=IMMUTABLE)
+                files[name] = {"key": key, "url": s3_service.get_public_url(key), "bytes": len(compressed)}
+
+        manifest = dict(manifest, version=version, count=len(records), files=files)
+        s3_service.put_object(
+            MANIFEST_KEY, json.dumps(manifest, indent=2).encode(), content_type="application/json",
+            cache_control=f"public, max-age={settings.snapshot_manifest_max_age}"
+        )
+        return manifest
+
+    def _delete_old_versions(self, version: int) -> None:
+        """Keep the newest snapshot_keep_versions; clients may still be loading one from an older manifest."""
+        oldest = version - max(1, settings.snapshot_keep_versions) + 1
+        try:
+            for key in s3_service.list_objects(SNAPSHOT_PREFIX):
+                directory = key[len(SNAPSHOT_PREFIX):].split("/", 1)[0]
+                if directory.startswith("v") and directory[1:].isdigit() and int(directory[1:]) < oldest:
+                    s3_service.delete_object(key)
+        except Exception as e:
+            logger.warning(f"Could not delete old snapshots: {e}")
+
+    def _schedule_if_behind(self, watermark: datetime) -> None:
+        """Queue another publish when rows were written while this one was being built."""
+        with get_engine().connect() as conn:
+            latest = conn.execute(select(func.max(Photo.updated_at))).scalar()
+        if latest is not None and _as_utc(latest) > watermark:
+            db = SessionLocal()
+            try:
+                self._queued_until = 0.0
+                self.schedule(db, commit=True)
+            finally:
+                db.close()
+
+
+# Create publisher instance
+snapshot_publisher = SnapshotPublisher()
+
+
+@job_handler(PUBLISH_JOB, concurrency=1, max_attempts=3)
+def publish_snapshot(payload: dict, context) -> dict:
+    """Publish the map snapshot to the storage backend."""
+    return snapshot_publisher.publish(full=payload.get("full", False))
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Dirty Nairobi API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.api --help``.
+"""
@@ -0,0 +1,213 @@
+"""
+API load benchmark.
+
+Seeds a database with synthetic Nairobi-bounded photos and measures list,
+search, count, create and the presigned-URL flow, in process and over
+uvicorn. Results are printed (and optionally written) as JSON so runs from
+different commits can be compared with ``--compare``.
+
+Example:
+    python -m benchmarks.api --rows 100000 --requests 1000 --output before.json
+    python -m benchmarks.api --rows 100000 --requests 1000 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.harness import (
+    SEARCH_TERMS,
+    configure_environment,
+    delete_photos,
+    free_port,
+    in_process_client,
+    random_photo_payload,
+    run_load,
+    seed_database,
+    start_server,
+    stop_server,
+    uvicorn_command,
+)
+
+SCENARIOS = ["list", "search", "count", "create", "presigned_flow"]
+
+
+def build_operations(client, seed: int, created: List[str]) -> Dict:
+    """Map scenario names to single-request coroutines; ids of created photos go to ``created``."""
+    rng = random.Random(seed)
+    api = "/api/v1"
+
+    async def list_photos(index):
+        response = await client.get(f"{api}/photos", params={"limit": 100, "offset": rng.randint(0, 1000)})
+        return response.status_code == 200
+
+    async def search_photos(index):
+        term = SEARCH_TERMS[index % len(SEARCH_TERMS)]
+        response = await client.get(f"{api}/photos", params={"description": term, "limit": 50})
+        return response.status_code == 200
+
+    async def count_photos(index):
+        response = await client.get(f"{api}/photos/count")
+        return response.status_code == 200
+
+    async def create_photo(index):
+        response = await client.post(f"{api}/photos", json=random_photo_payload(rng))
+        if response.status_code != 200:
+            return False
+        created.append(response.json()["id"])
+        return True
+
+    async def presigned_flow(index):
+        response = await client.post(
+            f"{api}/upload/presigned-url",
+            json={"filename": f"bench_{index}.jpg", "content_type": "image/jpeg"}
+        )
+        if response.status_code != 200:
+            return False
+        payload = random_photo_payload(rng)
+        payload["s3_key"] = response.json()["s3_key"]
+        response = await client.post(f"{api}/photos", json=payload)
+        if response.status_code != 200:
+            return False
+        created.append(response.json()["id"])
+        return True
+
+    return {
+        "list": list_photos,
+        "search": search_photos,
+        "count": count_photos,
+        "create": create_photo,
+        "presigned_flow": presigned_flow,
+    }
+
+
+async def run_scenarios(client, scenarios, requests: int, concurrency: int, warmup: int) -> Dict:
+    """Run each scenario against ``client`` and return its summaries."""
+    created: List[str] = []
+    operations = build_operations(client, seed=7, created=created)
+    results = {}
+    try:
+        for name in scenarios:
+            if warmup:
+                await run_load(operations[name], warmup, concurrency)
+            results[name] = await run_load(operations[name], requests, concurrency)
+            print(f"  {name:<15} {json.dumps(results[name])}", file=sys.stderr)
+    finally:
+        # Created rows would otherwise count towards --rows and grow the table run after run
+        delete_photos(created)
+    return results
+
+
+async def run_in_process(args) -> Dict:
+    async with in_process_client() as client:
+        return await run_scenarios(client, args.scenarios, args.requests, args.concurrency, args.warmup)
+
+
+async def run_over_http(base_url: str, args) -> Dict:
+    import httpx
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        return await run_scenarios(client, args.scenarios, args.requests, args.concurrency, args.warmup)
+
+
+def run_uvicorn(args) -> Dict:
+    port = free_port()
+    process = start_server(uvicorn_command(port), port)
+    try:
+        return asyncio.run(run_over_http(f"http://127.0.0.1:{port}", args))
+    finally:
+        stop_server(process)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Print p50/p99/throughput changes relative to a previous run."""
+    print(f"Comparison with {baseline['meta'].get('commit')}:", file=sys.stderr)
+    for mode, scenarios in current["results"].items():
+        for name, result in scenarios.items():
+            previous = baseline["results"].get(mode, {}).get(name)
+            if not previous:
+                continue
+            changes = []
+            for key in ("p50_ms", "p99_ms", "throughput_rps"):
+                if previous[key]:
+                    delta = (result[key] - previous[key]) / previous[key] * 100
+                    changes.append(f"{key} {previous[key]} -> {result[key]} ({delta:+.1f}%)")
+            print(f"  {mode}/{name}: " + ", ".join(changes), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Dirty Nairobi API")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db",
+                        help="Database to seed and benchmark (SQLite or PostgreSQL)")
+    parser.add_argument("--rows", type=int, default=10000, help="Photos to seed (10k-1M)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per scenario")
+    parser.add_argument("--modes", default="inprocess,uvicorn",
+                        help="Comma-separated: inprocess, uvicorn")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    configure_environment(args.database_url)
+    import logging
+    logging.disable(logging.INFO)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": args.database_url.split("://")[0],
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": {},
+    }
+
+    for mode in [name for name in args.modes.split(",") if name]:
+        # Seeding is a no-op once the table holds at least --rows photos
+        print(f"Seeding {args.rows} photos...", file=sys.stderr)
+        seed_database(args.rows)
+        print(f"Running {mode} benchmark", file=sys.stderr)
+        if mode == "inprocess":
+            report["results"][mode] = asyncio.run(run_in_process(args))
+        elif mode == "uvicorn":
+            report["results"][mode] = run_uvicorn(args)
+        else:
+            parser.error(f"Unknown mode: {mode}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Coordinate storage comparison.
+
+Loads the same synthetic points into scratch tables using the old
+NUMERIC(10,8)/NUMERIC(11,8) columns, FLOAT8 columns and integer
+microdegrees plus a Morton code, then reports hydration speed (fetch and
+convert to float) and the size of the location indexes.
+
+Example:
+    python -m benchmarks.coordinates --rows 200000
+    python -m benchmarks.coordinates --database-url postgresql://... --rows 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.harness import LAT_RANGE, LNG_RANGE, configure_environment
+
+LAYOUTS = {
+    "numeric": {
+        "columns": "lat NUMERIC(10, 8) NOT NULL, lng NUMERIC(11, 8) NOT NULL",
+        "names": ["lat", "lng"],
+        "indexes": [("lat", "lng")],
+    },
+    "float8": {
+        "columns": "lat DOUBLE PRECISION NOT NULL, lng DOUBLE PRECISION NOT NULL",
+        "names": ["lat", "lng"],
+        "indexes": [("lat", "lng")],
+    },
+    "microdegrees": {
+        "columns": "lat INTEGER NOT NULL, lng INTEGER NOT NULL, geo_key BIGINT NOT NULL",
+        "names": ["lat", "lng", "geo_key"],
+        "indexes": [("lat", "lng"), ("geo_key",)],
+    },
+}
+
+
+def result_types(layout: str):
+    """SQLAlchemy column types, so results are processed like ORM columns."""
+    from sqlalchemy import Float, Integer, Numeric
+
+    if layout == "numeric":
+        return {"lat": Numeric(10, 8), "lng": Numeric(11, 8)}
+    if layout == "float8":
+        return {"lat": Float(), "lng": Float()}
+    return {"lat": Integer(), "lng": Integer()}
+
+
+def generate_points(rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [(round(rng.uniform(*LAT_RANGE), 8), round(rng.uniform(*LNG_RANGE), 8)) for _ in range(rows)]
+
+
+def layout_rows(layout: str, points):
+    from app.core.geo import morton_encode, to_microdegrees
+
+    if layout == "microdegrees":
+        for row_id, (lat, lng) in enumerate(points):
+            lat_e6, lng_e6 = to_microdegrees(lat), to_microdegrees(lng)
+            yield {"id": row_id, "lat": lat_e6, "lng": lng_e6, "geo_key": morton_encode(lat_e6, lng_e6)}
+    else:
+        for row_id, (lat, lng) in enumerate(points):
+            yield {"id": row_id, "lat": lat, "lng": lng}
+
+
+def index_size_bytes(conn, dialect: str, table: str, columns) -> int:
+    """Create an index and return its on-disk size."""
+    from sqlalchemy import text
+
+    name = f"{table}_{'_'.join(columns)}_idx"
+    if dialect == "postgresql":
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+        return conn.execute(text(f"SELECT pg_relation_size('{name}')")).scalar()
+    # SQLite: measure the pages the index takes, net of reused free pages
+    def used_pages():
+        return (
+            conn.execute(text("PRAGMA page_count")).scalar()
+            - conn.execute(text("PRAGMA freelist_count")).scalar()
+        )
+
+    page_size = conn.execute(text("PRAGMA page_size")).scalar()
+    before = used_pages()
+    conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    return (used_pages() - before) * page_size
+
+
+def hydrate(engine, table: str, layout: str, repeats: int) -> float:
+    """Best-of-N time to fetch all coordinates and convert them to floats."""
+    from sqlalchemy import text
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            query = text(f"SELECT lat, lng FROM {table}").columns(**result_types(layout))
+            rows = conn.execute(query).all()
+        if layout == "microdegrees":
+            coordinates = [(lat / 1e6, lng / 1e6) for lat, lng in rows]
+        else:
+            coordinates = [(float(lat), float(lng)) for lat, lng in rows]
+        best = min(best, time.perf_counter() - start)
+        assert len(coordinates) == len(rows)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare coordinate storage layouts")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    from sqlalchemy import text
+    from app.core.database import get_engine
+
+    engine = get_engine()
+    dialect = engine.dialect.name
+    points = generate_points(args.rows)
+    report = {"database": dialect, "rows": args.rows, "layouts": {}}
+
+    for layout, spec in LAYOUTS.items():
+        table = f"bench_coords_{layout}"
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, {spec['columns']})"))
+            names = ["id"] + spec["names"]
+            insert = text(
+                f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(':' + n for n in names)})"
+            )
+            conn.execute(insert, list(layout_rows(layout, points)))
+            if dialect == "postgresql":
+                conn.execute(text(f"ANALYZE {table}"))
+        try:
+            with engine.begin() as conn:
+                sizes = {
+                    "_".join(columns): index_size_bytes(conn, dialect, table, columns)
+                    for columns in spec["indexes"]
+                }
+            seconds = hydrate(engine, table, layout, args.repeats)
+            report["layouts"][layout] = {
+                "hydration_ms": round(seconds * 1000, 1),
+                "rows_per_second": round(args.rows / seconds),
+                "index_bytes": sizes,
+            }
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Shared helpers for seeding benchmark databases and driving the API.
+
+The application reads its settings at import time, so callers must set
+DATABASE_URL (see ``configure_environment``) before importing anything from
+``app``.
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+# Nairobi bounds accepted by the photo schemas
+LAT_RANGE = (-1.5, -1.0)
+LNG_RANGE = (36.5, 37.2)
+
+DESCRIPTION_WORDS = [
+    "garbage", "plastic", "bottles", "dumping", "sewage", "drain", "blocked",
+    "burning", "market", "river", "roadside", "estate", "bags", "rubble",
+    "overflowing", "skip", "bin", "waste", "litter", "stagnant", "water",
+]
+SEARCH_TERMS = ["plastic", "sewage", "burning", "river", "skip"]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(database_url: str) -> None:
+    """Point the application at the benchmark database."""
+    os.environ["DATABASE_URL"] = database_url
+    # Keep profiling and slow-query capture out of the measurements
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+    # Synthetic photos have no uploaded objects, so their follow-up jobs would only fail and retry
+    os.environ.setdefault("JOBS_ENABLED", "false")
+
+
+def random_description(rng: random.Random) -> str:
+    """Return a short synthetic report description."""
+    return " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def random_photo_payload(rng: random.Random) -> Dict:
+    """Return a request body accepted by POST /photos."""
+    return {
+        "description": random_description(rng),
+        "latitude": round(rng.uniform(*LAT_RANGE), 6),
+        "longitude": round(rng.uniform(*LNG_RANGE), 6),
+        "s3_key": f"photos/bench/{uuid.uuid4()}.jpg",
+    }
+
+
+def synthetic_rows(count: int, seed: int = 42, days: int = 730):
+    """Yield synthetic photo rows spread over the last ``days`` days."""
+    from app.core.geo import morton_encode, to_microdegrees
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for _ in range(count):
+        payload = random_photo_payload(rng)
+        created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        lat_e6 = to_microdegrees(payload["latitude"])
+        lng_e6 = to_microdegrees(payload["longitude"])
+        yield {
+            "id": str(uuid.uuid4()),
+            "s3_key": payload["s3_key"],
+            "s3_url": f"https://bench.example.com/{payload['s3_key']}",
+            "description": payload["description"],
+            "lat_e6": lat_e6,
+            "lng_e6": lng_e6,
+            "geo_key": morton_encode(lat_e6, lng_e6),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def seed_database(rows: int, chunk_size: int = 10000, seed: int = 42) -> int:
+    """Migrate the schema and top the photos table up to ``rows`` rows."""
+    from sqlalchemy import func, insert, select
+    from app.core.database import get_engine
+    from app.core.migrations import upgrade_database
+    from app.models.photo import Photo
+
+    upgrade_database()
+    engine = get_engine()
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Photo.__table__)).scalar()
+    missing = rows - existing
+    if missing <= 0:
+        return existing
+
+    statement = insert(Photo.__table__)
+    batch = []
+    with engine.begin() as conn:
+        for row in synthetic_rows(missing, seed=seed + existing):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                conn.execute(statement, batch)
+                batch = []
+        if batch:
+            conn.execute(statement, batch)
+    return rows
+
+
+def delete_photos(ids: List[str], batch_size: int = 900) -> None:
+    """Delete photos a benchmark created so the next run starts from the seeded rows."""
+    from sqlalchemy import delete
+    from app.core.database import get_engine
+    from app.models.photo import Photo
+
+    table = Photo.__table__
+    with get_engine().begin() as conn:
+        for start in range(0, len(ids), batch_size):
+            conn.execute(delete(table).where(table.c.id.in_(ids[start:start + batch_size])))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Summarize latencies (seconds) as throughput and millisecond percentiles."""
+    ordered = sorted(latencies)
+    total = len(ordered) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+async def run_load(
+    operation: Callable[[int], Awaitable[bool]],
+    requests: int,
+    concurrency: int
+) -> Dict:
+    """Run ``operation`` ``requests`` times with bounded concurrency."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                ok = await operation(index)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def in_process_client() -> httpx.AsyncClient:
+    """Client that calls the ASGI app directly, without a network hop."""
+    from app.main import app
+    return httpx.AsyncClient(app=app, base_url="http://benchmark")
+
+
+def free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command: List[str], port: int, timeout: float = 30.0) -> subprocess.Popen:
+    """Start a server process from the backend directory and wait for /health."""
+    process = subprocess.Popen(
+        command,
+        cwd=BACKEND_DIR,
+        env=dict(os.environ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}: {' '.join(command)}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Server did not become healthy within {timeout}s")
+
+
+def stop_server(process: Optional[subprocess.Popen]) -> None:
+    """Terminate a server started by ``start_server``."""
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def uvicorn_command(port: int) -> List[str]:
+    """The single-process command the Dockerfile used to run."""
+    return [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
@@ -0,0 +1,81 @@
+"""
+Hotspot detection benchmark.
+
+Generates reports around synthetic dumping sites (some reported every
+week, some only once) plus uniform noise over the seeded area and times
+the clustering and scoring on them. With ``--database-url`` it also runs
+the whole detection (load, cluster, store) against that database's
+photos.
+
+Example:
+    python -m benchmarks.hotspots --points 1000000
+    python -m benchmarks.hotspots --points 0 --database-url postgresql://localhost/dirty_nairobi
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.harness import LAT_RANGE, LNG_RANGE, configure_environment
+
+DAY = 86_400
+
+
+def synthetic_reports(points: int, sites: int, noise: float, window_days: int, window_end: int, seed: int = 42):
+    """(lat_e6, lng_e6, created) arrays: reports scattered around sites, half of them persistent."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    site_lat = rng.uniform(*LAT_RANGE, sites)
+    site_lng = rng.uniform(*LNG_RANGE, sites)
+    persistent = rng.random(sites) < 0.5
+    clustered = int(points * (1 - noise))
+    site = rng.integers(0, sites, clustered)
+    # Reports land within a few tens of metres of the site
+    lat = np.r_[site_lat[site] + rng.normal(0, 0.0002, clustered), rng.uniform(*LAT_RANGE, points - clustered)]
+    lng = np.r_[site_lng[site] + rng.normal(0, 0.0002, clustered), rng.uniform(*LNG_RANGE, points - clustered)]
+    # Persistent sites are reported throughout the window, the others on a single day
+    one_day = rng.integers(0, window_days, sites)
+    days = np.where(persistent[site], rng.integers(0, window_days, clustered), one_day[site])
+    days = np.r_[days, rng.integers(0, window_days, points - clustered)]
+    created = window_end - days * DAY - rng.integers(1, DAY, points)
+    return np.rint(lat * 1e6).astype(np.int32), np.rint(lng * 1e6).astype(np.int32), created.astype(np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hotspot detection")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Synthetic reports; 0 skips the synthetic run")
+    parser.add_argument("--sites", type=int, default=5000)
+    parser.add_argument("--noise", type=float, default=0.3, help="Fraction of reports scattered at random")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--database-url", help="Also run the whole detection against this database")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url or "sqlite:///./benchmark.db")
+    from app.services.hotspot_service import HotspotParams, detect_hotspots, hotspot_service
+
+    params = HotspotParams.from_settings()
+    report = {"params": params._asdict()}
+    if args.points:
+        window_end = int(time.time())
+        arrays = synthetic_reports(args.points, args.sites, args.noise, params.window_days, window_end)
+        timings, hotspots = [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            hotspots = detect_hotspots(*arrays, window_end, params)
+            timings.append(time.perf_counter() - start)
+        report["synthetic"] = {
+            "points": args.points,
+            "sites": args.sites,
+            "hotspots": len(hotspots),
+            "seconds": [round(seconds, 3) for seconds in timings],
+            "top": hotspots[:3],
+        }
+    if args.database_url:
+        print("Running detection against the database...", file=sys.stderr)
+        report["database"] = hotspot_service.detect()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Read model latency benchmark.
+
+Seeds the database, builds the memory-mapped snapshot and times the list,
+search, count and viewport queries served from it against the same queries
+on the database (service calls, without HTTP overhead).
+
+Example:
+    python -m benchmarks.read_model --rows 100000 --repeats 2000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.harness import LAT_RANGE, LNG_RANGE, SEARCH_TERMS, configure_environment, percentile, seed_database
+
+
+def random_viewport(rng: random.Random):
+    """A viewport about a neighbourhood wide inside the seeded area."""
+    lat = rng.uniform(LAT_RANGE[0], LAT_RANGE[1] - 0.05)
+    lng = rng.uniform(LNG_RANGE[0], LNG_RANGE[1] - 0.05)
+    return {"min_lat": lat, "min_lng": lng, "max_lat": lat + 0.05, "max_lng": lng + 0.05}
+
+
+def queries(rng: random.Random):
+    """Named PhotoFilter arguments and whether they count or list."""
+    return {
+        "list": lambda: ({"limit": 100, "offset": rng.randint(0, 10) * 100}, False),
+        "search": lambda: ({"description": rng.choice(SEARCH_TERMS), "limit": 100}, False),
+        "count": lambda: ({"description": rng.choice(SEARCH_TERMS), "limit": 1}, True),
+        "viewport": lambda: (dict(random_viewport(rng), limit=100), False),
+        "viewport_count": lambda: (dict(random_viewport(rng), limit=1), True),
+    }
+
+
+def measure(run, make_query, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        arguments, is_count = make_query()
+        start = time.perf_counter()
+        run(arguments, is_count)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped read model")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=1000)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    os.environ["READ_MODEL_ENABLED"] = "true"
+    os.environ["READ_MODEL_PATH"] = tempfile.mkdtemp(prefix="read-model-bench-")
+    os.environ["READ_MODEL_MAX_STALENESS_SECONDS"] = "3600"
+    seed_database(args.rows)
+
+    from app.core.database import SessionLocal
+    from app.schemas.photo import PhotoFilter
+    from app.services.photo_service import photo_service
+    from app.services.read_model import read_model
+
+    refresh = read_model.refresh()
+    report = {"rows": args.rows, "refresh": refresh, "read_model": {}, "database": {}}
+
+    def read_model_query(arguments, is_count):
+        filters = PhotoFilter(**arguments)
+        if is_count:
+            assert read_model.count_photos(filters.description, filters.viewport_e6()) is not None
+        else:
+            assert read_model.get_photos(filters.description, filters.offset, filters.limit, filters.viewport_e6()) is not None
+
+    db = SessionLocal()
+
+    def database_query(arguments, is_count):
+        filters = PhotoFilter(**arguments)
+        if is_count:
+            photo_service.get_photos_count(db, filters)
+        else:
+            photo_service.get_photos(db, filters)
+
+    try:
+        for name, make_query in queries(random.Random(1)).items():
+            report["read_model"][name] = measure(read_model_query, make_query, args.repeats)
+        for name, make_query in queries(random.Random(1)).items():
+            report["database"][name] = measure(database_query, make_query, max(1, args.repeats // 10))
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
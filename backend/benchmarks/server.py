@@ -0,0 +1,120 @@
+"""
+Production server benchmark.
+
+Starts the single-process ``uvicorn app.main:app`` command the Dockerfile
+used to run and the ``python -m app.server`` launcher in turn, and reports
+time to healthy, memory of the whole process tree (PSS, so pages shared
+between forked workers count once) and throughput and latency for the API
+scenarios over HTTP.
+
+Requests hold their database session until the response is sent, so keep
+``--concurrency`` below DB_POOL_SIZE + DB_MAX_OVERFLOW per worker (15 by
+default) or the uvicorn baseline stalls on pool timeouts.
+
+Example:
+    python -m benchmarks.server --rows 100000 --requests 2000 --concurrency 12
+    python -m benchmarks.server --workers 4 --scenarios list,count
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.api import SCENARIOS, run_over_http
+from benchmarks.harness import configure_environment, free_port, seed_database, start_server, stop_server, uvicorn_command
+
+
+def launcher_command(port: int, workers: int) -> List[str]:
+    command = [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port)]
+    if workers:
+        command += ["--workers", str(workers)]
+    return command
+
+
+def process_tree(pid: int) -> List[int]:
+    """The process and all of its descendants (Linux)."""
+    pids, index = [pid], 0
+    while index < len(pids):
+        task_dir = f"/proc/{pids[index]}/task"
+        for task in os.listdir(task_dir) if os.path.isdir(task_dir) else []:
+            try:
+                with open(f"{task_dir}/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+        index += 1
+    return pids
+
+
+def tree_memory_mb(pid: int) -> Dict:
+    """Proportional and resident set sizes summed over the process tree."""
+    pss = rss = 0
+    pids = process_tree(pid)
+    for tree_pid in pids:
+        try:
+            with open(f"/proc/{tree_pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+                    elif line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+        except OSError:
+            pass
+    return {"processes": len(pids), "pss_mb": round(pss / 1024, 1), "rss_mb": round(rss / 1024, 1)}
+
+
+def run_server(name: str, command: List[str], port: int, args) -> Dict:
+    print(f"Running {name}: {' '.join(command[1:])}", file=sys.stderr)
+    start = time.perf_counter()
+    process = start_server(command, port, timeout=60.0)
+    try:
+        result = {"startup_seconds": round(time.perf_counter() - start, 2)}
+        # Workers boot one after another; let the last ones finish warming up
+        time.sleep(args.settle)
+        result["memory_idle"] = tree_memory_mb(process.pid)
+        result["scenarios"] = asyncio.run(run_over_http(f"http://127.0.0.1:{port}", args))
+        result["memory_loaded"] = tree_memory_mb(process.pid)
+        return result
+    finally:
+        stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare uvicorn with the production launcher")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests per scenario")
+    parser.add_argument("--workers", type=int, default=0, help="Launcher workers; 0 = from the CPU quota")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait after the first healthy response")
+    parser.add_argument("--scenarios", default="list,search,count",
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+
+    configure_environment(args.database_url)
+    print(f"Seeding {args.rows} photos...", file=sys.stderr)
+    seed_database(args.rows)
+
+    from app.server import cpu_limit, default_workers
+    report = {
+        "rows": args.rows,
+        "cpu_limit": cpu_limit(),
+        "workers": args.workers or default_workers(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": {},
+    }
+    port = free_port()
+    report["results"]["uvicorn"] = run_server("uvicorn", uvicorn_command(port), port, args)
+    port = free_port()
+    report["results"]["launcher"] = run_server("launcher", launcher_command(port, args.workers), port, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
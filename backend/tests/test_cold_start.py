@@ -0,0 +1,17 @@
+"""Lambda cold-start import budget (see benchmarks/cold_start.py)."""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cold_start_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--runs", "3"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
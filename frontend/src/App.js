@@ -5,7 +5,7 @@ import UploadForm from './components/UploadForm';
 import FilterComponent from './components/FilterComponent';
 import PhotoModal from './components/PhotoModal';
 import Header from './components/Header';
-import { photoAPI } from './services/api';
+import { photoAPI, snapshotAPI } from './services/api';
 import './styles/App.css';
 
 function App() {
@@ -28,7 +28,17 @@ function App() {
         filters.description = searchFilter.trim();
       }
       
-      const photosData = await photoAPI.getPhotos(filters);
+      let photosData = null;
+      if (!filters.description && snapshotAPI.isEnabled()) {
+        try {
+          photosData = await snapshotAPI.loadPhotos();
+        } catch (snapshotError) {
+          console.error('Error loading map snapshot, using the API:', snapshotError);
+        }
+      }
+      if (!photosData) {
+        photosData = await photoAPI.getPhotos(filters);
+      }
       setPhotos(photosData);
       setFilteredPhotos(photosData);
     } catch (err) {
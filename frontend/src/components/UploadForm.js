@@ -1,9 +1,12 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { toast } from 'react-hot-toast';
 import { Upload, MapPin, FileText, Loader2, Search, X } from 'lucide-react';
-import { photoAPI } from '../services/api';
+import { photoAPI, placesAPI } from '../services/api';
 import '../styles/UploadForm.css';
 
+// Files larger than one part (S3's 5 MiB minimum) use resumable multipart uploads
+const MULTIPART_THRESHOLD = 5 * 1024 * 1024;
+
 const UploadForm = ({ onUploadSuccess }) => {
   const [formData, setFormData] = useState({
     image: null,
@@ -20,6 +23,7 @@ const UploadForm = ({ onUploadSuccess }) => {
   const [isSearchingLocation, setIsSearchingLocation] = useState(false);
   const searchTimeoutRef = useRef(null);
   const suggestionsRef = useRef(null);
+  const latestQueryRef = useRef('');
 
   // Nairobi bounds for validation
   const NAIROBI_BOUNDS = {
@@ -103,9 +107,10 @@ const UploadForm = ({ onUploadSuccess }) => {
     }
   };
 
-  // Search for locations using Nominatim API
+  // Search for locations in the API's offline Nairobi gazetteer
   const searchLocations = async (query) => {
-    if (!query || query.length < 3) {
+    latestQueryRef.current = query;
+    if (!query || query.trim().length < 2) {
       setLocationSuggestions([]);
       setShowSuggestions(false);
       return;
@@ -114,36 +119,18 @@ const UploadForm = ({ onUploadSuccess }) => {
     setIsSearchingLocation(true);
     
     try {
-      // Use Nominatim API to search for locations in Nairobi
-      const response = await fetch(
-        `https://nominatim.openstreetmap.org/search?` +
-        `q=${encodeURIComponent(query + ', Nairobi, Kenya')}&` +
-        `format=json&` +
-        `limit=5&` +
-        `countrycodes=ke&` +
-        `bounded=1&` +
-        `viewbox=36.5,-1.5,37.2,-1.0&` +
-        `addressdetails=1`
-      );
+      const places = await placesAPI.search(query, 5);
       
-      const data = await response.json();
+      // Ignore answers to queries the user has already typed past
+      if (latestQueryRef.current !== query) return;
       
-      const suggestions = data
-        .filter(item => {
-          const lat = parseFloat(item.lat);
-          const lon = parseFloat(item.lon);
-          return lat >= NAIROBI_BOUNDS.lat.min && 
-                 lat <= NAIROBI_BOUNDS.lat.max &&
-                 lon >= NAIROBI_BOUNDS.lng.min && 
-                 lon <= NAIROBI_BOUNDS.lng.max;
-        })
-        .map(item => ({
-          id: item.place_id,
-          name: item.display_name,
-          latitude: parseFloat(item.lat),
-          longitude: parseFloat(item.lon),
-          address: item.address
-        }));
+      const suggestions = places.map(place => ({
+        id: `${place.name}:${place.latitude}:${place.longitude}`,
+        name: place.name,
+        area: place.area,
+        latitude: place.latitude,
+        longitude: place.longitude
+      }));
       
       setLocationSuggestions(suggestions);
       setShowSuggestions(suggestions.length > 0);
@@ -151,7 +138,9 @@ const UploadForm = ({ onUploadSuccess }) => {
       console.error('Error searching locations:', error);
       toast.error('Failed to search locations');
     } finally {
-      setIsSearchingLocation(false);
+      if (latestQueryRef.current === query) {
+        setIsSearchingLocation(false);
+      }
     }
   };
 
@@ -173,7 +162,7 @@ const UploadForm = ({ onUploadSuccess }) => {
     // Set new timeout for search
     searchTimeoutRef.current = setTimeout(() => {
       searchLocations(value);
-    }, 300);
+    }, 150);
 
     // Clear errors
     if (errors.latitude || errors.longitude) {
@@ -324,23 +313,31 @@ const UploadForm = ({ onUploadSuccess }) => {
     setIsUploading(true);
     
     try {
-      // Step 1: Get pre-signed URL
-      toast.loading('Preparing upload...');
-      const presignedData = await photoAPI.getPresignedUrl(
-        formData.image.name,
-        formData.image.type
-      );
-
-      // Step 2: Upload to S3
-      toast.dismiss();
-      toast.loading('Uploading image...');
-      await photoAPI.uploadToS3(presignedData.upload_url, formData.image);
+      let s3Key;
+      if (formData.image.size > MULTIPART_THRESHOLD) {
+        // Large files go up in resumable parts
+        toast.loading('Uploading image...');
+        s3Key = await photoAPI.uploadMultipart(formData.image);
+      } else {
+        // Step 1: Get pre-signed URL
+        toast.loading('Preparing upload...');
+        const presignedData = await photoAPI.getPresignedUrl(
+          formData.image.name,
+          formData.image.type
+        );
+
+        // Step 2: Upload to S3
+        toast.dismiss();
+        toast.loading('Uploading image...');
+        await photoAPI.uploadToS3(presignedData.upload_url, formData.image);
+        s3Key = presignedData.s3_key;
+      }
 
       // Step 3: Save metadata
       toast.dismiss();
       toast.loading('Saving photo details...');
       const photoData = {
-        s3_key: presignedData.s3_key,
+        s3_key: s3Key,
         description: formData.description.trim(),
         latitude: parseFloat(formData.latitude),
         longitude: parseFloat(formData.longitude)
@@ -490,11 +487,10 @@ const UploadForm = ({ onUploadSuccess }) => {
                     <MapPin size={14} />
                     <div className="suggestion-content">
                       <div className="suggestion-name">
-                        {suggestion.address?.suburb || suggestion.address?.neighbourhood || 
-                         suggestion.address?.road || 'Unknown Area'}
+                        {suggestion.name}
                       </div>
                       <div className="suggestion-address">
-                        {suggestion.name}
+                        {suggestion.area}
                       </div>
                     </div>
                   </div>
@@ -9,9 +9,17 @@ const api = axios.create({
   },
 });
 
+// The API asks a client that just wrote to read from the primary database
+// for a few seconds; echo its header back so reads see our own writes
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil = null;
+
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
+    if (readPrimaryUntil && Date.now() / 1000 < Number(readPrimaryUntil) + 60) {
+      config.headers[READ_PRIMARY_HEADER] = readPrimaryUntil;
+    }
     console.log(`Making ${config.method?.toUpperCase()} request to ${config.url}`);
     return config;
   },
@@ -24,6 +32,10 @@ api.interceptors.request.use(
 // Response interceptor
 api.interceptors.response.use(
   (response) => {
+    const until = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+    if (until) {
+      readPrimaryUntil = until;
+    }
     return response;
   },
   (error) => {
@@ -66,6 +78,77 @@ export const photoAPI = {
     return response;
   },
 
+  // Upload a large file in parts. Parts are retried individually and the
+  // upload can be resumed after a failure: the upload ID is remembered per
+  // file in localStorage and only the missing parts are sent again.
+  uploadMultipart: async (file, { concurrency = 3, retries = 3, onProgress } = {}) => {
+    const storageKey = `multipart:${file.name}:${file.size}:${file.lastModified}`;
+    const saved = JSON.parse(localStorage.getItem(storageKey) || 'null');
+
+    let upload = null;
+    if (saved) {
+      try {
+        const response = await api.post('/upload/multipart/resume', {
+          s3_key: saved.s3_key,
+          upload_id: saved.upload_id,
+          file_size: file.size,
+        });
+        upload = response.data;
+      } catch (error) {
+        // The upload expired or was aborted; start over
+        localStorage.removeItem(storageKey);
+      }
+    }
+    if (!upload) {
+      const response = await api.post('/upload/multipart', {
+        filename: file.name,
+        content_type: file.type,
+        file_size: file.size,
+      });
+      upload = response.data;
+      localStorage.setItem(storageKey, JSON.stringify({
+        s3_key: upload.s3_key,
+        upload_id: upload.upload_id,
+      }));
+    }
+
+    const completed = upload.uploaded_parts.map(({ part_number, etag }) => ({ part_number, etag }));
+    const reportProgress = () => onProgress && onProgress(completed.length / upload.part_count);
+    reportProgress();
+
+    const uploadPart = async ({ part_number, upload_url }) => {
+      const start = (part_number - 1) * upload.part_size;
+      const blob = file.slice(start, start + upload.part_size);
+      for (let attempt = 0; ; attempt++) {
+        try {
+          const response = await axios.put(upload_url, blob);
+          completed.push({ part_number, etag: response.headers.etag });
+          reportProgress();
+          return;
+        } catch (error) {
+          if (attempt >= retries) throw error;
+          await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+      }
+    };
+
+    const queue = [...upload.parts];
+    const workers = Array.from({ length: Math.min(concurrency, queue.length) }, async () => {
+      while (queue.length) {
+        await uploadPart(queue.shift());
+      }
+    });
+    await Promise.all(workers);
+
+    await api.post('/upload/multipart/complete', {
+      s3_key: upload.s3_key,
+      upload_id: upload.upload_id,
+      parts: completed,
+    });
+    localStorage.removeItem(storageKey);
+    return upload.s3_key;
+  },
+
   // Create photo metadata
   createPhoto: async (photoData) => {
     const response = await api.post('/photos', photoData);
@@ -115,4 +198,61 @@ export const photoAPI = {
   },
 };
 
+// Manifest of the static map snapshot published to the storage backend;
+// without it the map is loaded from the API
+const SNAPSHOT_MANIFEST_URL = process.env.REACT_APP_SNAPSHOT_MANIFEST_URL;
+
+export const snapshotAPI = {
+  isEnabled: () => Boolean(SNAPSHOT_MANIFEST_URL),
+
+  // All live photos, newest first: the latest snapshot from static storage
+  // plus the photos written since it was taken. Deleted photos disappear
+  // with the next snapshot, a few seconds after the delete.
+  loadPhotos: async () => {
+    const manifest = (await axios.get(SNAPSHOT_MANIFEST_URL)).data;
+    // Served gzip-encoded; the browser decompresses it
+    const { columns, count } = (await axios.get(manifest.files.columns.url)).data;
+
+    const photos = new Map();
+    for (let i = 0; i < count; i++) {
+      photos.set(columns.id[i], {
+        id: columns.id[i],
+        s3_url: columns.s3_url[i],
+        description: columns.description[i],
+        latitude: columns.lat_e6[i] / 1e6,
+        longitude: columns.lng_e6[i] / 1e6,
+        created_at: new Date(columns.created_at[i]).toISOString(),
+        updated_at: new Date(columns.updated_at[i]).toISOString(),
+      });
+    }
+
+    const added = [];
+    let params = { since: manifest.changes_since, limit: 1000 };
+    for (;;) {
+      const { data } = await api.get('/photos/changes', { params });
+      data.photos.forEach((photo) => {
+        if (photos.has(photo.id)) {
+          photos.set(photo.id, photo);
+        } else {
+          added.push(photo);
+        }
+      });
+      if (!data.has_more) break;
+      params = { since: data.next_since, after_id: data.next_after_id, limit: 1000 };
+    }
+    added.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+    return [...added, ...photos.values()];
+  },
+};
+
+export const placesAPI = {
+  // Search the offline gazetteer (name prefixes and typos are matched)
+  search: async (query, limit = 8) => {
+    const response = await api.get('/places/search', {
+      params: { q: query, limit },
+    });
+    return response.data;
+  },
+};
+
 export default api;
\ No newline at end of file
@@ -7,8 +7,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 # Import and run the FastAPI app
 if __name__ == "__main__":
-    import uvicorn
-    from app.main import app
+    from app.core.migrations import upgrade_database
+    from app.server import main
+    
+    upgrade_database()
     
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    main(["--host", "0.0.0.0", "--port", str(port)])
\ No newline at end of file
@@ -103,6 +103,9 @@ start_backend() {
     if pip install -r requirements.txt; then
         print_status "Dependencies installed successfully!"
         
+        print_status "Applying database migrations..."
+        alembic upgrade head
+        
         print_status "Starting FastAPI server..."
         print_status "Backend will be available at: http://localhost:8000"
         print_status "API Documentation: http://localhost:8000/docs"
@@ -167,12 +170,12 @@ case $choice in
         # Start backend in background
         print_status "Starting backend in a new terminal..."
         if command -v gnome-terminal &> /dev/null; then
-            gnome-terminal -- bash -c "cd backend && source venv/bin/activate && uvicorn app.main:app --reload; exec bash"
+            gnome-terminal -- bash -c "cd backend && source venv/bin/activate && alembic upgrade head && uvicorn app.main:app --reload; exec bash"
         elif command -v xterm &> /dev/null; then
-            xterm -e "cd backend && source venv/bin/activate && uvicorn app.main:app --reload; exec bash" &
+            xterm -e "cd backend && source venv/bin/activate && alembic upgrade head && uvicorn app.main:app --reload; exec bash" &
         else
             print_warning "Could not detect terminal. Please start backend manually:"
-            print_warning "  cd backend && source venv/bin/activate && uvicorn app.main:app --reload"
+            print_warning "  cd backend && source venv/bin/activate && alembic upgrade head && uvicorn app.main:app --reload"
         fi
         
         sleep 3
@@ -193,6 +196,7 @@ case $choice in
         echo "   python3 -m venv venv"
         echo "   source venv/bin/activate"
         echo "   pip install -r requirements.txt"
+        echo "   alembic upgrade head"
         echo "   uvicorn app.main:app --reload"
         echo ""
         print_status "3. Set up frontend (in another terminal):"